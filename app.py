@@ -1,12 +1,21 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import time
 import random
-import requests
 import json
+import uuid
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
 
+# pandas, plotly et les modules d'analyse sont importés à la première utilisation
+# (engine charge ses sous-modules à la demande): la page s'affiche sans les attendre
+import engine
+from engine.config import EngineConfig
+from engine.metrics import resume_ops
+from engine.prefetch import Prefetcher
+from engine.serpapi import SerpApiClient, details_params, operation_for, parse_app_details, parse_search_apps, search_params
+from engine.suggestion_index import SuggestionIndex
+from scrapers.metrics import REGISTRY, start_http_server
+from scrapers.quota import QuotaExceeded
+
 # Configuration de la page - DOIT ÊTRE LE PREMIER APPEL À STREAMLIT
 st.set_page_config(
     page_title="App Idea Finder",
@@ -42,6 +51,9 @@ st.markdown("""
 # Initialisation de SerpApi (à configurer dans les secrets de Streamlit)
 SERPAPI_KEY = st.secrets.get("SERPAPI_KEY", None)
 
+# Diagnostic: affiche les clés et réponses brutes de l'API dans la page (désactivé par défaut)
+DEBUG_API = str(st.secrets.get("DEBUG_API", "")).lower() in ("1", "true", "oui", "yes")
+
 # Vérification de la clé API
 if not SERPAPI_KEY:
     st.error("⚠️ Clé API SerpApi non configurée. Veuillez configurer votre clé API dans les paramètres de l'application.")
@@ -58,14 +70,8 @@ if not SERPAPI_KEY:
     st.stop()  # Arrête l'exécution de l'application
 
 # Initialisation des états de session
-if "quota" not in st.session_state:
-    st.session_state.quota = {
-        "total": 100,  # Quota total par session
-        "used": 0,     # Quota utilisé
-        "reset_time": datetime.now().strftime("%H:%M:%S"),
-        "last_error_time": None,
-        "backoff_factor": 1.0
-    }
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # Identifie la session auprès du gouverneur de quota
 
 if "user_agents" not in st.session_state:
     st.session_state.user_agents = [
@@ -77,355 +83,325 @@ if "user_agents" not in st.session_state:
     ]
 
 # Fonctions utilitaires
-def update_quota(cost=1):
-    """Met à jour le quota et vérifie s'il reste des requêtes disponibles"""
-    st.session_state.quota["used"] += cost
-    
-    # Vérifier si le quota est dépassé
-    if st.session_state.quota["used"] >= st.session_state.quota["total"]:
-        remaining_time = 3600  # 1 heure en secondes
-        st.error(f"⚠️ Quota de requêtes atteint! Veuillez réessayer dans environ 1 heure pour éviter d'être bloqué.")
-        return False
-    return True
+@st.cache_resource
+def get_engine():
+    """Moteur unique pour le processus: cache, quota, débit et réessais partagés par les sessions"""
+    return SerpApiClient(EngineConfig.from_mapping(st.secrets))
+
+@st.cache_resource
+def get_suggestion_index():
+    """Index persistant des suggestions déjà vues, partagé par les sessions"""
+    config = get_engine().config
+    return SuggestionIndex(config.index_path, lang="fr", country="fr", ttl=config.cache_ttls.get("google_autocomplete", 3600))
+
+@st.cache_resource
+def get_metrics_server():
+    """Point d'accès /metrics (format Prometheus) si METRICS_PORT est configuré, un seul par processus"""
+    port = get_engine().config.metrics_port
+    return start_http_server(port) if port else None
+
+@st.cache_resource
+def get_prefetcher():
+    """Préchargement en arrière-plan des fiches des premiers concurrents, partagé par les sessions"""
+    return Prefetcher(get_engine())
+
+def afficher_quota_epuise(e):
+    """Affiche l'erreur de quota avec le délai avant de pouvoir réessayer"""
+    minutes = max(1, round((e.retry_after or 3600) / 60))
+    st.error(f"⚠️ {e}! Veuillez réessayer dans environ {minutes} minute(s) pour éviter d'être bloqué.")
 
 def get_random_user_agent():
     """Retourne un User-Agent aléatoire"""
     return random.choice(st.session_state.user_agents)
 
 def handle_api_error(function_name, e):
-    """Gère les erreurs d'API avec backoff exponentiel"""
-    now = datetime.now()
-    
-    # Initialiser le temps de la dernière erreur s'il n'existe pas
-    if st.session_state.quota["last_error_time"] is None:
-        st.session_state.quota["last_error_time"] = now
-        st.session_state.quota["backoff_factor"] = 1.0
-    else:
-        # Augmenter le facteur de backoff
-        time_since_last_error = (now - st.session_state.quota["last_error_time"]).total_seconds()
-        
-        if time_since_last_error < 300:  # Moins de 5 minutes
-            st.session_state.quota["backoff_factor"] *= 1.5
-        else:
-            # Réinitialiser le facteur après 5 minutes sans erreur
-            st.session_state.quota["backoff_factor"] = 1.0
-        
-        st.session_state.quota["last_error_time"] = now
-    
-    # Calculer le temps d'attente
-    wait_time = min(30, 2 * st.session_state.quota["backoff_factor"])
-    
+    """Signale une erreur d'API définitive (les réessais ont lieu dans la couche d'appel)"""
     st.warning(f"⚠️ Erreur lors de l'appel à {function_name}: {str(e)}")
-    st.info(f"Pause de {wait_time:.1f} secondes pour éviter le blocage...")
-    
-    time.sleep(wait_time)
     return None
 
-# Fonctions SerpApi
-@st.cache_data(ttl=3600)
-def serpapi_suggestions(query, lang="fr", country="fr"):
-    """Obtient des suggestions de recherche depuis SerpApi Google Autocomplete"""    
-    url = "https://serpapi.com/search.json"
-    params = {
-        "engine": "google_autocomplete",
-        "q": query,
-        "api_key": SERPAPI_KEY,
-        "gl": country,
-        "hl": lang
-    }
+def attendre_resultat(future, evenements=None):
+    """Attend un appel exécuté hors du thread du script sans bloquer la page
     
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Lève une exception si la réponse contient une erreur HTTP
-        data = response.json()
-        
-        if "suggestions" in data:
-            return [item.get("value", "") for item in data["suggestions"]]
-        return []
-    except Exception as e:
-        handle_api_error("serpapi_suggestions", e)
-        return []
+    L'attente se fait par courtes tranches: un clic sur un widget interrompt
+    le script immédiatement au lieu d'attendre la fin des réessais. Le dernier
+    message de `evenements` (alimenté par le worker) est affiché pendant l'attente.
+    """
+    statut = st.empty()
+    while True:
+        try:
+            resultat = future.result(timeout=0.25)
+        except FuturesTimeoutError:
+            if evenements and evenements.get("message"):
+                statut.caption(evenements["message"])
+            continue
+        statut.empty()
+        return resultat
+
+# Fonctions SerpApi (le moteur fait l'appel, l'interface affiche le diagnostic)
+def serpapi_get(params):
+    """Réponse SerpApi pour cette session; l'appel réel s'exécute hors du thread du script"""
+    return get_engine().get(params, session_id=st.session_state.session_id, wait=attendre_resultat)
 
-@st.cache_data(ttl=3600)
 def serpapi_search_apps(query, lang="fr", country="fr", limit=5):
     """Recherche des applications sur le Play Store via SerpApi"""    
-    url = "https://serpapi.com/search.json"
-    params = {
-        "engine": "google_play",
-        "q": query,
-        "api_key": SERPAPI_KEY,
-        "gl": country,
-        "hl": lang,
-        "store": "apps"
-    }
-    
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = serpapi_get(search_params(query, lang, country))
         
         # Pour débogage
-        st.write("Clés disponibles dans la réponse:", list(data.keys()))
+        if DEBUG_API:
+            st.write("Clés disponibles dans la réponse:", list(data.keys()))
         
-        results = []
-        
-        # Vérifier les deux structures possibles selon la documentation
-        if "organic_results" in data and data["organic_results"]:
-            st.success("Résultats trouvés dans 'organic_results'")
-            
-            for app_data in data["organic_results"][:limit]:
-                # Format original
-                app_info = {
-                    "appId": app_data.get("id", app_data.get("app_id", "")),
-                    "title": app_data.get("title", ""),
-                    "developer": app_data.get("developer", ""),
-                    "score": app_data.get("rating", 0),
-                    "installs": app_data.get("downloads", "Non disponible"),
-                    "price": app_data.get("price_text", "Gratuit").replace("Gratuit", "0"),
-                    "free": "Gratuit" in app_data.get("price_text", "Gratuit")
-                }
-                results.append(app_info)
-                
-        elif "apps_results" in data and data["apps_results"]:
-            st.success("Résultats trouvés dans 'apps_results'")
-            
-            for app_data in data["apps_results"][:limit]:
-                app_info = {
-                    "appId": app_data.get("id", app_data.get("app_id", "")),
-                    "title": app_data.get("title", ""),
-                    "developer": app_data.get("developer", ""),
-                    "score": app_data.get("rating", app_data.get("score", 0)),
-                    "installs": app_data.get("downloads", app_data.get("installs", "Non disponible")),
-                    "price": app_data.get("price_text", "Gratuit").replace("Gratuit", "0"),
-                    "free": "Gratuit" in app_data.get("price_text", "Gratuit")
-                }
-                results.append(app_info)
+        results, source = parse_search_apps(data, limit)
+        if source and DEBUG_API:
+            st.success(f"Résultats trouvés dans '{source}'")
         
         # Si aucun résultat dans ces structures, afficher toute la réponse pour débogage
         if not results:
             st.warning("Aucun résultat trouvé dans les structures attendues")
-            st.json(data)
+            if DEBUG_API:
+                st.json(data)
         
         return results
     
+    except QuotaExceeded as e:
+        afficher_quota_epuise(e)
+        return []
     except Exception as e:
         st.error(f"Erreur détaillée: {str(e)}")
         handle_api_error("serpapi_search_apps", e)
         return []
 
-@st.cache_data(ttl=3600)
 def serpapi_app_details(app_id, lang="fr", country="fr"):
     """Récupère les détails d'une application via SerpApi"""
-    url = "https://serpapi.com/search.json"
-    params = {
-        "engine": "google_play",
-        "id": app_id,
-        "api_key": SERPAPI_KEY,
-        "gl": country,
-        "hl": lang
-    }
-    
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = serpapi_get(details_params(app_id, lang, country))
         
         # Pour débogage
-        st.write("Clés disponibles dans la réponse des détails:", list(data.keys()))
+        if DEBUG_API:
+            st.write("Clés disponibles dans la réponse des détails:", list(data.keys()))
         
-        # Vérifier les différentes structures possibles
-        app_data = None
-        if "app_results" in data:
-            app_data = data["app_results"]
-        elif "applications" in data and data["applications"]:
-            app_data = data["applications"][0]  # Prendre la première application
-        
-        if not app_data:
+        details, app_reviews, avis_stats, avis_negatifs = parse_app_details(data)
+        if not details:
             st.error(f"Aucune information trouvée pour l'application {app_id}")
-            st.json(data)  # Afficher les données brutes pour débogage
-            return None, [], {}, []
-        
-        # Extraire les informations pertinentes
-        details = {
-            "title": app_data.get("title", ""),
-            "description": app_data.get("description", ""),
-            "genre": app_data.get("genre", app_data.get("category", "")),
-            "icon": app_data.get("thumbnail", app_data.get("icon", "")),
-            "developer": app_data.get("developer", ""),
-            "minInstalls": app_data.get("installs", app_data.get("downloads", "Non disponible")),
-            "updated": app_data.get("updated", "Non disponible")
-        }
-        
-        # Récupérer les avis (si disponibles)
-        app_reviews = []
-        reviews_data = app_data.get("reviews", [])
-        for review in reviews_data:
-            app_reviews.append({
-                "content": review.get("content", ""),
-                "score": review.get("rating", review.get("score", 0))
-            })
-        
-        # Calculer les statistiques des avis
-        avis_stats = {
-            "nb_avis_1": sum(1 for r in app_reviews if r["score"] == 1),
-            "nb_avis_2": sum(1 for r in app_reviews if r["score"] == 2),
-            "nb_avis_3": sum(1 for r in app_reviews if r["score"] == 3),
-            "nb_avis_4": sum(1 for r in app_reviews if r["score"] == 4),
-            "nb_avis_5": sum(1 for r in app_reviews if r["score"] == 5),
-        }
-        
-        # Extraire les avis négatifs
-        avis_negatifs = [r for r in app_reviews if r["score"] <= 3]
+            if DEBUG_API:
+                st.json(data)  # Afficher les données brutes pour débogage
         
         return details, app_reviews, avis_stats, avis_negatifs
         
+    except QuotaExceeded as e:
+        afficher_quota_epuise(e)
+        return None, [], {}, []
     except Exception as e:
         st.error(f"Erreur détaillée: {str(e)}")
         handle_api_error("serpapi_app_details", e)
         return None, [], {}, []
 
 # Fonctions d'analyse
-@st.cache_data(ttl=3600)
-def obtenir_suggestions_keywords(prefixes, max_suggestions=5):
-    """Obtient les suggestions de recherche pour une liste de préfixes"""
-    resultats = {}
-    
-    for prefix in prefixes:
-        if prefix.strip():
-            if not update_quota(cost=1):
-                break
-                
-            try:
-                # Pause aléatoire avant chaque requête
-                time.sleep(random.uniform(1.5, 3.0))
-                
-                # Utiliser SerpApi pour les suggestions
-                sugg = serpapi_suggestions(
-                    prefix,
-                    lang="fr",
-                    country="fr"
-                )
-                resultats[prefix] = sugg[:max_suggestions] if sugg else []
-                
-            except Exception as e:
-                handle_api_error(f"suggestions('{prefix}')", e)
-    
-    # Aplatir les résultats
-    tous_resultats = []
-    for prefix, sugg_list in resultats.items():
-        for sugg in sugg_list:
-            tous_resultats.append({"prefix": prefix, "suggestion": sugg})
-    
-    return pd.DataFrame(tous_resultats) if tous_resultats else pd.DataFrame(columns=["prefix", "suggestion"])
+def afficher_progression(barre, progression, libelle):
+    """Barre de progression d'après le travail réellement terminé et en cours"""
+    barre.progress(
+        progression.faits / max(progression.total, 1),
+        text=f"{libelle}: {progression.faits}/{progression.total} terminés, {progression.en_cours} en cours"
+    )
 
-@st.cache_data(ttl=3600)
-def analyser_concurrence(keyword, limit=5, max_retries=3):
-    """Analyse la concurrence pour un mot-clé donné avec tentatives de réessai"""
-    if not update_quota(cost=2):  # Coût plus élevé pour l'analyse concurrentielle
-        return pd.DataFrame(columns=["app_id", "title", "score", "installs", "price"])
-    
-    for attempt in range(max_retries):
-        try:
-            # Pause plus longue pour les recherches d'applications
-            time.sleep(random.uniform(2.0, 4.0))
-            
-            # Rechercher les applications via SerpApi
-            results = serpapi_search_apps(
-                keyword,
-                lang="fr",
-                country="fr",
-                limit=limit
-            )
-            
-            if not results:
-                return pd.DataFrame(columns=["app_id", "title", "score", "installs", "price"])
-            
-            # Extraire les données de base
-            apps_data = []
-            for app_info in results:
-                apps_data.append({
-                    "app_id": app_info["appId"],
-                    "title": app_info["title"],
-                    "developer": app_info["developer"],
-                    "score": app_info["score"],
-                    "installs": app_info.get("installs", "Non disponible"),
-                    "price": app_info["price"],
-                    "free": app_info["free"]
-                })
-            
-            return pd.DataFrame(apps_data)
-            
-        except Exception as e:
-            wait_time = handle_api_error(f"search('{keyword}')", e)
-            if attempt == max_retries - 1:
-                st.error(f"Échec après {max_retries} tentatives. Veuillez réessayer plus tard.")
-                return pd.DataFrame(columns=["app_id", "title", "score", "installs", "price"])
-
-@st.cache_data(ttl=3600)
-def analyser_details_app(app_id, max_retries=3):
-    """Récupère les détails d'une application avec tentatives de réessai"""
-    if not update_quota(cost=3):  # Coût élevé pour l'analyse détaillée
-        return None, [], {}, []
-    
-    for attempt in range(max_retries):
-        try:
-            # Pause plus longue pour les détails d'application
-            time.sleep(random.uniform(2.5, 5.0))
-            
-            # Obtenir les détails via SerpApi
-            details, app_reviews, avis_stats, avis_negatifs = serpapi_app_details(
-                app_id,
-                lang="fr",
-                country="fr"
-            )
-            
-            return details, app_reviews, avis_stats, avis_negatifs
-            
-        except Exception as e:
-            wait_time = handle_api_error(f"app_details('{app_id}')", e)
-            if attempt == max_retries - 1:
-                st.error(f"Échec après {max_retries} tentatives. Veuillez réessayer plus tard.")
-                return None, [], {}, []
-
-def evaluer_potentiel_marche(apps_df):
-    """Évalue le potentiel d'un marché en fonction des apps concurrentes"""
-    if apps_df.empty:
-        return {
-            "score": 0,
-            "nb_concurrents": 0,
-            "note_moyenne": 0,
-            "difficulte": "Indéterminée",
-            "potentiel": "Indéterminé"
-        }
-    
-    nb_concurrents = len(apps_df)
-    note_moyenne = apps_df["score"].mean() if "score" in apps_df else 0
-    
-    # Calcul du potentiel
-    if nb_concurrents == 0:
-        difficulte = "Indéterminée"
-        potentiel = "Indéterminé"
-        score = 0
-    elif nb_concurrents < 3:
-        difficulte = "Faible"
-        potentiel = "Incertain" if note_moyenne >= 4.0 else "Faible"
-        score = 40 if note_moyenne >= 4.0 else 20
-    elif nb_concurrents <= 10:
-        difficulte = "Moyenne"
-        potentiel = "Élevé" if note_moyenne < 4.0 else "Moyen"
-        score = 80 if note_moyenne < 4.0 else 60
+def signaler_erreur(item, e):
+    if isinstance(e, QuotaExceeded):
+        afficher_quota_epuise(e)
     else:
-        difficulte = "Élevée"
-        potentiel = "Faible" if note_moyenne >= 4.5 else "Moyen"
-        score = 30 if note_moyenne >= 4.5 else 50
-    
-    return {
-        "score": score,
-        "nb_concurrents": nb_concurrents,
-        "note_moyenne": round(note_moyenne, 1),
-        "difficulte": difficulte,
-        "potentiel": potentiel
-    }
+        handle_api_error(f"'{item}'", e)
+
+def graphique_suggestions(suggestions_df):
+    import plotly.express as px
+    return px.bar(
+        suggestions_df.groupby("prefix").count().reset_index(),
+        x="prefix",
+        y="suggestion",
+        title="Nombre de suggestions par préfixe",
+        labels={"suggestion": "Nombre de suggestions", "prefix": "Préfixe"}
+    )
+
+def rechercher_suggestions(prefixes, max_suggestions=5, max_workers=4):
+    """Suggestions de chaque préfixe, affichées dès que chaque préfixe est terminé (voir engine.analysis)"""
+    prefixes = [p for p in dict.fromkeys(prefixes) if p.strip()]
+    barre = st.progress(0.0, text=f"Suggestions: 0/{len(prefixes)} terminés")
+    tableau, graphique = st.empty(), st.empty()
+    resultats = {}
+    for progression in engine.analysis.iter_suggestions_par_prefixe(
+        get_engine(),
+        prefixes,
+        max_workers,
+        session_id=st.session_state.session_id,
+        index=get_suggestion_index()
+    ):
+        afficher_progression(barre, progression, "Suggestions")
+        if progression.error is not None:
+            signaler_erreur(progression.item, progression.error)
+            continue
+        resultats[progression.item] = progression.result
+        partiel = engine.analysis.suggestions_dataframe(prefixes, resultats, max_suggestions)
+        tableau.dataframe(partiel)
+        if len(resultats) > 1 and not partiel.empty:
+            graphique.plotly_chart(graphique_suggestions(partiel), use_container_width=True, key=f"suggestions_{progression.faits}")
+    barre.empty()
+    tableau.empty()
+    graphique.empty()
+    return engine.analysis.suggestions_dataframe(prefixes, resultats, max_suggestions)
+
+def comparer_mots_cles(keywords, limit=5, max_workers=4):
+    """Classement par potentiel de plusieurs mots-clés, mis à jour dès que chaque mot-clé est analysé"""
+    import pandas as pd
+    import plotly.express as px
+    barre = st.progress(0.0, text=f"Concurrence: 0/{len(keywords)} terminés")
+    tableau, graphique = st.empty(), st.empty()
+    concurrences = {}
+    for progression in engine.analysis.iter_concurrence(
+        get_engine(),
+        keywords,
+        limit,
+        max_workers,
+        session_id=st.session_state.session_id
+    ):
+        afficher_progression(barre, progression, "Concurrence")
+        if progression.error is not None:
+            signaler_erreur(progression.item, progression.error)
+            continue
+        concurrences[progression.item] = progression.result.assign(keyword=progression.item)
+        classement = engine.classer_potentiel_marches(
+            pd.concat([df for df in concurrences.values() if not df.empty] or [pd.DataFrame(columns=["keyword", "score"])]),
+            keywords=list(concurrences)
+        )
+        tableau.dataframe(classement)
+        graphique.plotly_chart(
+            px.bar(classement, x="keyword", y="score", color="potentiel", title="Score de potentiel par mot-clé",
+                   labels={"keyword": "Mot-clé", "score": "Score"}),
+            use_container_width=True,
+            key=f"potentiel_{progression.faits}"
+        )
+    barre.empty()
+    return concurrences
+
+def explorer_prefixes(seeds, max_depth=2, budget=50, min_yield=0.5, max_workers=4):
+    """Exploration récursive des suggestions à partir de préfixes de départ (voir engine.crawler)
+
+    Pas de st.cache_data: une exploration partielle (quota épuisé) serait resservie une heure
+    à toutes les sessions; chaque réponse est déjà dans le cache du moteur et dans l'index.
+    """
+    suggestions_df, erreurs, bilan = engine.crawler.explorer_prefixes(
+        get_engine(),
+        seeds,
+        max_depth=max_depth,
+        budget=budget,
+        min_yield=min_yield,
+        max_workers=max_workers,
+        session_id=st.session_state.session_id,
+        index=get_suggestion_index()
+    )
+    for prefix, e in erreurs:
+        if isinstance(e, QuotaExceeded):
+            afficher_quota_epuise(e)
+        else:
+            handle_api_error(f"suggestions('{prefix}')", e)
+    return suggestions_df, bilan
+
+def analyser_concurrence(keyword, limit=5):
+    """Analyse la concurrence pour un mot-clé donné (les réessais sont gérés par le moteur)
+
+    Sans st.cache_data: un résultat vide (quota de la session épuisé, erreur) serait servi à toutes
+    les sessions, sans débit sur leur quota; le cache SQLite du moteur évite déjà les appels répétés.
+    """
+    # Rechercher les applications via SerpApi
+    return engine.concurrence_dataframe(serpapi_search_apps(
+        keyword,
+        lang="fr",
+        country="fr",
+        limit=limit
+    ))
+
+def analyser_details_app(app_id):
+    """Récupère les détails d'une application (préchargés en cache le plus souvent, voir get_prefetcher)"""
+    # Obtenir les détails via SerpApi
+    return serpapi_app_details(
+        app_id,
+        lang="fr",
+        country="fr"
+    )
+
+def collecter_avis_app(app_id, max_avis=200):
+    """Avis récents d'une application, par pages de 100 (voir engine.analysis.collecter_avis)
+
+    Jamais mis en cache ici: après un échec, la liste vide affichée ne doit pas survivre au rechargement
+    du quota. Les pages déjà obtenues restent dans le cache du moteur.
+    """
+    try:
+        return engine.analysis.collecter_avis(
+            get_engine(),
+            app_id,
+            max_avis,
+            session_id=st.session_state.session_id
+        )
+    except QuotaExceeded as e:
+        afficher_quota_epuise(e)
+    except Exception as e:
+        handle_api_error("collecter_avis", e)
+    return []
+
+def analyser_tous_concurrents(app_ids, max_avis=200, max_workers=4):
+    """Fiches et avis de tous les concurrents en parallèle (dans la limite de débit), ajoutés à la session
+
+    Retourne le nombre d'applications analysées.
+    """
+    barre = st.progress(0.0, text=f"Fiches: 0/{len(app_ids)} terminées")
+    avis_store = st.session_state.setdefault("avis_store", engine.ReviewStore())
+    details_apps = st.session_state.setdefault("details_apps", {})
+    analysees = 0
+    for progression in engine.iter_details_concurrents(
+        get_engine(),
+        app_ids,
+        max_avis,
+        max_workers,
+        session_id=st.session_state.session_id
+    ):
+        afficher_progression(barre, progression, "Fiches")
+        if progression.error is not None:
+            signaler_erreur(progression.item, progression.error)
+            continue
+        details, avis = progression.result
+        if not details:
+            continue
+        details_apps[progression.item] = details
+        avis_store.ajouter(progression.item, avis)
+        analysees += 1
+    barre.empty()
+    return analysees
+
+def afficher_comparaison_concurrents():
+    """Distribution des notes côte à côte et avis négatifs fusionnés des concurrents analysés"""
+    import plotly.express as px
+    avis_store = st.session_state.get("avis_store")
+    if avis_store is None or not len(avis_store):
+        return
+    titres = {app_id: d.get("title") or app_id for app_id, d in st.session_state.get("details_apps", {}).items()}
+    distribution, negatifs = engine.comparer_concurrents(avis_store, titres)
+
+    st.markdown(f"### Comparaison de {len(avis_store.app_ids())} concurrents ({len(avis_store)} avis)")
+    fig = px.bar(
+        distribution,
+        x="note",
+        y="part",
+        color="title",
+        barmode="group",
+        hover_data=["nb_avis"],
+        title="Distribution des notes par application (part des avis)",
+        labels={"note": "Note", "part": "Part des avis", "title": "Application"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    stats = avis_store.stats_par_app()
+    stats.insert(0, "Application", [titres.get(app_id, app_id) for app_id in stats.index])
+    st.dataframe(stats.reset_index(drop=True))
+
+    st.markdown(f"#### Avis négatifs de tous les concurrents ({len(negatifs)})")
+    st.dataframe(negatifs[["title", "score", "content", "at"]], hide_index=True)
 
 # Interface utilisateur
 st.markdown('<h1 class="main-header">🔍 App Idea Finder</h1>', unsafe_allow_html=True)
@@ -438,28 +414,79 @@ des utilisateurs et la concurrence sur le Google Play Store.
 with st.sidebar:
     st.header("Configuration")
     
-    # Affichage du quota
+    # Quota partagé: seuls les appels réels à l'API (hors cache) sont décomptés
+    quota_status = get_engine().governor.status(st.session_state.session_id)
+    quota_ratio = quota_status["session_used"] / quota_status["session_share"]
+    quota_epuise = quota_status["session_used"] + 1 > quota_status["session_share"]
     st.markdown(f"""
     ### Quota de requêtes
     <div class="metric-card">
-        <p>Utilisé: <b>{st.session_state.quota['used']}/{st.session_state.quota['total']}</b></p>
-        <p>Réinitialisation: <b>{st.session_state.quota['reset_time']}</b></p>
-        <div style="background-color: {'green' if st.session_state.quota['used'] < st.session_state.quota['total']*0.7 
-                                     else 'orange' if st.session_state.quota['used'] < st.session_state.quota['total']*0.9 
-                                     else 'red'}; 
+        <p>Session: <b>{quota_status['session_used']:.0f}/{quota_status['session_share']:.0f}</b>
+           ({quota_status['active_sessions']} session(s) active(s))</p>
+        <p>Réserve globale: <b>{quota_status['global_tokens']:.0f}/{quota_status['global_capacity']:.0f}</b></p>
+        <p>Réinitialisation: <b>{datetime.fromtimestamp(quota_status['session_reset_at']).strftime("%H:%M:%S")}</b></p>
+        <div style="background-color: {'green' if quota_ratio < 0.7 else 'orange' if quota_ratio < 0.9 else 'red'}; 
                   height: 10px; 
-                  width: {min(100, (st.session_state.quota['used']/st.session_state.quota['total'])*100)}%; 
+                  width: {min(100, quota_ratio * 100)}%; 
                   border-radius: 5px;"></div>
     </div>
     """, unsafe_allow_html=True)
     
-    # Option pour réinitialiser le quota (à des fins de démonstration)
-    if st.button("Réinitialiser le quota"):
-        st.session_state.quota["used"] = 0
-        st.session_state.quota["reset_time"] = datetime.now().strftime("%H:%M:%S")
-        st.session_state.quota["backoff_factor"] = 1.0
-        st.session_state.quota["last_error_time"] = None
-        st.rerun()
+    # Efficacité du cache persistant: chaque succès est une requête SerpApi économisée
+    cache_stats = get_engine().cache.stats()
+    st.markdown(f"""
+    ### Cache des réponses
+    <div class="metric-card">
+        <p>Requêtes économisées: <b>{cache_stats['hits']}</b> / {cache_stats['hits'] + cache_stats['misses']} 
+           ({cache_stats['hit_ratio']:.0%})</p>
+        <p>Entrées: <b>{cache_stats['entries']}</b> ({cache_stats['bytes'] / (1024 * 1024):.1f} Mo / {get_engine().config.cache_max_mb:.0f} Mo)</p>
+        <p>Fiches préchargées: <b>{get_prefetcher().stats()['prechargees']}</b> ({get_prefetcher().stats()['unites']:.0f} unités de quota)</p>
+        <p>Appels fusionnés: <b>{get_engine().flights.stats()['saved']}</b> (requêtes identiques simultanées servies par un seul appel)</p>
+        <p>Suggestions indexées: <b>{len(get_suggestion_index())}</b> ({get_suggestion_index().prefixes_explores()} préfixes explorés)</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Cassette (SERPAPI_CASSETTE): enregistrement des échanges réels ou relecture hors ligne
+    cassette = get_engine().cassette
+    if cassette is not None:
+        cassette_stats = cassette.stats()
+        if cassette.mode == "replay":
+            st.info(f"📼 Relecture de {cassette.path}: {cassette_stats['played']} réponses servies sans réseau, "
+                    f"{cassette_stats['missed']} absentes de la cassette")
+        else:
+            st.caption(f"📼 Enregistrement dans {cassette.path}: {cassette_stats['interactions']} échanges "
+                       f"({cassette_stats['stored_bytes'] / 1024:.0f} Kio compressés)")
+
+    # Secours Play Store (PLAY_FALLBACK): réponses obtenues sans quota une fois celui-ci épuisé
+    fallback = get_engine().fallback
+    if fallback is not None and fallback.stats():
+        st.caption("🛟 Quota épuisé, réponses du Play Store: " +
+                   ", ".join(f"{engine} {n}" for engine, n in sorted(fallback.stats().items())))
+
+    # Métriques du processus: latences, cache, quota, réessais, tailles de réponses, calcul des scores
+    get_metrics_server()
+    if get_engine().config.metrics_path:
+        REGISTRY.write_textfile(get_engine().config.metrics_path)
+    with st.expander("📈 Métriques d'exploitation"):
+        ops = resume_ops()
+        if ops["appels"]:
+            st.markdown("\n".join(
+                ["| Moteur | Appels | p50 | p95 | p95 API | Taille moy. |", "|---|---:|---:|---:|---:|---:|"]
+                + [f"| {moteur} | {m['appels']} | {m['p50_ms']:.0f} ms | {m['p95_ms']:.0f} ms | "
+                   f"{m['amont_p95_ms']:.0f} ms | {m['octets_moyens'] / 1024:.1f} Kio |"
+                   for moteur, m in ops["appels"].items()]
+            ))
+        else:
+            st.caption("Aucun appel depuis le démarrage du processus")
+        reessais = ", ".join(f"{classe}: {n:.0f}" for classe, n in ops["reessais"].items()) or "aucun"
+        scores = ", ".join(f"{etape} {ms:.0f} ms" for etape, ms in ops["scores_p95_ms"].items()) or "aucun"
+        st.markdown(f"""
+        - Cache: **{ops['cache_hit_ratio']:.0%}** de succès (lecture p95: {ops['cache_p95_ms']:.1f} ms)
+        - Quota: **{ops['quota_unites']:.0f}** unités ({ops['quota_unites_par_minute']:.1f}/min sur 5 min), attente p95: {ops['quota_attente_p95_ms']:.0f} ms, refus: {ops['quota_refus']}
+        - Réessais: {reessais}; erreurs: {ops['erreurs']:.0f}
+        - Calcul des scores (p95): {scores}
+        """)
+        st.download_button("Télécharger (format Prometheus)", REGISTRY.render(), file_name="metrics.prom", mime="text/plain")
     
     analyse_mode = st.radio(
         "Mode d'analyse",
@@ -469,36 +496,33 @@ with st.sidebar:
     with st.expander("Paramètres anti-blocage", expanded=False):
         max_suggestions = st.slider("Nombre max de suggestions par préfixe", 2, 10, 3)
         max_concurrents = st.slider("Nombre max d'apps concurrentes à analyser", 2, 10, 3)
+        max_workers = st.slider("Requêtes simultanées (suggestions, fiches)", 1, 8, 4)
+        max_avis = st.slider("Avis analysés par application", 0, 2000, 200, 100,
+                             help="1 unité de quota par page de 100 avis; 0 = avis de la fiche uniquement")
         st.info("💡 Des valeurs plus faibles réduisent considérablement le risque d'être bloqué")
         
         st.divider()
         st.markdown("### Stratégies anti-blocage actives")
         st.markdown("""
-        - ✅ Délais aléatoires entre requêtes
-        - ✅ Système de quota par session
-        - ✅ Backoff exponentiel en cas d'erreur
+        - ✅ Limiteur de débit partagé (token bucket)
+        - ✅ Quota partagé entre sessions (part équitable par session)
+        - ✅ Réessais avec backoff exponentiel (jitter), Retry-After et disjoncteur
         - ✅ Rotation des User-Agents
-        - ✅ Mise en cache des résultats (1h)
+        - ✅ Cache persistant des réponses (SQLite, TTL par moteur)
         - ✅ Limitation du volume de données
         """)
 
 # Section de test API pour diagnostic temporaire
 with st.expander("🔧 Test direct de l'API SerpApi"):
     if st.button("Tester la connexion à l'API"):
-        test_url = "https://serpapi.com/search.json"
-        test_params = {
-            "engine": "google_play",
-            "q": "fitness tracker",  # Mot-clé simple pour test
-            "api_key": SERPAPI_KEY,
-            "gl": "fr",
-            "hl": "fr",
-            "store": "apps"
-        }
+        # Appel direct (sans cache) pour vérifier la connexion et la clé, décompté du quota de la session
+        test_params = search_params("fitness tracker", lang="fr", country="fr")  # Mot-clé simple pour test
         
         try:
-            test_response = requests.get(test_url, test_params)
-            test_response.raise_for_status()
-            test_data = test_response.json()
+            client = get_engine()
+            if not client.replaying:
+                client.acquire_quota(st.session_state.session_id, operation_for(test_params))
+            test_data = client.fetch(test_params)
             
             st.success("Connexion à l'API SerpApi réussie!")
             st.write("Structure de la réponse:")
@@ -521,18 +545,109 @@ with st.expander("🔧 Test direct de l'API SerpApi"):
                 st.write(f"Exemple de structure dans '{sample_key}':")
                 st.json(test_data[sample_key][0])
             
+        except QuotaExceeded as e:
+            afficher_quota_epuise(e)
         except Exception as e:
             st.error(f"Erreur lors du test de l'API: {str(e)}")
 
-# Interface principale
-tab1, tab2, tab3 = st.tabs(["Recherche", "Analyse de la concurrence", "Potentiel du marché"])
+# Interface principale: chaque onglet est un fragment, une interaction n'y relance que lui.
+# Un onglet dont les résultats alimentent les suivants les enregistre puis relance toute la page.
+def quota_session_epuise():
+    statut = get_engine().governor.status(st.session_state.session_id)
+    return statut["session_used"] + 1 > statut["session_share"]
+
+def publier(**etat):
+    """Enregistre des résultats utilisés par les onglets suivants et relance toute la page"""
+    for nom, valeur in etat.items():
+        st.session_state[nom] = valeur
+    st.rerun(scope="app")
+
+def afficher_suggestions():
+    """Résultats de la dernière recherche (onglet 1)"""
+    if "suggestions_df" not in st.session_state:
+        return
+    import plotly.express as px
+    suggestions_df = st.session_state.suggestions_df
+    recherche = st.session_state.get("recherche", {})
+    
+    if "mot_cle" in recherche:
+        st.success(f"Mot-clé '{recherche['mot_cle']}' prêt à être analysé!")
+        return
+    if "bilan" in recherche:
+        bilan = recherche["bilan"]
+        st.info(
+            f"{bilan['prefixes']} préfixes explorés, {bilan['requetes']} requêtes payées, "
+            f"{bilan['elagues']} branches élaguées — arrêt: {bilan['arret']}"
+        )
+    if suggestions_df.empty:
+        st.warning("Aucune suggestion trouvée. Essayez d'autres préfixes.")
+        return
+    
+    st.success(f"✅ {len(suggestions_df)} suggestions trouvées!")
+    st.dataframe(suggestions_df)
+    if "profondeur" in suggestions_df:
+        fig = px.bar(
+            suggestions_df.groupby("profondeur").count().reset_index(),
+            x="profondeur",
+            y="suggestion",
+            title="Suggestions nouvelles par profondeur",
+            labels={"suggestion": "Nombre de suggestions", "profondeur": "Profondeur"}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    elif len(suggestions_df) > 1:
+        st.plotly_chart(graphique_suggestions(suggestions_df), use_container_width=True)
+
+def afficher_concurrence():
+    """Résultats de la dernière analyse de concurrence (onglet 2)"""
+    if "concurrence_df" not in st.session_state:
+        return
+    import plotly.express as px
+    concurrence_df = st.session_state.concurrence_df
+    selected_keyword = st.session_state.selected_keyword
+    
+    if concurrence_df.empty:
+        st.warning(f"Aucune application trouvée pour le mot-clé '{selected_keyword}'. Essayez un autre mot-clé.")
+        return
+    
+    st.success(f"✅ {len(concurrence_df)} applications concurrentes trouvées pour '{selected_keyword}'!")
+    
+    # Afficher les résultats
+    st.dataframe(concurrence_df)
+    
+    # Visualisation des scores
+    fig = px.bar(
+        concurrence_df,
+        x="title",
+        y="score",
+        color="score",
+        color_continuous_scale="RdYlGn",
+        title=f"Évaluations des applications pour '{selected_keyword}'",
+        labels={"title": "Application", "score": "Évaluation"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Résumé du marché
+    potentiel = st.session_state.potentiel
+    st.markdown('<h3>Résumé du marché</h3>', unsafe_allow_html=True)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Nombre de concurrents", potentiel["nb_concurrents"])
+    with col2:
+        st.metric("Note moyenne", potentiel["note_moyenne"])
+    with col3:
+        st.metric("Difficulté", potentiel["difficulte"])
+    with col4:
+        st.metric("Potentiel", potentiel["potentiel"])
 
 # Onglet 1: Recherche
-with tab1:
+@st.fragment
+def onglet_recherche():
     st.markdown('<h2 class="sub-header">Recherche de mots-clés</h2>', unsafe_allow_html=True)
+    quota_epuise = quota_session_epuise()
     
     if analyse_mode == "Recherche par préfixe":
-        prefixe_type = st.radio("Type de recherche", ["Alphabétique", "Personnalisé"])
+        prefixe_type = st.radio("Type de recherche", ["Alphabétique", "Personnalisé", "Exploration récursive"])
         
         if prefixe_type == "Alphabétique":
             lettres = st.multiselect(
@@ -542,7 +657,7 @@ with tab1:
             )
             if len(lettres) > 3:
                 st.warning("⚠️ Sélectionner plus de 3 lettres augmente considérablement le risque d'être bloqué!")
-        else:
+        elif prefixe_type == "Personnalisé":
             prefixes_input = st.text_area(
                 "Entrez vos préfixes (un par ligne, maximum 3 recommandé)",
                 "app"
@@ -551,122 +666,114 @@ with tab1:
             if len(lettres) > 3:
                 st.warning("⚠️ Utiliser plus de 3 préfixes augmente considérablement le risque d'être bloqué!")
         
-        if st.button("Rechercher des suggestions", disabled=st.session_state.quota["used"] >= st.session_state.quota["total"]):
+        if prefixe_type == "Exploration récursive":
+            seeds_input = st.text_area("Préfixes de départ (un par ligne)", "fitness")
+            seeds = [p.strip() for p in seeds_input.split("\n") if p.strip()]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                profondeur = st.slider("Profondeur maximale", 1, 3, 2)
+            with col2:
+                budget = st.slider("Budget de requêtes", 5, 200, 40)
+            with col3:
+                rendement_min = st.slider("Rendement minimal (nouvelles suggestions / requête)", 0.0, 5.0, 0.5, 0.1)
+            st.caption("Seules les branches qui apportent des suggestions nouvelles sont développées; les réponses en cache ne sont pas décomptées du budget.")
+            
+            if st.button("Explorer", disabled=quota_epuise):
+                if not seeds:
+                    st.warning("Veuillez entrer au moins un préfixe de départ.")
+                else:
+                    with st.spinner(f"Exploration à partir de {len(seeds)} préfixes..."):
+                        suggestions_df, bilan = explorer_prefixes(seeds, profondeur, budget, rendement_min, max_workers)
+                    publier(suggestions_df=suggestions_df, recherche={"bilan": bilan})
+        
+        elif st.button("Rechercher des suggestions", disabled=quota_epuise):
             if not lettres:
                 st.warning("Veuillez sélectionner au moins un préfixe à analyser.")
             else:
-                with st.spinner(f"Recherche de suggestions pour {len(lettres)} préfixes..."):
-                    # Simulation d'une barre de progression
-                    progress_bar = st.progress(0)
-                    for i in range(101):
-                        progress_bar.progress(i)
-                        time.sleep(0.01)
-                    
-                    # Récupérer les suggestions
-                    suggestions_df = obtenir_suggestions_keywords(lettres, max_suggestions)
-                    
-                    # Stocker dans la session state
-                    st.session_state.suggestions_df = suggestions_df
-                    
-                    if suggestions_df.empty:
-                        st.warning("Aucune suggestion trouvée pour les préfixes sélectionnés. Essayez d'autres préfixes.")
-                    else:
-                        st.success(f"✅ {len(suggestions_df)} suggestions trouvées!")
-                        
-                        # Afficher les résultats
-                        st.dataframe(suggestions_df)
-                        
-                        if len(suggestions_df) > 1:
-                            # Visualisation
-                            fig = px.bar(
-                                suggestions_df.groupby("prefix").count().reset_index(),
-                                x="prefix",
-                                y="suggestion",
-                                title="Nombre de suggestions par préfixe",
-                                labels={"suggestion": "Nombre de suggestions", "prefix": "Préfixe"}
-                            )
-                            st.plotly_chart(fig, use_container_width=True)
+                # Chaque préfixe terminé est affiché immédiatement
+                suggestions_df = rechercher_suggestions(lettres, max_suggestions, max_workers)
+                publier(suggestions_df=suggestions_df, recherche={})
     else:
         mot_cle = st.text_input("Entrez un mot-clé spécifique à analyser", "fitness tracker")
         
-        if st.button("Analyser le mot-clé", disabled=st.session_state.quota["used"] >= st.session_state.quota["total"]):
+        if st.button("Analyser le mot-clé", disabled=quota_epuise):
             if not mot_cle:
                 st.warning("Veuillez entrer un mot-clé à analyser.")
             else:
-                with st.spinner(f"Analyse du mot-clé '{mot_cle}'..."):
-                    # Créer un DataFrame avec ce seul mot-clé
-                    st.session_state.suggestions_df = pd.DataFrame([{
+                import pandas as pd
+                # Créer un DataFrame avec ce seul mot-clé
+                publier(
+                    suggestions_df=pd.DataFrame([{
                         "prefix": mot_cle.split()[0] if ' ' in mot_cle else mot_cle,
                         "suggestion": mot_cle
-                    }])
-                    
-                    st.success(f"Mot-clé '{mot_cle}' prêt à être analysé!")
-                    
-                    # Rediriger vers l'onglet d'analyse
-                    st.session_state.active_tab = "Analyse"
+                    }]),
+                    recherche={"mot_cle": mot_cle}
+                )
+    
+    afficher_suggestions()
 
 # Onglet 2: Analyse de la concurrence
-with tab2:
+@st.fragment
+def onglet_concurrence():
     st.markdown('<h2 class="sub-header">Analyse de la concurrence</h2>', unsafe_allow_html=True)
+    quota_epuise = quota_session_epuise()
     
     if "suggestions_df" in st.session_state and not st.session_state.suggestions_df.empty:
         # Liste des suggestions disponibles
         suggestions_list = st.session_state.suggestions_df["suggestion"].unique().tolist()
         selected_keyword = st.selectbox("Sélectionnez un mot-clé à analyser", suggestions_list)
         
-        if st.button("Analyser la concurrence", disabled=st.session_state.quota["used"] >= st.session_state.quota["total"]):
+        if st.button("Analyser la concurrence", disabled=quota_epuise):
             with st.spinner(f"Analyse de la concurrence pour '{selected_keyword}'..."):
                 # Analyser la concurrence
                 concurrence_df = analyser_concurrence(selected_keyword, max_concurrents)
-                
-                # Stocker dans la session state
-                st.session_state.concurrence_df = concurrence_df
-                st.session_state.selected_keyword = selected_keyword
-                
-                if concurrence_df.empty:
-                    st.warning(f"Aucune application trouvée pour le mot-clé '{selected_keyword}'. Essayez un autre mot-clé.")
-                else:
-                    st.success(f"✅ {len(concurrence_df)} applications concurrentes trouvées!")
-                    
-                    # Afficher les résultats
-                    st.dataframe(concurrence_df)
-                    
-                    # Visualisation des scores
-                    fig = px.bar(
-                        concurrence_df,
-                        x="title",
-                        y="score",
-                        color="score",
-                        color_continuous_scale="RdYlGn",
-                        title=f"Évaluations des applications pour '{selected_keyword}'",
-                        labels={"title": "Application", "score": "Évaluation"}
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Évaluation du potentiel
-                    potentiel = evaluer_potentiel_marche(concurrence_df)
-                    st.session_state.potentiel = potentiel
-                    
-                    # Afficher le résumé
-                    st.markdown('<h3>Résumé du marché</h3>', unsafe_allow_html=True)
-                    
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Nombre de concurrents", potentiel["nb_concurrents"])
-                    with col2:
-                        st.metric("Note moyenne", potentiel["note_moyenne"])
-                    with col3:
-                        st.metric("Difficulté", potentiel["difficulte"])
-                    with col4:
-                        st.metric("Potentiel", potentiel["potentiel"])
+            
+            # Fiches des premiers concurrents chargées en tâche de fond pour l'onglet 3
+            if not concurrence_df.empty:
+                get_prefetcher().prefetch(
+                    concurrence_df["app_id"].head(get_engine().config.prefetch_top),
+                    session_id=st.session_state.session_id,
+                    max_avis=max_avis
+                )
+            
+            publier(
+                concurrence_df=concurrence_df,
+                selected_keyword=selected_keyword,
+                potentiel=engine.evaluer_potentiel_marche(concurrence_df),
+                avis_store=engine.ReviewStore(),
+                details_apps={}
+            )
+        
+        afficher_concurrence()
+
+        # Comparaison de plusieurs mots-clés: le classement s'affiche au fur et à mesure
+        with st.expander("Comparer plusieurs mots-clés"):
+            a_comparer = st.multiselect(
+                "Mots-clés à comparer (une recherche par mot-clé)",
+                suggestions_list,
+                suggestions_list[:3]
+            )
+            if st.button("Comparer le potentiel", disabled=quota_epuise or not a_comparer):
+                concurrences = comparer_mots_cles(a_comparer, max_concurrents, max_workers)
+                st.success(f"✅ {len(concurrences)} mots-clés analysés sur {len(a_comparer)}")
     else:
         st.info("Commencez par rechercher des suggestions dans l'onglet 'Recherche'.")
 
 # Onglet 3: Potentiel du marché
-with tab3:
+@st.fragment
+def onglet_potentiel():
+    quota_epuise = quota_session_epuise()
     st.markdown('<h2 class="sub-header">Analyse détaillée du potentiel</h2>', unsafe_allow_html=True)
     
     if "concurrence_df" in st.session_state and not st.session_state.concurrence_df.empty:
+        # Tous les concurrents d'un coup: fiches et avis en parallèle, comparés côte à côte
+        app_ids = st.session_state.concurrence_df["app_id"].tolist()
+        if st.button(f"Analyser les {len(app_ids)} concurrents", disabled=quota_epuise):
+            analysees = analyser_tous_concurrents(app_ids, max_avis, max_workers)
+            st.success(f"✅ {analysees} applications analysées sur {len(app_ids)}")
+        # Affichée à chaque réexécution tant que la session garde les avis, pas seulement après le clic
+        afficher_comparaison_concurrents()
+
         # Sélection de l'application à analyser
         app_options = st.session_state.concurrence_df[["title", "app_id"]].values.tolist()
         selected_app = st.selectbox(
@@ -677,12 +784,33 @@ with tab3:
         
         selected_app_id = selected_app.split(" (")[1].rstrip(")")
         
-        if st.button("Analyser l'application", disabled=st.session_state.quota["used"] >= st.session_state.quota["total"]):
+        if st.button("Analyser l'application", disabled=quota_epuise):
+            import pandas as pd
+            import plotly.express as px
+            from engine.store import histogramme_notes
+            
             with st.spinner(f"Analyse détaillée de '{selected_app.split(' (')[0]}'..."):
                 # Analyser les détails de l'application
-                details, app_reviews, avis_stats, avis_negatifs = analyser_details_app(selected_app_id)
+                details, app_reviews, _, _ = analyser_details_app(selected_app_id)
+                
+                # Avis récents au-delà de ceux de la fiche, page par page
+                if details and max_avis:
+                    avis_complets = collecter_avis_app(selected_app_id, max_avis)
+                    if avis_complets:
+                        app_reviews = avis_complets
+                
+                # Avis des concurrents déjà analysés pour ce mot-clé
+                avis_store = st.session_state.setdefault("avis_store", engine.ReviewStore())
+                avis_store.ajouter(selected_app_id, app_reviews)
+                # Statistiques et avis négatifs sur le même échantillon (avis paginés s'il y en a)
+                avis_app = avis_store.filtrer([selected_app_id])
+                avis_stats = histogramme_notes(avis_app.frame["score"].to_numpy())
+                avis_negatifs = avis_app.negatifs().frame[["score", "content"]].to_dict("records")
+                themes_df = engine.extraire_themes(avis_store.frame)
                 
                 if details:
+                    st.session_state.setdefault("details_apps", {})[selected_app_id] = details
+
                     # Afficher les informations de base
                     st.markdown(f"### {details['title']}")
                     
@@ -753,31 +881,68 @@ with tab3:
                         """)
                     
                     # Opportunités basées sur les avis négatifs
-                    if avis_negatifs:
-                        st.markdown("""
+                    if not themes_df.empty:
+                        st.markdown(f"""
                         **Opportunités identifiées:**
                         
-                        En analysant les avis négatifs de cette application et de ses concurrents,
-                        il semble y avoir des opportunités d'amélioration sur les points suivants:
+                        En analysant les avis négatifs de {len(avis_store.app_ids())} application(s) analysée(s) pour ce mot-clé
+                        ({len(avis_store)} avis),
+                        les plaintes récurrentes portent sur les points suivants:
                         """)
                         
-                        problemes = ["Interface utilisateur confuse", "Fonctionnalités manquantes", "Trop de publicités"]
-                        for probleme in problemes:
-                            st.markdown(f"- {probleme}")
+                        for theme in themes_df.itertuples():
+                            st.markdown(
+                                f"- **{theme.theme}** ({theme.termes}): {theme.part:.0%} des avis négatifs, "
+                                f"{theme.nb_apps} application(s)  \n  _\"{theme.exemple[:150]}\"_"
+                            )
+                    elif avis_negatifs:
+                        st.markdown("Pas assez d'avis négatifs pour dégager des plaintes récurrentes.")
                     
-                    # Téléchargement du rapport
-                    st.download_button(
-                        "Télécharger le rapport complet",
-                        f"Rapport d'analyse pour {details['title']}\n\n" + 
-                        f"Mot-clé: {st.session_state.selected_keyword}\n" +
-                        f"Potentiel du marché: {potentiel['potentiel']}\n" +
-                        f"Nombre de concurrents: {potentiel['nb_concurrents']}\n" +
-                        "...",
-                        file_name=f"rapport_{selected_app_id}.txt"
+                    # Téléchargement du rapport complet et des données brutes
+                    keyword = st.session_state.selected_keyword
+                    rapport = engine.rapport_mot_cle(
+                        keyword,
+                        st.session_state.get("potentiel", {}),
+                        st.session_state.concurrence_df,
+                        st.session_state.details_apps,
+                        avis_store,
+                        themes_df,
                     )
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.download_button(
+                            "Télécharger le rapport complet",
+                            rapport,
+                            file_name=f"rapport_{keyword}.md",
+                            mime="text/markdown"
+                        )
+                    with col2:
+                        st.download_button(
+                            "Télécharger les données (Parquet + CSV)",
+                            engine.archive_zip(
+                                {
+                                    "suggestions": st.session_state.get("suggestions_df", pd.DataFrame()),
+                                    "concurrence": st.session_state.concurrence_df.assign(keyword=keyword),
+                                    "avis": avis_store.frame,
+                                    "themes": themes_df,
+                                },
+                                fichiers={"rapport.md": rapport},
+                            ),
+                            file_name=f"analyse_{keyword}.zip",
+                            mime="application/zip"
+                        )
     else:
         st.info("Commencez par analyser la concurrence dans l'onglet 'Analyse de la concurrence'.")
 
+
+tab1, tab2, tab3 = st.tabs(["Recherche", "Analyse de la concurrence", "Potentiel du marché"])
+with tab1:
+    onglet_recherche()
+with tab2:
+    onglet_concurrence()
+with tab3:
+    onglet_potentiel()
+
 # Footer
 st.markdown("---")
 st.markdown("""
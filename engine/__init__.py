@@ -0,0 +1,64 @@
+"""
+Moteur d'analyse App Idea Finder, utilisable sans Streamlit (workers, traitements par lots)
+
+Les noms publics sont chargés à la première utilisation (PEP 562): `import engine`
+n'importe ni pandas ni pyarrow, ce qui garde le démarrage de l'interface rapide.
+"""
+import importlib
+from typing import Any
+
+# Nom public -> sous-module qui le définit
+_EXPORTS = {
+    "analyser_concurrence": "analysis",
+    "analyser_details_app": "analysis",
+    "classer_potentiel_marches": "analysis",
+    "comparer_concurrents": "analysis",
+    "concurrence_dataframe": "analysis",
+    "evaluer_potentiel_marche": "analysis",
+    "iter_concurrence": "analysis",
+    "iter_details_concurrents": "analysis",
+    "iter_suggestions_par_prefixe": "analysis",
+    "obtenir_suggestions_keywords": "analysis",
+    "Progression": "analysis",
+    "run_batch": "batch",
+    "Checkpoint": "checkpoint",
+    "EngineConfig": "config",
+    "ExportWriter": "export",
+    "archive_zip": "export",
+    "exporter_checkpoint": "export",
+    "lire_table": "export",
+    "Evenement": "pipeline",
+    "KeywordPipeline": "pipeline",
+    "Prefetcher": "prefetch",
+    "rapport_mot_cle": "report",
+    "extraire_themes": "reviews",
+    "SerpApiClient": "serpapi",
+    "AppStore": "store",
+    "ReviewStore": "store",
+    "PolitiqueFraicheur": "snapshots",
+    "SnapshotStore": "snapshots",
+    "rafraichir": "snapshots",
+    "SuggestionIndex": "suggestion_index",
+    "MarcheSynthetique": "synthetic",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _EXPORTS:
+        valeur = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    else:
+        # Sous-modules (engine.analysis, engine.crawler…) chargés à la demande
+        try:
+            valeur = importlib.import_module(f".{name}", __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = valeur
+    return valeur
+
+
+def __dir__():
+    return sorted([*globals(), *_EXPORTS])
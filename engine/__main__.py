@@ -0,0 +1,121 @@
+"""
+Traitement par lots en ligne de commande
+
+    SERPAPI_KEY=... python -m engine mots_cles.txt --output resultats/
+
+Relancer la même commande après une interruption reprend au point de reprise.
+`--record cassette.sqlite3` enregistre les réponses de SerpApi; `--replay cassette.sqlite3`
+refait ensuite l'analyse hors ligne, sans clé ni quota.
+
+`--refresh instantanes.sqlite3` suit un portefeuille de mots-clés dans le temps: seuls les
+mots-clés et les fiches périmés ou modifiés depuis le passage précédent sont récupérés,
+l'historique des versions est conservé dans ce fichier.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from scrapers.metrics import REGISTRY, start_http_server
+
+from .batch import lire_mots_cles, run_batch
+from .config import EngineConfig
+from .export import FORMATS, ExportWriter
+from .serpapi import SerpApiClient
+from .snapshots import JOUR, PolitiqueFraicheur, SnapshotStore, exporter_instantanes, rafraichir
+
+
+def rafraichir_portefeuille(args, client: SerpApiClient, keywords) -> int:
+    """Mode --refresh: met à jour les instantanés du portefeuille puis exporte concurrence, fiches et potentiel"""
+    store = SnapshotStore(args.refresh)
+    politique = PolitiqueFraicheur(concurrence=args.max_age_concurrence * JOUR, details=args.max_age_details * JOUR)
+    bilan = rafraichir(
+        client, store, keywords, politique,
+        limit=args.limit, details_per_keyword=args.details, max_workers=args.workers,
+        lang=args.lang, country=args.country,
+    )
+    with ExportWriter(args.output, FORMATS if args.format == "tous" else (args.format,)) as writer:
+        exporter_instantanes(store, keywords, writer, args.details)
+    print(json.dumps({**bilan, "erreurs": len(bilan["erreurs"]), "historique": store.stats()}, ensure_ascii=False, indent=2))
+    return 1 if bilan["erreurs"] else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m engine",
+        description="Analyse par lots: suggestions → concurrence → détails, résultats en Parquet/CSV"
+    )
+    parser.add_argument("keywords", help="Fichier de mots-clés (un par ligne)")
+    parser.add_argument("-o", "--output", default="resultats", help="Répertoire de sortie (défaut: resultats)")
+    parser.add_argument("--lang", default="fr")
+    parser.add_argument("--country", default="fr")
+    parser.add_argument("--max-suggestions", type=int, default=5, help="Suggestions retenues par mot-clé")
+    parser.add_argument("--limit", type=int, default=5, help="Applications concurrentes par mot-clé")
+    parser.add_argument("--details", type=int, default=3, help="Applications détaillées par mot-clé")
+    parser.add_argument("--workers", type=int, default=8, help="Requêtes simultanées (débit gouverné par SERPAPI_RATE)")
+    parser.add_argument("--checkpoint", help="Point de reprise SQLite (défaut: <output>/checkpoint.sqlite3)")
+    parser.add_argument("--queue-size", type=int, default=64, help="Taille des files entre étapes (contre-pression)")
+    parser.add_argument("--format", choices=["parquet", "csv", "tous"], default="tous", help="Format d'export (défaut: tous)")
+    parser.add_argument("--reports", type=int, default=20, help="Rapports Markdown des N meilleurs mots-clés (0: aucun)")
+    parser.add_argument("--no-seeds", action="store_true", help="N'analyser que les suggestions, pas les mots-clés du fichier")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="Enregistre les réponses de SerpApi dans cette cassette")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="Rejoue une cassette enregistrée, sans réseau")
+    parser.add_argument("--refresh", metavar="INSTANTANES",
+                        help="Rafraîchit les instantanés de ce fichier pour les mots-clés du fichier (sans suggestions)")
+    parser.add_argument("--max-age-concurrence", type=float, default=6, help="--refresh: âge maximal des concurrents, en jours")
+    parser.add_argument("--max-age-details", type=float, default=27, help="--refresh: âge maximal des fiches, en jours")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+
+    config = EngineConfig.from_env()
+    if args.record or args.replay:
+        config.cassette_path = args.record or args.replay
+        config.cassette_mode = "record" if args.record else "replay"
+    if args.replay and not os.path.exists(args.replay):
+        print(f"Cassette introuvable: {args.replay}", file=sys.stderr)
+        return 2
+    if not config.api_key and config.cassette_mode != "replay":
+        print("Variable d'environnement SERPAPI_KEY manquante", file=sys.stderr)
+        return 2
+
+    if config.metrics_port:
+        start_http_server(config.metrics_port)
+
+    keywords = lire_mots_cles(args.keywords)
+    if args.refresh:
+        code = rafraichir_portefeuille(args, SerpApiClient(config), keywords)
+        if config.metrics_path:
+            REGISTRY.write_textfile(config.metrics_path)
+        return code
+    resultats = run_batch(
+        SerpApiClient(config),
+        keywords,
+        args.output,
+        lang=args.lang,
+        country=args.country,
+        max_suggestions=args.max_suggestions,
+        limit=args.limit,
+        details_per_keyword=args.details,
+        max_workers=args.workers,
+        include_seeds=not args.no_seeds,
+        checkpoint_path=args.checkpoint,
+        queue_size=args.queue_size,
+        formats=FORMATS if args.format == "tous" else (args.format,),
+        reports=args.reports,
+    )
+    for nom, lignes in resultats.items():
+        print(f"{nom}: {lignes}")
+    if config.metrics_path:
+        REGISTRY.write_textfile(config.metrics_path)
+    return 1 if resultats["erreurs"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
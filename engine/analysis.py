@@ -0,0 +1,472 @@
+"""
+Fonctions d'analyse de marché: suggestions, concurrence et potentiel
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scrapers.cache import normalize_params
+from scrapers.quota import QuotaExceeded
+
+from .metrics import APPELS, mesure_scoring
+from .serpapi import BATCH_SESSION, SerpApiClient, parse_suggestions, suggestions_params
+from .store import ReviewStore
+from .suggestion_index import SuggestionIndex
+
+# Colonnes d'un DataFrame de concurrence vide
+CONCURRENCE_COLUMNS = ["app_id", "title", "score", "installs", "price"]
+
+
+def _suggestions_limitees(client: SerpApiClient, params: Dict[str, Any],
+                          session_id: str = BATCH_SESSION) -> Tuple[List[str], str]:
+    """Tâche exécutée dans un thread du pool: appel limité en débit, avec réessais
+
+    Le quota a été réservé par l'appelant. Les appels identiques en cours partagent un
+    seul appel réel (client.flights, comme dans SerpApiClient.get): la réservation
+    est rendue si la réponse vient d'un autre appel ou du cache, ou si l'appel échoue.
+    Retourne les suggestions et leur source ("api" ou "partage").
+    """
+    engine, key = normalize_params(params)
+    appel_reel = False
+
+    def amont() -> Dict[str, Any]:
+        nonlocal appel_reel
+        # Un appel identique a pu se terminer entre la lecture du cache et l'ouverture du vol
+        data = client.cache.get(params, count=False)
+        if data is None:
+            with APPELS.time(engine=engine, source="api"):
+                data = client.call(params)
+            appel_reel = True
+            client.cache.set(params, data)
+        elif client.recording:
+            client.cassette.record_data(params, data)
+        return data
+
+    try:
+        data = client.flights.do(key, amont, engine)
+    finally:
+        if not appel_reel:
+            client.refund_quota(session_id, "suggestions")
+    return parse_suggestions(data), "api" if appel_reel else "partage"
+
+
+class Progression(NamedTuple):
+    """Un élément terminé (résultat ou erreur) et l'état du travail: terminés, en cours, total
+
+    `source` indique d'où vient le résultat: "index", "cache", "api" (appel payé), "partage" (appel
+    identique déjà en cours, non payé), "quota" (refusé), "play" (Play Store, quota épuisé),
+    "replay" (cassette) ou "client" (cache ou API, via SerpApiClient).
+    """
+    item: str
+    result: Any
+    error: Optional[Exception]
+    faits: int
+    en_cours: int
+    total: int
+    source: str
+
+
+def iter_suggestions_par_prefixe(
+    client: SerpApiClient,
+    prefixes: Iterable[str],
+    max_workers: int = 4,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+    index: Optional[SuggestionIndex] = None,
+) -> Iterator[Progression]:
+    """Suggestions brutes de chaque préfixe, produites au fur et à mesure
+
+    Les préfixes déjà explorés dans `index` sont lus dans l'index; les préfixes absents du cache sont envoyés à un pool de `max_workers` threads,
+    cadencé par le limiteur de débit partagé (max_workers=1 pour un mode séquentiel).
+    Les réponses déjà en cache ne consomment ni quota ni jeton du limiteur et sont produites
+    immédiatement; les autres le sont dès que leur requête se termine. En relecture de
+    cassette, tout vient de la cassette (ni index, ni cache, ni quota, ni limiteur).
+    """
+    prefixes = list(prefixes)
+    total, faits = len(prefixes), 0
+
+    if client.replaying:
+        for prefix in prefixes:
+            faits += 1
+            try:
+                resultat, erreur = parse_suggestions(client.get(suggestions_params(prefix, lang, country), session_id)), None
+            except Exception as e:
+                resultat, erreur = None, e
+            yield Progression(prefix, resultat, erreur, faits, 0, total, "replay")
+        return
+
+    a_recuperer = []
+
+    for prefix in prefixes:
+        connues = index.suggestions(prefix) if index is not None else None
+        if connues is not None:
+            faits += 1
+            yield Progression(prefix, connues, None, faits, 0, total, "index")
+            continue
+        cached = client.cached(suggestions_params(prefix, lang, country))
+        if cached is None:
+            a_recuperer.append(prefix)
+            continue
+        suggestions = parse_suggestions(cached)
+        if index is not None:
+            index.ajouter(prefix, suggestions)
+        faits += 1
+        yield Progression(prefix, suggestions, None, faits, 0, total, "cache")
+
+    # Le quota est réservé avant l'envoi au pool, dans le thread appelant
+    autorises, secours = [], []
+    for position, prefix in enumerate(a_recuperer):
+        try:
+            client.acquire_quota(session_id, "suggestions")
+        except QuotaExceeded as e:
+            if client.fallback is not None:
+                # Les préfixes restants sont demandés au Play Store, après ceux déjà autorisés
+                secours = a_recuperer[position:]
+                break
+            # Les préfixes suivants sont abandonnés: ils ne comptent plus dans le travail restant
+            total -= len(a_recuperer) - len(autorises) - 1
+            faits += 1
+            yield Progression(prefix, None, e, faits, len(autorises), total, "quota")
+            break
+        autorises.append(prefix)
+
+    if autorises:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {
+                pool.submit(_suggestions_limitees, client, suggestions_params(prefix, lang, country), session_id): prefix
+                for prefix in autorises
+            }
+            en_cours = len(futures)
+            for future in as_completed(futures):
+                prefix = futures[future]
+                en_cours -= 1
+                faits += 1
+                try:
+                    suggestions, source = future.result()
+                except Exception as e:
+                    yield Progression(prefix, None, e, faits, en_cours, total, "api")
+                    continue
+                if index is not None:
+                    index.ajouter(prefix, suggestions)
+                yield Progression(prefix, suggestions, None, faits, en_cours, total, source)
+
+    # Hors index: les suggestions du Play Store ne remplacent pas celles de Google Autocomplete
+    for position, prefix in enumerate(secours):
+        faits += 1
+        try:
+            with APPELS.time(engine="google_autocomplete", source="play"):
+                suggestions = parse_suggestions(client.fallback.get(suggestions_params(prefix, lang, country)))
+        except Exception as e:
+            yield Progression(prefix, None, e, faits, len(secours) - position - 1, total, "play")
+            continue
+        yield Progression(prefix, suggestions, None, faits, len(secours) - position - 1, total, "play")
+
+
+def suggestions_par_prefixe(
+    client: SerpApiClient,
+    prefixes: Iterable[str],
+    max_workers: int = 4,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+    index: Optional[SuggestionIndex] = None,
+) -> Tuple[Dict[str, List[str]], List[Tuple[str, Exception]], int]:
+    """Suggestions brutes de chaque préfixe (voir iter_suggestions_par_prefixe)
+
+    Retourne {préfixe: suggestions}, la liste des (préfixe, erreur) et le nombre de requêtes payées.
+    """
+    resultats: Dict[str, List[str]] = {}
+    erreurs: List[Tuple[str, Exception]] = []
+    payes = 0
+    for progression in iter_suggestions_par_prefixe(client, prefixes, max_workers, lang, country, session_id, index):
+        # Un appel échoué a rendu sa réservation: seules les réponses obtenues sont payées
+        payes += progression.source == "api" and progression.error is None
+        if progression.error is not None:
+            erreurs.append((progression.item, progression.error))
+        else:
+            resultats[progression.item] = progression.result
+    return resultats, erreurs, payes
+
+
+def suggestions_dataframe(prefixes: Iterable[str], resultats: Dict[str, List[str]], max_suggestions: int = 5) -> pd.DataFrame:
+    """DataFrame `prefix`/`suggestion`/`nb_prefixes` dans l'ordre des préfixes, sans doublons
+
+    Une suggestion produite par plusieurs préfixes n'apparaît qu'une fois, sous le
+    premier d'entre eux; `nb_prefixes` indique combien de préfixes l'ont produite.
+    """
+    vues = SuggestionIndex()
+    uniques = []
+    for prefix in prefixes:
+        if prefix in resultats:
+            uniques += [(prefix, sugg) for sugg in vues.ajouter(prefix, (resultats[prefix] or [])[:max_suggestions])]
+
+    tous_resultats = [
+        {"prefix": prefix, "suggestion": sugg, "nb_prefixes": len(vues.sources(sugg))} for prefix, sugg in uniques
+    ]
+    return pd.DataFrame(tous_resultats) if tous_resultats else pd.DataFrame(columns=["prefix", "suggestion", "nb_prefixes"])
+
+
+def obtenir_suggestions_keywords(
+    client: SerpApiClient,
+    prefixes: Iterable[str],
+    max_suggestions: int = 5,
+    max_workers: int = 4,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+    index: Optional[SuggestionIndex] = None,
+) -> Tuple[pd.DataFrame, List[Tuple[str, Exception]]]:
+    """Obtient les suggestions de recherche pour une liste de préfixes
+
+    Retourne le DataFrame `prefix`/`suggestion`/`nb_prefixes` (voir suggestions_dataframe)
+    et la liste des (préfixe, erreur).
+    """
+    prefixes = [p for p in dict.fromkeys(prefixes) if p.strip()]
+    resultats, erreurs, _ = suggestions_par_prefixe(client, prefixes, max_workers, lang, country, session_id, index)
+    return suggestions_dataframe(prefixes, resultats, max_suggestions), erreurs
+
+
+@mesure_scoring("concurrence")
+def concurrence_dataframe(results: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Convertit les résultats d'une recherche d'applications en DataFrame de concurrence"""
+    if not results:
+        return pd.DataFrame(columns=CONCURRENCE_COLUMNS)
+
+    # Extraire les données de base
+    apps_data = []
+    for app_info in results:
+        apps_data.append({
+            "app_id": app_info["appId"],
+            "title": app_info["title"],
+            "developer": app_info["developer"],
+            "score": app_info["score"],
+            "installs": app_info.get("installs", "Non disponible"),
+            "price": app_info["price"],
+            "free": app_info["free"]
+        })
+
+    return pd.DataFrame(apps_data)
+
+
+def analyser_concurrence(
+    client: SerpApiClient,
+    keyword: str,
+    limit: int = 5,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+) -> pd.DataFrame:
+    """Analyse la concurrence pour un mot-clé donné"""
+    return concurrence_dataframe(client.search_apps(keyword, lang=lang, country=country, limit=limit, session_id=session_id))
+
+
+def _avec_source(client: SerpApiClient, fonction: Callable[..., Any], *args: Any) -> Tuple[Any, str]:
+    """Résultat de `fonction(client, *args)` et sa source ("play" s'il dépend du Play Store, sinon "client")"""
+    with client.suivi_secours() as secours:
+        resultat = fonction(client, *args)
+    return resultat, "play" if secours else "client"
+
+
+def iter_concurrence(
+    client: SerpApiClient,
+    keywords: Iterable[str],
+    limit: int = 5,
+    max_workers: int = 4,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+) -> Iterator[Progression]:
+    """Concurrence de plusieurs mots-clés en parallèle, produite dès que chaque mot-clé est terminé
+
+    Le résultat de chaque Progression est le DataFrame de concurrence du mot-clé; sa source
+    est "play" si la recherche a été servie par le Play Store.
+    """
+    keywords = list(dict.fromkeys(keywords))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(_avec_source, client, analyser_concurrence, keyword, limit, lang, country, session_id): keyword
+            for keyword in keywords
+        }
+        en_cours = len(futures)
+        for future in as_completed(futures):
+            en_cours -= 1
+            faits = len(keywords) - en_cours
+            try:
+                (resultat, source), erreur = future.result(), None
+            except Exception as e:
+                resultat, source, erreur = None, "client", e
+            # Le client lit son cache avant d'appeler l'API: cache ou API n'est pas distingué ici
+            yield Progression(futures[future], resultat, erreur, faits, en_cours, len(keywords), source)
+
+
+def analyser_details_app(client: SerpApiClient, app_id: str, lang: str = "fr", country: str = "fr",
+                         session_id: str = BATCH_SESSION):
+    """Récupère les détails d'une application: (détails, avis, statistiques, avis négatifs)"""
+    return client.app_details(app_id, lang=lang, country=country, session_id=session_id)
+
+
+def collecter_avis(client: SerpApiClient, app_id: str, max_reviews: int = 500, lang: str = "fr", country: str = "fr",
+                   session_id: str = BATCH_SESSION, batch_size: int = 100) -> List[Dict[str, Any]]:
+    """Avis les plus récents d'une application, page par page, jusqu'à `max_reviews`
+
+    Les pages déjà obtenues sont conservées si le quota s'épuise en cours de route.
+    """
+    avis: List[Dict[str, Any]] = []
+    try:
+        for lot in client.iter_reviews(app_id, lang, country, batch_size, max_reviews, session_id=session_id):
+            avis += lot.reviews
+    except QuotaExceeded:
+        if not avis:
+            raise
+    return avis
+
+
+def details_et_avis(client: SerpApiClient, app_id: str, max_reviews: int = 200, lang: str = "fr", country: str = "fr",
+                    session_id: str = BATCH_SESSION) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Fiche d'une application et ses avis récents (ceux de la fiche si max_reviews vaut 0 ou si la pagination échoue)"""
+    details, avis, _, _ = analyser_details_app(client, app_id, lang, country, session_id)
+    if details and max_reviews:
+        try:
+            avis = collecter_avis(client, app_id, max_reviews, lang, country, session_id) or avis
+        except QuotaExceeded:
+            pass  # La fiche est déjà payée: ses avis suffisent à la comparaison
+    return details, avis
+
+
+def iter_details_concurrents(
+    client: SerpApiClient,
+    app_ids: Iterable[str],
+    max_reviews: int = 200,
+    max_workers: int = 4,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+) -> Iterator[Progression]:
+    """Fiches et avis de plusieurs applications en parallèle, produits dès que chaque application est terminée
+
+    Toutes les requêtes passent par le limiteur de débit partagé: la durée totale est celle
+    de l'application la plus longue, pas la somme. Le résultat de chaque Progression est
+    le couple (détails, avis) de details_et_avis; sa source est "play" si la fiche ou une
+    page d'avis a été servie par le Play Store.
+    """
+    app_ids = list(dict.fromkeys(app_ids))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(_avec_source, client, details_et_avis, app_id, max_reviews, lang, country, session_id): app_id
+            for app_id in app_ids
+        }
+        en_cours = len(futures)
+        for future in as_completed(futures):
+            en_cours -= 1
+            try:
+                (resultat, source), erreur = future.result(), None
+            except Exception as e:
+                resultat, source, erreur = None, "client", e
+            yield Progression(futures[future], resultat, erreur, len(app_ids) - en_cours, en_cours, len(app_ids), source)
+
+
+@mesure_scoring("comparaison")
+def comparer_concurrents(avis: ReviewStore, titres: Optional[Dict[str, str]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Comparaison de concurrents: (distribution des notes côte à côte, avis négatifs fusionnés)
+
+    La distribution est au format long app_id/title/note/nb_avis/part (part des avis de
+    l'application, pour comparer des volumes différents); les avis négatifs de toutes les
+    applications sont triés du plus sévère au plus récent.
+    """
+    titres = titres or {}
+    histogramme = avis.histogramme()
+    parts = histogramme.div(histogramme.sum(axis=1).clip(lower=1), axis=0)
+    distribution = pd.DataFrame({
+        "app_id": np.repeat(histogramme.index.astype(str).to_numpy(), len(histogramme.columns)),
+        "note": np.tile(histogramme.columns.to_numpy(), len(histogramme)),
+        "nb_avis": histogramme.to_numpy().ravel(),
+        "part": parts.to_numpy().ravel().round(3),
+    })
+    distribution.insert(1, "title", distribution["app_id"].map(lambda app_id: titres.get(app_id) or app_id))
+
+    negatifs = avis.negatifs().frame
+    negatifs = negatifs.assign(title=negatifs["app_id"].astype(str).map(lambda app_id: titres.get(app_id) or app_id))
+    negatifs = negatifs.sort_values(["score", "at"], ascending=[True, False], na_position="last", kind="stable")
+    return distribution, negatifs[["app_id", "title", "score", "content", "at"]].reset_index(drop=True)
+
+
+def _moyennes_par_groupe(valeurs: np.ndarray, codes: np.ndarray, nb_groupes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Taille et moyenne (notes manquantes ignorées) de chaque groupe, comme Series.mean() sur le groupe seul
+
+    groupby().mean() somme dans un autre ordre (somme compensée): la moyenne diffère au dernier bit près,
+    ce qui suffit à changer l'arrondi affiché (4.15 contre 4.1499999999999995) ou un seuil (4.0, 4.5).
+    Les groupes de même taille sont empilés en une matrice sommée par ligne, soit la même somme que np.sum
+    sur chaque groupe.
+    """
+    garde = codes >= 0
+    valeurs, codes = valeurs[garde], codes[garde]
+    ordre = np.argsort(codes, kind="stable")
+    presentes = ~np.isnan(valeurs[ordre])
+    triees = np.where(presentes, valeurs[ordre], 0.0)
+    tailles = np.bincount(codes, minlength=nb_groupes)
+    comptes = np.bincount(codes[ordre], weights=presentes, minlength=nb_groupes)
+    debuts = np.concatenate([[0], np.cumsum(tailles)[:-1]]).astype(int)
+    sommes = np.zeros(nb_groupes)
+    for taille in np.unique(tailles[tailles > 0]):
+        groupes = np.flatnonzero(tailles == taille)
+        sommes[groupes] = triees[debuts[groupes, None] + np.arange(taille)].sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moyennes = np.where(comptes > 0, sommes / comptes, np.nan)
+    return tailles, moyennes
+
+
+@mesure_scoring("potentiel")
+def classer_potentiel_marches(apps_df: pd.DataFrame, keywords: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Évalue le potentiel de tous les mots-clés d'un DataFrame long (keyword, app_id, score, installs, price)
+
+    `keywords` ajoute les mots-clés sans aucun concurrent (potentiel indéterminé).
+    Retourne le classement keyword/score/nb_concurrents/note_moyenne/difficulte/potentiel
+    trié par score décroissant.
+    """
+    notes = pd.to_numeric(apps_df["score"], errors="coerce") if "score" in apps_df else pd.Series(0.0, index=apps_df.index)
+    codes, mots = pd.factorize(apps_df["keyword"] if "keyword" in apps_df else pd.Series(dtype=object), sort=False)
+    nb_concurrents, note_moyenne = _moyennes_par_groupe(notes.to_numpy(dtype=float), codes, len(mots))
+    stats = pd.DataFrame({"nb_concurrents": nb_concurrents, "note_moyenne": note_moyenne}, index=pd.Index(mots))
+    if keywords is not None:
+        stats = stats.reindex(list(dict.fromkeys([*stats.index, *keywords])))
+        stats["nb_concurrents"] = stats["nb_concurrents"].fillna(0)
+        stats.loc[stats["nb_concurrents"] == 0, "note_moyenne"] = 0.0
+
+    n = stats["nb_concurrents"].to_numpy()
+    note = stats["note_moyenne"].to_numpy(dtype=float)
+    # Mêmes seuils que l'évaluation d'un seul mot-clé (les notes manquantes ne satisfont aucune comparaison)
+    tranches = [n == 0, n < 3, n <= 10]
+    with np.errstate(invalid="ignore"):
+        note_4, note_45 = note >= 4.0, note >= 4.5
+        score = np.select(tranches, [0, np.where(note_4, 40, 20), np.where(note < 4.0, 80, 60)], np.where(note_45, 30, 50))
+        potentiel = np.select(
+            tranches,
+            ["Indéterminé", np.where(note_4, "Incertain", "Faible"), np.where(note < 4.0, "Élevé", "Moyen")],
+            np.where(note_45, "Faible", "Moyen"),
+        )
+    difficulte = np.select(tranches, ["Indéterminée", "Faible", "Moyenne"], "Élevée")
+
+    classement = pd.DataFrame({
+        "keyword": stats.index,
+        "score": score.astype(int),
+        "nb_concurrents": n.astype(int),
+        "note_moyenne": np.round(note, 1),
+        "difficulte": difficulte,
+        "potentiel": potentiel,
+    })
+    return classement.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def evaluer_potentiel_marche(apps_df: pd.DataFrame) -> Dict[str, Any]:
+    """Évalue le potentiel d'un marché en fonction des apps concurrentes"""
+    ligne = classer_potentiel_marches(apps_df.assign(keyword=""), keywords=[""]).iloc[0]
+    return {
+        "score": int(ligne["score"]),
+        "nb_concurrents": int(ligne["nb_concurrents"]),
+        "note_moyenne": float(ligne["note_moyenne"]),
+        "difficulte": ligne["difficulte"],
+        "potentiel": ligne["potentiel"]
+    }
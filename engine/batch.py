@@ -0,0 +1,128 @@
+"""
+Traitement par lots: suggestions → concurrence → détails pour une liste de mots-clés
+"""
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from scrapers.quota import QuotaExceeded
+
+from .analysis import CONCURRENCE_COLUMNS
+from .checkpoint import Checkpoint
+from .export import FORMATS, ExportWriter, exporter_checkpoint
+from .pipeline import STAGES, KeywordPipeline
+from .report import rapport_mot_cle
+from .reviews import extraire_themes
+from .serpapi import BATCH_SESSION, SerpApiClient
+from .store import ReviewStore
+
+logger = logging.getLogger(__name__)
+
+
+def lire_mots_cles(path: str) -> List[str]:
+    """Lit un fichier de mots-clés (un par ligne, lignes vides et commentaires # ignorés)"""
+    with open(path, encoding="utf-8") as f:
+        lignes = (ligne.strip() for ligne in f)
+        return list(dict.fromkeys(l for l in lignes if l and not l.startswith("#")))
+
+
+def ecrire_rapports(checkpoint: Checkpoint, potentiel_df: pd.DataFrame, dossier: str, nombre: int = 20) -> int:
+    """Écrit le rapport Markdown des `nombre` meilleurs mots-clés; retourne le nombre de rapports écrits"""
+    os.makedirs(dossier, exist_ok=True)
+    ecrits = 0
+    for potentiel in potentiel_df.head(nombre).to_dict("records"):
+        keyword = potentiel["keyword"]
+        apps = checkpoint.get("concurrence", keyword) or []
+        concurrence_df = pd.DataFrame(apps) if apps else pd.DataFrame(columns=CONCURRENCE_COLUMNS)
+
+        details, reviews_par_app = {}, {}
+        for app_id in concurrence_df["app_id"]:
+            resultat = checkpoint.get("details", app_id)
+            if resultat is None or resultat[0] is None:
+                continue
+            details[app_id] = resultat[0]
+            reviews_par_app[app_id] = resultat[1]
+        avis = ReviewStore.from_reviews(reviews_par_app)
+
+        rapport = rapport_mot_cle(keyword, potentiel, concurrence_df, details, avis, extraire_themes(avis.frame))
+        with open(os.path.join(dossier, f"{_nom_fichier(keyword)}.md"), "w", encoding="utf-8") as f:
+            f.write(rapport)
+        ecrits += 1
+    return ecrits
+
+
+def _nom_fichier(keyword: str) -> str:
+    return re.sub(r"[^\w-]+", "_", keyword.strip().lower()).strip("_")[:80] or "mot_cle"
+
+
+def run_batch(
+    client: SerpApiClient,
+    keywords: Iterable[str],
+    output_dir: str,
+    lang: str = "fr",
+    country: str = "fr",
+    max_suggestions: int = 5,
+    limit: int = 5,
+    details_per_keyword: int = 3,
+    max_workers: int = 8,
+    include_seeds: bool = True,
+    session_id: str = BATCH_SESSION,
+    checkpoint_path: Optional[str] = None,
+    queue_size: int = 64,
+    formats: Iterable[str] = FORMATS,
+    reports: int = 20,
+) -> Dict[str, int]:
+    """Exécute le pipeline complet et exporte les résultats dans `output_dir`
+
+    Chaque élément terminé est enregistré dans `checkpoint_path` (par défaut
+    `output_dir/checkpoint.sqlite3`): relancer la même commande après une
+    interruption ou un quota épuisé reprend sans refaire les appels déjà payés.
+
+    Les tables (suggestions, concurrence, potentiel, details, avis, erreurs) sont écrites
+    en flux depuis le point de reprise, en Parquet et/ou CSV (voir engine.export), sans
+    être chargées entièrement en mémoire; les `reports` meilleurs mots-clés ont en plus
+    un rapport Markdown dans `output_dir/rapports`.
+
+    Retourne le nombre de lignes écrites par table (et de rapports).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = Checkpoint(checkpoint_path or os.path.join(output_dir, "checkpoint.sqlite3"))
+    pipeline = KeywordPipeline(
+        client, checkpoint, lang, country, max_suggestions, limit, details_per_keyword,
+        workers=max_workers, queue_size=queue_size, include_seeds=include_seeds, session_id=session_id,
+    )
+
+    erreurs = []
+    compteurs = {stage: [0, 0, 0] for stage in STAGES}  # [faits, repris, secours]
+    for evenement in pipeline.run(keywords):
+        if evenement.error is not None:
+            erreurs.append(evenement)
+            logger.warning("Erreur à l'étape %s pour %r: %s", evenement.stage, evenement.item, evenement.error)
+            if isinstance(evenement.error, QuotaExceeded):
+                logger.warning("Quota épuisé: relancer la même commande pour reprendre")
+            continue
+        compteurs[evenement.stage][0] += 1
+        compteurs[evenement.stage][1] += evenement.resumed
+        compteurs[evenement.stage][2] += evenement.secours
+        total = sum(faits for faits, _, _ in compteurs.values())
+        if total % 100 == 0:
+            logger.info("%d éléments traités", total)
+    for stage, (faits, repris, secours) in compteurs.items():
+        logger.info("%s: %d éléments (%d repris du point de reprise)", stage, faits, repris)
+        if secours:
+            logger.warning("%s: %d éléments obtenus du Play Store, ni enregistrés ni exportés: "
+                           "relancer la même commande une fois le quota rechargé", stage, secours)
+
+    with ExportWriter(output_dir, formats) as writer:
+        potentiel_df = exporter_checkpoint(checkpoint, writer)
+        writer.write("erreurs", pd.DataFrame(
+            [{"etape": e.stage, "element": e.item, "erreur": str(e.error)} for e in erreurs],
+            columns=["etape", "element", "erreur"]
+        ))
+    lignes = {table: writer.rows.get(table, 0) for table in ("suggestions", "concurrence", "potentiel", "details", "avis", "erreurs")}
+    if reports:
+        lignes["rapports"] = ecrire_rapports(checkpoint, potentiel_df, os.path.join(output_dir, "rapports"), reports)
+    return lignes
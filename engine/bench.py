@@ -0,0 +1,309 @@
+"""
+Mesures de bout en bout du pipeline contre le serveur SerpApi local (engine.standin)
+
+    python -m engine.bench --keywords 20 --workers 4 --latency-ms 80 --error-rate 0.02 --json mesure.json
+    python -m engine.bench --keywords 20 --workers 8 --compare mesure.json
+
+Le pipeline complet (suggestions → concurrence → détails, puis pages d'avis)
+s'exécute avec des fichiers de cache, de quota et de reprise temporaires: chaque
+appel est un appel réel au serveur local, avec le limiteur de débit, les réessais
+et le quota du moteur. Pour chaque étape: latence p50/p95 des appels (attente du
+débit et réessais compris), requêtes par seconde et quota par mot-clé d'entrée.
+`--json` enregistre le résultat; `--compare` affiche l'écart avec une mesure précédente.
+
+`--record cassette.sqlite3` enregistre les échanges de la mesure; `--replay cassette.sqlite3`
+rejoue ensuite le même travail sans serveur ni réseau (le quota affiché est alors
+celui qu'auraient coûté les appels).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Any, Dict, List, Optional
+
+from .checkpoint import Checkpoint
+from .config import EngineConfig
+from .pipeline import KeywordPipeline
+from .serpapi import BATCH_SESSION, SerpApiClient, operation_for
+from .standin import MOTS, add_arguments, from_arguments
+
+# Opération facturée (scrapers.quota.OPERATION_COSTS) -> étape mesurée
+ETAPES = {"suggestions": "suggestions", "competition": "concurrence", "details": "details", "reviews": "avis"}
+
+
+def percentile(valeurs: List[float], q: float) -> float:
+    """Percentile `q` (0-100) au rang le plus proche; 0 pour une liste vide"""
+    if not valeurs:
+        return 0.0
+    tries = sorted(valeurs)
+    rang = max(0, min(len(tries) - 1, int(round(q / 100 * len(tries) + 0.5)) - 1))
+    return tries[rang]
+
+
+class Mesures:
+    """Durée de chaque appel et quota dépensé, par étape (partagé par les threads du pipeline)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._appels: Dict[str, List[tuple]] = {etape: [] for etape in ETAPES.values()}
+        self._quota: Dict[str, float] = {etape: 0.0 for etape in ETAPES.values()}
+
+    def appel(self, etape: str, debut: float, fin: float, erreur: bool) -> None:
+        with self._lock:
+            self._appels[etape].append((debut, fin, erreur))
+
+    def quota(self, etape: str, cout: float) -> None:
+        with self._lock:
+            self._quota[etape] += cout
+
+    def resume(self, mots_cles: int) -> Dict[str, Dict[str, float]]:
+        """Appels, erreurs, latences (ms), requêtes/s et quota (total et par mot-clé) de chaque étape"""
+        with self._lock:
+            appels = {etape: list(valeurs) for etape, valeurs in self._appels.items()}
+            quota = dict(self._quota)
+        resume = {}
+        for etape, valeurs in appels.items():
+            durees = [(fin - debut) * 1000 for debut, fin, _ in valeurs]
+            # Débit rapporté à la période d'activité de l'étape (les étapes se chevauchent)
+            periode = max((fin for _, fin, _ in valeurs), default=0) - min((debut for debut, _, _ in valeurs), default=0)
+            resume[etape] = {
+                "appels": len(valeurs),
+                "erreurs": sum(1 for *_, erreur in valeurs if erreur),
+                "p50_ms": percentile(durees, 50),
+                "p95_ms": percentile(durees, 95),
+                "max_ms": max(durees, default=0.0),
+                "req_s": len(valeurs) / periode if periode > 0 else 0.0,
+                "quota": quota[etape],
+                "quota_par_mot_cle": quota[etape] / mots_cles if mots_cles else 0.0,
+            }
+        return resume
+
+
+class _QuotaMesure:
+    """Délègue au QuotaGovernor du client et compte les unités réellement acquises par étape"""
+
+    def __init__(self, governor: Any, mesures: Mesures):
+        self.governor = governor
+        self.mesures = mesures
+
+    def acquire(self, session_id: str, operation: str, timeout: float = 0.0) -> None:
+        self.governor.acquire(session_id, operation, timeout)
+        self.mesures.quota(ETAPES.get(operation, operation), self.governor.cost_of(operation))
+
+    def __getattr__(self, nom: str) -> Any:
+        return getattr(self.governor, nom)
+
+
+class ClientMesure(SerpApiClient):
+    """SerpApiClient qui chronomètre chaque appel (cache, fusion, quota, débit et réessais compris)"""
+
+    def __init__(self, config: EngineConfig, mesures: Mesures):
+        super().__init__(config)
+        self.mesures = mesures
+        self.governor = _QuotaMesure(self.governor, mesures)
+
+    def get(self, params: Dict[str, Any], session_id: str = BATCH_SESSION, wait=None) -> Dict[str, Any]:
+        operation = operation_for(params)
+        debut = time.perf_counter()
+        erreur = True
+        try:
+            data = super().get(params, session_id, wait)
+            erreur = False
+            return data
+        finally:
+            etape = ETAPES.get(operation, "autre")
+            self.mesures.appel(etape, debut, time.perf_counter(), erreur)
+            if self.replaying:
+                # Aucun quota n'est acquis en relecture: on compte celui de l'enregistrement
+                self.mesures.quota(etape, self.governor.cost_of(operation))
+
+
+def mots_cles_synthetiques(nombre: int) -> List[str]:
+    """`nombre` mots-clés d'entrée reproductibles (paires de mots du serveur local)"""
+    paires = [" ".join(paire) for paire in combinations(MOTS, 2)]
+    return [paires[i % len(paires)] + (f" {i // len(paires)}" if i >= len(paires) else "") for i in range(nombre)]
+
+
+def executer(
+    url: str,
+    keywords: List[str],
+    workers: int = 4,
+    rate: float = 20.0,
+    max_suggestions: int = 5,
+    limit: int = 5,
+    details_per_keyword: int = 3,
+    avis: int = 100,
+    cassette_path: Optional[str] = None,
+    cassette_mode: str = "off",
+) -> Dict[str, Any]:
+    """Exécute le pipeline complet contre `url` (ou une cassette) et retourne les mesures par étape et globales"""
+    with tempfile.TemporaryDirectory(prefix="bench-") as dossier:
+        config = EngineConfig(
+            api_key="bench",
+            rate=rate,
+            burst=max(1.0, rate),
+            cache_path=os.path.join(dossier, "cache.sqlite3"),
+            quota_path=os.path.join(dossier, "quota.sqlite3"),
+            index_path=os.path.join(dossier, "suggestions.sqlite3"),
+            # Quota illimité: on mesure le pipeline, pas l'attente de recharge du seau
+            quota_capacity=1e9,
+            quota_per_hour=1e9,
+            quota_session_min=1e9,
+            retry_workers=workers,
+            serpapi_url=url,
+            cassette_path=cassette_path,
+            cassette_mode=cassette_mode,
+        )
+        mesures = Mesures()
+        client = ClientMesure(config, mesures)
+        pipeline = KeywordPipeline(
+            client, Checkpoint(os.path.join(dossier, "checkpoint.sqlite3")),
+            max_suggestions=max_suggestions, limit=limit,
+            details_per_keyword=details_per_keyword, workers=workers,
+        )
+
+        debut = time.perf_counter()
+        elements: Dict[str, int] = {}
+        echecs: Dict[str, int] = {}
+        app_ids = []
+        for evenement in pipeline.run(keywords):
+            compteur = echecs if evenement.error is not None else elements
+            compteur[evenement.stage] = compteur.get(evenement.stage, 0) + 1
+            if evenement.stage == "details" and evenement.error is None:
+                app_ids.append(evenement.item)
+
+        if avis > 0 and app_ids:
+            def lire_avis(app_id: str) -> int:
+                return sum(len(lot) for lot in client.iter_reviews(app_id, max_reviews=avis))
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                recus = list(pool.map(lambda app_id: _sans_erreur(lire_avis, app_id), app_ids))
+            elements["avis"] = sum(recus)
+        duree = time.perf_counter() - debut
+
+        etapes = mesures.resume(len(keywords))
+        quota = sum(etape["quota"] for etape in etapes.values())
+        client.scheduler.shutdown()
+        return {
+            "parametres": {
+                "mots_cles": len(keywords), "workers": workers, "rate": rate,
+                "max_suggestions": max_suggestions, "limit": limit,
+                "details_per_keyword": details_per_keyword, "avis": avis, "cassette": cassette_mode,
+            },
+            "etapes": etapes,
+            "elements": elements,
+            "echecs": echecs,
+            "duree_s": duree,
+            "quota": quota,
+            "quota_par_mot_cle": quota / len(keywords) if keywords else 0.0,
+            "appels_fusionnes": client.flights.stats()["saved"],
+        }
+
+
+def _sans_erreur(fn, *args: Any) -> int:
+    try:
+        return fn(*args)
+    except Exception:
+        return 0  # L'échec est déjà compté par ClientMesure
+
+
+def rapport_texte(resultat: Dict[str, Any], reference: Optional[Dict[str, Any]] = None) -> str:
+    """Tableau lisible des mesures, avec l'écart relatif à `reference` si fournie"""
+    def ecart(etape: str, cle: str) -> str:
+        if reference is None:
+            return ""
+        avant = reference.get("etapes", {}).get(etape, {}).get(cle)
+        apres = resultat["etapes"][etape][cle]
+        if not avant:
+            return ""
+        return f" ({(apres - avant) / avant:+.0%})"
+
+    p = resultat["parametres"]
+    lignes = [
+        f"{p['mots_cles']} mots-clés, {p['workers']} workers, {p['rate']:g} req/s max côté client"
+        + (" (relecture de cassette)" if p.get("cassette") == "replay" else ""),
+        f"{'étape':<12} {'appels':>7} {'erreurs':>8} {'p50 ms':>16} {'p95 ms':>16} {'req/s':>14} {'quota/mot-clé':>14}",
+    ]
+    for etape, m in resultat["etapes"].items():
+        if not m["appels"]:
+            continue
+        lignes.append(
+            f"{etape:<12} {m['appels']:>7} {m['erreurs']:>8} "
+            f"{m['p50_ms']:>7.1f}{ecart(etape, 'p50_ms'):>9} {m['p95_ms']:>7.1f}{ecart(etape, 'p95_ms'):>9} "
+            f"{m['req_s']:>6.1f}{ecart(etape, 'req_s'):>8} {m['quota_par_mot_cle']:>14.2f}"
+        )
+    lignes.append(
+        f"Durée totale: {resultat['duree_s']:.1f} s, quota: {resultat['quota']:g} unités "
+        f"({resultat['quota_par_mot_cle']:.2f} par mot-clé), appels fusionnés: {resultat['appels_fusionnes']}"
+    )
+    if resultat["echecs"]:
+        lignes.append("Éléments en échec: " + ", ".join(f"{k}: {v}" for k, v in resultat["echecs"].items()))
+    serveur = resultat.get("serveur")
+    if serveur:
+        statuts: Dict[str, int] = {}
+        for stats in serveur.values():
+            for cle, valeur in stats.items():
+                if cle.isdigit():
+                    statuts[cle] = statuts.get(cle, 0) + valeur
+        octets = sum(stats["octets"] for stats in serveur.values())
+        lignes.append(
+            "Serveur: " + ", ".join(f"{n} × {statut}" for statut, n in sorted(statuts.items()))
+            + f", {octets / 1024:.0f} Kio envoyés"
+        )
+    return "\n".join(lignes)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m engine.bench", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keywords", type=int, default=20, help="Nombre de mots-clés d'entrée synthétiques (défaut: 20)")
+    parser.add_argument("--workers", type=int, default=4, help="Threads par étape (défaut: 4)")
+    parser.add_argument("--rate", type=float, default=20.0, help="Débit maximal du client en requêtes/s (défaut: 20)")
+    parser.add_argument("--max-suggestions", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=5, help="Concurrents analysés par mot-clé")
+    parser.add_argument("--details", type=int, default=3, help="Fiches détaillées par mot-clé")
+    parser.add_argument("--avis", type=int, default=100, help="Avis lus par application détaillée (0: étape ignorée)")
+    parser.add_argument("--url", help="Point d'accès existant (par défaut: serveur local démarré pour la mesure)")
+    parser.add_argument("--json", help="Enregistre les mesures dans ce fichier")
+    parser.add_argument("--compare", help="Mesure précédente (--json) à comparer")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="Enregistre les échanges de la mesure dans cette cassette")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="Rejoue une cassette enregistrée (sans serveur ni réseau)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.replay and not os.path.exists(args.replay):
+        parser.error(f"Cassette introuvable: {args.replay}")
+    cassette_path = args.record or args.replay
+    cassette_mode = "record" if args.record else "replay" if args.replay else "off"
+
+    standin = None if args.url or args.replay else from_arguments(args).start()
+    try:
+        resultat = executer(
+            args.url or (standin.url if standin is not None else ""), mots_cles_synthetiques(args.keywords),
+            args.workers, args.rate, args.max_suggestions, args.limit, args.details, args.avis,
+            cassette_path, cassette_mode,
+        )
+        if standin is not None:
+            resultat["serveur"] = standin.stats()
+    finally:
+        if standin is not None:
+            standin.stop()
+
+    reference = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            reference = json.load(f)
+    print(rapport_texte(resultat, reference))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultat, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Journal d'avancement persistant d'un traitement: chaque élément terminé n'est jamais refait
+"""
+import json
+import time
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from scrapers.sqlite_utils import ThreadLocalConnection
+
+
+class Checkpoint:
+    """Résultat de chaque (étape, élément) terminé, enregistré dès qu'il est connu (SQLite)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = ThreadLocalConnection(path)
+        conn = self._db.get()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS items (
+                stage TEXT NOT NULL,
+                item TEXT NOT NULL,
+                result TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (stage, item)
+            )"""
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def check_params(self, params: Mapping[str, Any]) -> None:
+        """Enregistre les paramètres du traitement, ou vérifie qu'ils n'ont pas changé à la reprise"""
+        value = json.dumps(dict(params), sort_keys=True)
+        conn = self._db.get()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+        if row is None:
+            conn.execute("INSERT INTO meta(key, value) VALUES ('params', ?)", (value,))
+        elif row[0] != value:
+            raise ValueError(
+                f"Le point de reprise {self.path} a été créé avec d'autres paramètres: {row[0]}"
+            )
+
+    def load(self, stage: str) -> Dict[str, Any]:
+        """Résultats déjà enregistrés pour une étape"""
+        rows = self._db.get().execute("SELECT item, result FROM items WHERE stage = ?", (stage,))
+        return {item: json.loads(result) for item, result in rows}
+
+    def get(self, stage: str, item: str) -> Optional[Any]:
+        """Résultat enregistré d'un élément, ou None"""
+        row = self._db.get().execute(
+            "SELECT result FROM items WHERE stage = ? AND item = ?", (stage, item)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record(self, stage: str, item: str, result: Any) -> None:
+        self._db.get().execute(
+            "INSERT OR REPLACE INTO items(stage, item, result, updated_at) VALUES (?, ?, ?, ?)",
+            (stage, item, json.dumps(result, ensure_ascii=False, default=str), time.time()),
+        )
+
+    def results(self, stage: str) -> Iterator[Tuple[str, Any]]:
+        """(élément, résultat) d'une étape, dans l'ordre où ils ont été terminés"""
+        rows = self._db.get().execute(
+            "SELECT item, result FROM items WHERE stage = ? ORDER BY rowid", (stage,)
+        )
+        for item, result in rows:
+            yield item, json.loads(result)
+
+    def count(self, stage: str) -> int:
+        return self._db.get().execute("SELECT COUNT(*) FROM items WHERE stage = ?", (stage,)).fetchone()[0]
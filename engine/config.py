@@ -0,0 +1,108 @@
+"""
+Configuration du moteur d'analyse (secrets Streamlit, variables d'environnement ou dictionnaire)
+"""
+import os
+from typing import Any, Dict, Mapping, Optional
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+# TTL du cache persistant par moteur SerpApi (secondes)
+CACHE_TTLS = {
+    "google_autocomplete": 24 * 3600,  # Les suggestions évoluent lentement
+    "google_play": 6 * 3600,
+    "google_play_product": 6 * 3600
+}
+
+
+class EngineConfig:
+    """Paramètres du moteur; `from_mapping` lit les mêmes noms que les secrets Streamlit"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        rate: float = 2.0,
+        burst: float = 5.0,
+        timeout: float = 30.0,
+        cache_path: str = ".cache/serpapi.sqlite3",
+        cache_max_mb: float = 256,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        quota_path: str = ".cache/quota.sqlite3",
+        quota_capacity: float = 200,
+        quota_per_hour: float = 1000,
+        quota_session_min: float = 20,
+        quota_wait: float = 10,
+        retry_workers: int = 8,
+        index_path: str = ".cache/suggestions.sqlite3",
+        prefetch_top: int = 3,
+        prefetch_budget: float = 15,
+        prefetch_reserve: float = 10,
+        serpapi_url: str = SERPAPI_URL,
+        cassette_path: Optional[str] = None,
+        cassette_mode: str = "off",
+        metrics_path: Optional[str] = None,
+        metrics_port: int = 0,
+        play_fallback: bool = False,
+        play_rate: float = 1.0,
+    ):
+        self.api_key = api_key
+        self.rate = rate                            # Requêtes/seconde vers SerpApi
+        self.burst = burst                          # Rafale maximale du limiteur
+        self.timeout = timeout                      # Timeout de lecture (secondes)
+        self.cache_path = cache_path
+        self.cache_max_mb = cache_max_mb
+        self.cache_ttls = dict(CACHE_TTLS if cache_ttls is None else cache_ttls)
+        self.quota_path = quota_path
+        self.quota_capacity = quota_capacity        # Rafale maximale du seau global
+        self.quota_per_hour = quota_per_hour        # Recharge horaire du seau global
+        self.quota_session_min = quota_session_min  # Part minimale garantie par session
+        self.quota_wait = quota_wait                # Attente max de recharge du seau global
+        self.retry_workers = retry_workers
+        self.index_path = index_path                # Index persistant des suggestions déjà vues
+        self.prefetch_top = prefetch_top            # Concurrents préchargés après une analyse de concurrence
+        self.prefetch_budget = prefetch_budget      # Unités de quota max par préchargement
+        self.prefetch_reserve = prefetch_reserve    # Quota toujours laissé aux actions de la session
+        self.serpapi_url = serpapi_url              # Point d'accès (serveur local de substitution: engine.standin)
+        self.cassette_path = cassette_path          # Fichier d'enregistrement/relecture des réponses
+        self.cassette_mode = cassette_mode          # "off", "record" (appels réels enregistrés) ou "replay" (hors ligne)
+        self.metrics_path = metrics_path            # Fichier des métriques au format Prometheus (textfile)
+        self.metrics_port = metrics_port            # Port du point d'accès /metrics (0: désactivé)
+        self.play_fallback = play_fallback          # Play Store en secours quand le quota SerpApi est épuisé (sur demande)
+        self.play_rate = play_rate                  # Requêtes/seconde vers le Play Store (secours)
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, Any], **overrides: Any) -> "EngineConfig":
+        """Construit la configuration depuis st.secrets, os.environ ou un dict"""
+        def number(name: str, default: float) -> float:
+            value = mapping.get(name)
+            return default if value in (None, "") else float(value)
+
+        values = {
+            "api_key": mapping.get("SERPAPI_KEY"),
+            "rate": number("SERPAPI_RATE", 2.0),
+            "burst": number("SERPAPI_BURST", 5.0),
+            "timeout": number("SERPAPI_TIMEOUT", 30.0),
+            "cache_path": mapping.get("SERPAPI_CACHE_PATH") or ".cache/serpapi.sqlite3",
+            "cache_max_mb": number("SERPAPI_CACHE_MAX_MB", 256),
+            "quota_path": mapping.get("QUOTA_PATH") or ".cache/quota.sqlite3",
+            "quota_capacity": number("QUOTA_CAPACITY", 200),
+            "quota_per_hour": number("QUOTA_PER_HOUR", 1000),
+            "quota_session_min": number("QUOTA_SESSION_MIN", 20),
+            "quota_wait": number("QUOTA_WAIT", 10),
+            "index_path": mapping.get("SUGGESTIONS_INDEX_PATH") or ".cache/suggestions.sqlite3",
+            "prefetch_top": int(number("PREFETCH_TOP", 3)),
+            "prefetch_budget": number("PREFETCH_BUDGET", 15),
+            "prefetch_reserve": number("PREFETCH_RESERVE", 10),
+            "serpapi_url": mapping.get("SERPAPI_URL") or SERPAPI_URL,
+            "cassette_path": mapping.get("SERPAPI_CASSETTE") or None,
+            "cassette_mode": mapping.get("SERPAPI_CASSETTE_MODE") or ("replay" if mapping.get("SERPAPI_CASSETTE") else "off"),
+            "metrics_path": mapping.get("METRICS_PATH") or None,
+            "metrics_port": int(number("METRICS_PORT", 0)),
+            "play_fallback": str(mapping.get("PLAY_FALLBACK", "")).lower() in ("1", "true", "yes", "on", "oui"),
+            "play_rate": number("PLAY_RATE", 1.0),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "EngineConfig":
+        return cls.from_mapping(os.environ, **overrides)
@@ -0,0 +1,123 @@
+"""
+Exploration récursive des suggestions: "a" → "aa", "ab"…, "fitness" → "fitness a", "fitness b"…
+
+Parcours en largeur avec profondeur et budget de requêtes bornés. Seuls les
+préfixes productifs (qui apportent des suggestions nouvelles) sont développés,
+en commençant par les plus productifs, et l'exploration s'arrête quand le
+rendement marginal (suggestions nouvelles par requête payée) devient trop faible.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from scrapers.quota import QuotaExceeded
+
+from .analysis import suggestions_par_prefixe
+from .serpapi import BATCH_SESSION, SerpApiClient
+from .suggestion_index import SuggestionIndex
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+def prefixes_enfants(prefix: str, profondeur: int, alphabet: str = ALPHABET) -> List[str]:
+    """Préfixes du niveau suivant: une lettre accolée, ou un mot suivi d'une espace et d'une lettre"""
+    separateur = " " if profondeur == 0 and len(prefix) > 1 else ""
+    return [f"{prefix}{separateur}{lettre}" for lettre in alphabet]
+
+
+def explorer_prefixes(
+    client: SerpApiClient,
+    seeds: Iterable[str],
+    max_depth: int = 2,
+    budget: int = 50,
+    min_yield: float = 0.5,
+    min_new: int = 1,
+    max_workers: int = 4,
+    alphabet: str = ALPHABET,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+    index: Optional[SuggestionIndex] = None,
+) -> Tuple[pd.DataFrame, List[Tuple[str, Exception]], Dict[str, Any]]:
+    """Explore les suggestions en largeur à partir de préfixes de départ
+
+    - max_depth: nombre de lettres ajoutées au maximum à un préfixe de départ
+    - budget: nombre maximal de requêtes payées (les réponses en cache sont gratuites)
+    - min_yield: arrêt quand un lot de requêtes rapporte moins de min_yield suggestions nouvelles par requête
+    - min_new: un préfixe qui rapporte moins de min_new suggestions nouvelles n'est pas développé
+    - index: préfixes déjà explorés lors d'exécutions précédentes, relus sans requête
+
+    Retourne le DataFrame `prefix`/`suggestion`/`profondeur` (chaque suggestion une
+    seule fois, sous le premier préfixe qui l'a produite), les erreurs et un bilan.
+    """
+    vues: Dict[str, Tuple[str, int]] = {}
+    erreurs: List[Tuple[str, Exception]] = []
+    bilan = {"requetes": 0, "prefixes": 0, "elagues": 0, "arret": "exploration terminée"}
+
+    # Frontière du niveau courant: (priorité, préfixe), la priorité est le rendement du parent
+    niveau = [(0, p) for p in dict.fromkeys(s.strip().lower() for s in seeds) if p]
+    lot_taille = max(2 * max_workers, 8)
+    profondeur = 0
+
+    while niveau:
+        niveau.sort(key=lambda element: -element[0])
+        suivant = []
+        debut = 0
+        while debut < len(niveau):
+            restant = budget - bilan["requetes"]
+            if restant <= 0:
+                bilan["arret"] = "budget épuisé"
+                return _resultats(vues), erreurs, bilan
+
+            # Lot réduit au budget restant: le suivant reprend juste après, aucun préfixe n'est sauté
+            lot = [prefix for _, prefix in niveau[debut:debut + min(lot_taille, restant)]]
+            debut += len(lot)
+            resultats, lot_erreurs, payees = suggestions_par_prefixe(
+                client, lot, max_workers, lang, country, session_id, index
+            )
+            erreurs += lot_erreurs
+            bilan["requetes"] += payees
+            bilan["prefixes"] += len(resultats)
+
+            nouvelles_lot = 0
+            for prefix in lot:
+                if prefix not in resultats:
+                    continue
+                nouvelles = [s for s in resultats[prefix] if s not in vues]
+                for sugg in nouvelles:
+                    vues[sugg] = (prefix, profondeur)
+                nouvelles_lot += len(nouvelles)
+
+                if profondeur >= max_depth:
+                    continue
+                if len(nouvelles) < min_new:
+                    bilan["elagues"] += 1
+                    continue
+                suivant += [(len(nouvelles), enfant) for enfant in prefixes_enfants(prefix, profondeur, alphabet)]
+
+            if any(isinstance(e, QuotaExceeded) for _, e in lot_erreurs):
+                bilan["arret"] = "quota épuisé"
+                return _resultats(vues), erreurs, bilan
+
+            # Rendement marginal mesuré sur les requêtes payées (les préfixes de départ sont toujours explorés)
+            if profondeur > 0 and payees and nouvelles_lot / payees < min_yield:
+                logger.info("Rendement marginal %.2f < %.2f: arrêt de l'exploration", nouvelles_lot / payees, min_yield)
+                bilan["arret"] = "rendement marginal insuffisant"
+                return _resultats(vues), erreurs, bilan
+
+        logger.info("Profondeur %d: %d suggestions uniques, %d requêtes payées", profondeur, len(vues), bilan["requetes"])
+        niveau = suivant
+        profondeur += 1
+
+    return _resultats(vues), erreurs, bilan
+
+
+def _resultats(vues: Dict[str, Tuple[str, int]]) -> pd.DataFrame:
+    if not vues:
+        return pd.DataFrame(columns=["prefix", "suggestion", "profondeur"])
+    return pd.DataFrame(
+        [{"prefix": prefix, "suggestion": sugg, "profondeur": profondeur} for sugg, (prefix, profondeur) in vues.items()]
+    )
@@ -0,0 +1,224 @@
+"""
+Export des résultats: tables Parquet et CSV partitionnées, écrites en flux
+
+Les tables sont écrites par morceaux au fil de la lecture (point de reprise,
+itérateurs…): la mémoire utilisée dépend de la taille d'un morceau, pas du
+nombre total de lignes. Les grandes tables sont partitionnées par initiale de
+leur clé, au format Hive (`parquet/concurrence/initiale=f/part.parquet`, idem
+sous `csv/`), ce qui permet de relire un sous-ensemble avec `pd.read_parquet(..., filters=...)`.
+"""
+import io
+import os
+import tempfile
+import unicodedata
+import zipfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .analysis import classer_potentiel_marches
+from .checkpoint import Checkpoint
+
+FORMATS = ("parquet", "csv")
+
+# Colonne dont l'initiale partitionne chaque table (les autres tables ne sont pas partitionnées)
+PARTITIONS = {
+    "suggestions": "prefix",
+    "concurrence": "keyword",
+    "details": "app_id",
+    "avis": "app_id",
+}
+
+# Types imposés aux colonnes dont le type pandas varie d'un morceau à l'autre (note entière
+# 4 puis 4.3, note manquante, booléen absent): le schéma Parquet fixé par le premier morceau
+# d'une partition convient ainsi aux suivants. Les prix et les installations des fiches restent
+# du texte ("0", "4,99 €", 10000 ou "10 000+" selon la source).
+TYPES = {
+    "concurrence": {"score": "float64", "free": "boolean"},
+    "details": {"minInstalls": "string", "updated": "string", **{f"nb_avis_{note}": "Int64" for note in range(1, 6)}},
+    "avis": {"score": "float64"},
+    "potentiel": {"note_moyenne": "float64"},
+}
+NUMERIQUES = ("float64", "Int64")
+
+
+def typer(table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Convertit les colonnes de `df` aux types déclarés pour la table (valeurs illisibles: manquantes)
+
+    Une colonne typée absente du morceau est ajoutée, vide.
+    """
+    types = TYPES.get(table, {})
+    if not types:
+        return df
+    return df.assign(**{
+        colonne: (
+            pd.Series(pd.NA, index=df.index, dtype=dtype) if colonne not in df
+            else pd.to_numeric(df[colonne], errors="coerce").astype(dtype) if dtype in NUMERIQUES
+            else df[colonne].astype(dtype)
+        )
+        for colonne, dtype in types.items()
+    })
+
+
+def initiale(valeur: object) -> str:
+    """Initiale d'une valeur, sans accent (a-z, 0-9), ou '_'"""
+    texte = unicodedata.normalize("NFKD", str(valeur).strip().lower())
+    caractere = next((c for c in texte if c.isascii() and c.isalnum()), "_")
+    return caractere
+
+
+class ExportWriter:
+    """Écrit des tables morceau par morceau, en Parquet et/ou CSV, partitionnées par initiale"""
+
+    def __init__(self, output_dir: str, formats: Iterable[str] = FORMATS, partitions: Optional[Dict[str, str]] = None):
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.partitions = PARTITIONS if partitions is None else partitions
+        self.rows: Dict[str, int] = {}
+        self._parquet: Dict[str, pq.ParquetWriter] = {}
+        self._csv_colonnes: Dict[str, List[str]] = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _chemin(self, table: str, partition: Optional[str], extension: str) -> str:
+        racine = os.path.join(self.output_dir, extension)
+        if partition is None:
+            os.makedirs(racine, exist_ok=True)
+            return os.path.join(racine, f"{table}.{extension}")
+        dossier = os.path.join(racine, table, f"initiale={partition}")
+        os.makedirs(dossier, exist_ok=True)
+        return os.path.join(dossier, f"part.{extension}")
+
+    def write(self, table: str, df: pd.DataFrame) -> None:
+        """Ajoute un morceau à une table"""
+        self.rows.setdefault(table, 0)
+        if df.empty:
+            return
+        self.rows[table] += len(df)
+        # Types stables d'un morceau à l'autre: les colonnes texte restent du texte, même vides
+        df = typer(table, df)
+        df = df.astype({c: "string" for c in df.columns if df[c].dtype == object}).reset_index(drop=True)
+
+        colonne = self.partitions.get(table)
+        if colonne is None or colonne not in df:
+            self._ecrire(table, None, df)
+            return
+        for partition, morceau in df.groupby(df[colonne].map(initiale), sort=True):
+            self._ecrire(table, partition, morceau)
+
+    def _ecrire(self, table: str, partition: Optional[str], df: pd.DataFrame) -> None:
+        if "parquet" in self.formats:
+            chemin = self._chemin(table, partition, "parquet")
+            writer = self._parquet.get(chemin)
+            if writer is None:
+                donnees = pa.Table.from_pandas(df, preserve_index=False)
+                writer = self._parquet[chemin] = pq.ParquetWriter(chemin, donnees.schema)
+            else:
+                donnees = pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False)
+            writer.write_table(donnees)
+        if "csv" in self.formats:
+            chemin = self._chemin(table, partition, "csv")
+            premier = chemin not in self._csv_colonnes
+            # Colonnes dans l'ordre de l'en-tête écrit par le premier morceau
+            colonnes = self._csv_colonnes.setdefault(chemin, df.columns.tolist())
+            df.reindex(columns=colonnes).to_csv(chemin, mode="w" if premier else "a", header=premier, index=False)
+
+    def close(self) -> None:
+        for writer in self._parquet.values():
+            writer.close()
+        self._parquet.clear()
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def exporter_checkpoint(
+    checkpoint: Checkpoint,
+    writer: ExportWriter,
+    chunk_size: int = 500,
+) -> pd.DataFrame:
+    """Exporte en flux les résultats enregistrés dans un point de reprise
+
+    Écrit suggestions, concurrence, details (avec les statistiques d'avis), avis et
+    potentiel; retourne le classement par potentiel (une ligne par mot-clé).
+    """
+    lignes = []
+    for seed, suggestions in checkpoint.results("suggestions"):
+        lignes += [{"prefix": seed, "suggestion": s} for s in suggestions]
+        if len(lignes) >= chunk_size:
+            writer.write("suggestions", pd.DataFrame(lignes))
+            lignes = []
+    writer.write("suggestions", pd.DataFrame(lignes, columns=["prefix", "suggestion"]))
+
+    # Concurrence par morceaux de mots-clés complets: le potentiel de chaque morceau est indépendant
+    classements = []
+
+    def ecrire_concurrence(apps, mots_cles):
+        concurrence_df = pd.DataFrame(apps, columns=["keyword", "app_id", "title", "developer", "score", "installs", "price", "free"])
+        writer.write("concurrence", concurrence_df)
+        classements.append(classer_potentiel_marches(concurrence_df, keywords=mots_cles))
+
+    apps, mots_cles = [], []
+    for keyword, resultats in checkpoint.results("concurrence"):
+        apps += [{"keyword": keyword, **app} for app in resultats]
+        mots_cles.append(keyword)
+        if len(mots_cles) >= chunk_size:
+            ecrire_concurrence(apps, mots_cles)
+            apps, mots_cles = [], []
+    if mots_cles:
+        ecrire_concurrence(apps, mots_cles)
+
+    details, avis = [], []
+    for app_id, (infos, app_reviews, avis_stats, _) in checkpoint.results("details"):
+        if infos is None:
+            continue
+        details.append({"app_id": app_id, **infos, **avis_stats})
+        avis += [{"app_id": app_id, "content": r.get("content", ""), "score": r.get("score")} for r in app_reviews]
+        if len(details) >= chunk_size:
+            writer.write("details", pd.DataFrame(details))
+            writer.write("avis", pd.DataFrame(avis))
+            details, avis = [], []
+    writer.write("details", pd.DataFrame(details))
+    writer.write("avis", pd.DataFrame(avis, columns=["app_id", "content", "score"]))
+
+    # Ordre indépendant de celui des éléments du point de reprise (à égalité de score: ordre alphabétique)
+    potentiel_df = (
+        pd.concat(classements, ignore_index=True)
+        .sort_values(["score", "keyword"], ascending=[False, True], kind="stable")
+        .reset_index(drop=True)
+        if classements else classer_potentiel_marches(pd.DataFrame(columns=["keyword", "score"]))
+    )
+    writer.write("potentiel", potentiel_df)
+    return potentiel_df
+
+
+def archive_zip(tables: Dict[str, pd.DataFrame], formats: Iterable[str] = FORMATS,
+                fichiers: Optional[Dict[str, str]] = None) -> bytes:
+    """Archive zip des tables exportées (et de fichiers texte supplémentaires), pour un téléchargement"""
+    with tempfile.TemporaryDirectory() as dossier:
+        with ExportWriter(dossier, formats) as writer:
+            for table, df in tables.items():
+                writer.write(table, df)
+        tampon = io.BytesIO()
+        with zipfile.ZipFile(tampon, "w", zipfile.ZIP_DEFLATED) as archive:
+            for racine, _, noms in os.walk(dossier):
+                for nom in noms:
+                    chemin = os.path.join(racine, nom)
+                    archive.write(chemin, os.path.relpath(chemin, dossier))
+            for nom, contenu in (fichiers or {}).items():
+                archive.writestr(nom, contenu)
+        return tampon.getvalue()
+
+
+def lire_table(output_dir: str, table: str, filtre: Optional[Tuple[str, Iterable[str]]] = None) -> pd.DataFrame:
+    """Relit une table Parquet exportée, éventuellement filtrée sur les valeurs d'une colonne"""
+    chemin = os.path.join(output_dir, "parquet", table)
+    if not os.path.isdir(chemin):
+        chemin += ".parquet"
+    filters = [(filtre[0], "in", list(filtre[1]))] if filtre else None
+    df = pd.read_parquet(chemin, filters=filters)
+    return df.drop(columns=["initiale"], errors="ignore")
@@ -0,0 +1,135 @@
+"""
+Source de secours sans quota: le Play Store lui-même (scrapers.play_scraper)
+
+Quand le quota SerpApi d'une session est épuisé, `SerpApiClient.get` redemande la
+même chose au Play Store. Les résultats sont remis au format des réponses SerpApi
+(organic_results, app_results, reviews, suggestions): parse_* et toute la suite du
+moteur les traitent sans distinction. Ces réponses ne sont pas mises en cache, pour
+ne pas masquer les réponses SerpApi plus complètes une fois le quota revenu, et
+portent la marque SECOURS: le pipeline et les instantanés ne les enregistrent pas
+comme des résultats définitifs.
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+from scrapers import play_scraper
+from scrapers.rate_limit import TokenBucket
+from scrapers.retry import RetryScheduler
+
+from . import metrics
+
+PLAY_HOST = "play.google.com"  # Clé du disjoncteur des appels au Play Store
+
+# Avis joints à une fiche (comme la réponse google_play de SerpApi)
+AVIS_FICHE = 40
+
+# Clé ajoutée à chaque réponse du Play Store (absente des réponses SerpApi)
+SECOURS = "play_fallback"
+
+
+def _prix(app_info: Dict[str, Any]) -> str:
+    if app_info.get("free", True):
+        return "Gratuit"
+    return app_info.get("priceText") or f"{app_info.get('price', 0):.2f} {app_info.get('currency') or ''}".strip()
+
+
+def _avis_serpapi(avis: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": avis.get("id") or "",
+        "title": avis.get("userName") or "",
+        "snippet": avis.get("content") or "",
+        "rating": avis.get("score") or 0,
+        "iso_date": avis.get("at") or "",
+        "likes": avis.get("thumbsUpCount") or 0,
+    }
+
+
+def recherche_serpapi(apps: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Résultats de play_scraper.search au format google_play (recherche)"""
+    return {"organic_results": [
+        {
+            "id": app_info.get("appId") or "",
+            "title": app_info.get("title") or "",
+            "developer": app_info.get("developer") or "",
+            "rating": app_info.get("score") or 0,
+            "downloads": app_info.get("installs") or "Non disponible",
+            "price_text": _prix(app_info),
+            "thumbnail": app_info.get("icon") or "",
+        }
+        for app_info in apps
+    ]}
+
+
+def fiche_serpapi(details: Dict[str, Any], avis: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fiche de play_scraper.app (et ses premiers avis) au format google_play (fiche)"""
+    return {"app_results": {
+        "title": details.get("title") or "",
+        "description": details.get("description") or "",
+        "genre": details.get("genre") or "",
+        "thumbnail": details.get("icon") or "",
+        "developer": details.get("developer") or "",
+        "installs": details.get("installs") or "Non disponible",
+        "updated": details.get("updated") or "Non disponible",
+        "rating": details.get("score") or 0,
+        "price_text": _prix(details),
+        "reviews": [{"content": a.get("content") or "", "rating": a.get("score") or 0} for a in avis],
+    }}
+
+
+def avis_serpapi(avis: List[Dict[str, Any]], token: Optional[str]) -> Dict[str, Any]:
+    """Page de play_scraper.reviews au format google_play_product"""
+    data: Dict[str, Any] = {"reviews": [_avis_serpapi(a) for a in avis]}
+    if token:
+        data["serpapi_pagination"] = {"next_page_token": token}
+    return data
+
+
+class PlayFallback:
+    """Réponses au format SerpApi obtenues directement du Play Store, cadencées et réessayées"""
+
+    def __init__(self, scheduler: RetryScheduler, rate: float = 1.0, burst: float = 2.0):
+        self.scheduler = scheduler
+        self.limiter = TokenBucket(rate=rate, capacity=burst)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {}
+
+    def _appel(self, fn: Any, *args: Any, **kwargs: Any) -> Any:
+        def limite() -> Any:
+            self.limiter.acquire()
+            return fn(*args, **kwargs)
+
+        def compter(attempt: int, retry_class: str, delay: float, exc: BaseException) -> None:
+            metrics.REESSAIS.inc(retry_class=retry_class)
+        return self.scheduler.call(PLAY_HOST, limite, on_retry=compter)
+
+    def get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Même contrat que SerpApiClient.fetch pour les paramètres google_autocomplete/google_play/google_play_product"""
+        engine = params.get("engine", "")
+        lang, country = params.get("hl", "fr"), params.get("gl", "fr")
+        if engine == "google_autocomplete":
+            data = {"suggestions": [{"value": s} for s in self._appel(play_scraper.suggestions, params["q"], lang, country)]}
+        elif engine == "google_play_product":
+            avis, token = self._appel(play_scraper.reviews, params["product_id"], lang, country,
+                                      int(params.get("num", 100)), continuation_token=params.get("next_page_token"))
+            data = avis_serpapi(avis, token)
+        elif engine == "google_play" and "id" in params:
+            try:
+                details = self._appel(play_scraper.app, params["id"], lang, country)
+            except play_scraper.NotFoundError:
+                data = {}  # parse_app_details: aucune fiche, comme une réponse SerpApi vide
+            else:
+                avis, _ = self._appel(play_scraper.reviews, params["id"], lang, country, AVIS_FICHE)
+                data = fiche_serpapi(details, avis)
+        elif engine == "google_play":
+            data = recherche_serpapi(self._appel(play_scraper.search, params["q"], lang, country, n_hits=30))
+        else:
+            raise ValueError(f"Moteur sans source de secours: {engine!r}")
+        data[SECOURS] = True
+        with self._lock:
+            self._stats[engine] = self._stats.get(engine, 0) + 1
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        """Réponses servies par le Play Store, par moteur SerpApi"""
+        with self._lock:
+            return dict(self._stats)
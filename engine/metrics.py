@@ -0,0 +1,80 @@
+"""
+Métriques du moteur: appels SerpApi, cache, quota, réessais, tailles de réponses et calcul des scores
+
+Enregistrées dans le registre du processus (scrapers.metrics.REGISTRY): le panneau
+« Métriques » de l'interface les résume, `METRICS_PATH` les écrit dans un fichier
+et `METRICS_PORT` les expose sur /metrics au format de Prometheus.
+"""
+import functools
+from typing import Any, Callable, Dict, TypeVar
+
+from scrapers.metrics import REGISTRY, SIZE_BUCKETS
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+APPELS = REGISTRY.histogram(
+    "serpapi_call_duration_seconds",
+    "Durée d'un appel SerpApiClient.get (source: cache, api, partage, replay, play)",
+    ("engine", "source"),
+)
+ERREURS = REGISTRY.counter("serpapi_call_errors_total", "Appels SerpApiClient.get en échec", ("engine", "error"))
+REQUETES = REGISTRY.histogram(
+    "serpapi_upstream_duration_seconds", "Durée d'une requête HTTP vers SerpApi (une par tentative)", ("engine", "status")
+)
+TAILLES = REGISTRY.histogram(
+    "serpapi_response_bytes", "Taille des réponses HTTP de SerpApi", ("engine",), buckets=SIZE_BUCKETS
+)
+CACHE = REGISTRY.histogram(
+    "serpapi_cache_lookup_duration_seconds", "Durée d'une lecture du cache persistant", ("engine", "result")
+)
+QUOTA = REGISTRY.histogram(
+    "serpapi_quota_acquire_duration_seconds", "Attente d'une acquisition de quota", ("operation", "result")
+)
+# Fenêtre du débit affiché: une rafale après une longue inactivité n'est pas diluée dans la durée du processus
+FENETRE_DEBIT = 300.0
+UNITES = REGISTRY.counter("serpapi_quota_units_total", "Unités de quota consommées", ("operation",), window=FENETRE_DEBIT)
+RENDUES = REGISTRY.counter(
+    "serpapi_quota_units_refunded_total", "Unités réservées puis rendues (appel partagé ou déjà en cache)", ("operation",)
+)
+REESSAIS = REGISTRY.counter("serpapi_retries_total", "Nouvelles tentatives après une erreur transitoire", ("retry_class",))
+SCORES = REGISTRY.histogram("scoring_duration_seconds", "Durée des étapes de calcul des scores", ("step",))
+
+
+def mesure_scoring(step: str) -> Callable[[F], F]:
+    """Décorateur: chronomètre la fonction dans scoring_duration_seconds{step=...}"""
+    def decorateur(fn: F) -> F:
+        @functools.wraps(fn)
+        def mesuree(*args: Any, **kwargs: Any) -> Any:
+            with SCORES.time(step=step):
+                return fn(*args, **kwargs)
+        return mesuree  # type: ignore[return-value]
+    return decorateur
+
+
+def resume_ops() -> Dict[str, Any]:
+    """Résumé pour le panneau d'exploitation: latences par moteur, cache, quota, réessais, tailles, scores"""
+    appels = {
+        engine: {
+            "appels": APPELS.count(engine=engine),
+            "p50_ms": APPELS.quantile(0.5, engine=engine) * 1000,
+            "p95_ms": APPELS.quantile(0.95, engine=engine) * 1000,
+            "amont_p95_ms": REQUETES.quantile(0.95, engine=engine) * 1000,
+            "octets_moyens": TAILLES.sum(engine=engine) / max(1, TAILLES.count(engine=engine)),
+        }
+        for engine in APPELS.label_values("engine")
+    }
+    succes, echecs = CACHE.count(result="hit"), CACHE.count(result="miss")
+    unites = UNITES.total()
+    return {
+        "appels": appels,
+        "cache_hit_ratio": succes / (succes + echecs) if succes + echecs else 0.0,
+        "cache_p95_ms": CACHE.quantile(0.95) * 1000,
+        "quota_unites": unites,
+        "quota_unites_par_minute": UNITES.rate() * 60,  # Sur les FENETRE_DEBIT dernières secondes
+        "quota_attente_p95_ms": QUOTA.quantile(0.95, result="ok") * 1000,
+        "quota_refus": QUOTA.count(result="refuse"),
+        "reessais": REESSAIS.by("retry_class"),
+        "erreurs": ERREURS.total(),
+        "scores_p95_ms": {step: SCORES.quantile(0.95, step=step) * 1000 for step in SCORES.label_values("step")},
+    }
+
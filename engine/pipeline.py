@@ -0,0 +1,190 @@
+"""
+Pipeline en flux: suggestions → concurrence → détails, reliées par des files bornées
+
+Chaque étape dispose de ses propres threads; les files bornées entre étapes
+propagent la contre-pression (une étape lente ralentit celles qui l'alimentent).
+Chaque élément terminé est enregistré dans un Checkpoint: un traitement
+interrompu reprend là où il s'était arrêté sans repayer le travail déjà fait.
+Un résultat obtenu du Play Store (secours, quota épuisé) est transmis mais pas
+enregistré: la reprise le redemande à SerpApi.
+"""
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from scrapers.quota import QuotaExceeded
+
+from .analysis import analyser_concurrence, analyser_details_app
+from .checkpoint import Checkpoint
+from .serpapi import BATCH_SESSION, SerpApiClient
+
+STAGES = ("suggestions", "concurrence", "details")
+
+_FIN = object()  # Marqueur de fin de flux
+
+
+class Evenement(NamedTuple):
+    """Un élément traité (ou en échec) par une étape du pipeline"""
+    stage: str
+    item: str
+    result: Any = None
+    error: Optional[Exception] = None
+    resumed: bool = False  # Résultat relu depuis le point de reprise, sans appel à l'API
+    secours: bool = False  # Résultat venu (en partie) du Play Store, non enregistré
+
+
+class KeywordPipeline:
+    """Pipeline suggestions → concurrence → détails avec points de reprise"""
+
+    def __init__(
+        self,
+        client: SerpApiClient,
+        checkpoint: Checkpoint,
+        lang: str = "fr",
+        country: str = "fr",
+        max_suggestions: int = 5,
+        limit: int = 5,
+        details_per_keyword: int = 3,
+        workers: int = 4,
+        queue_size: int = 64,
+        include_seeds: bool = True,
+        session_id: str = BATCH_SESSION,
+    ):
+        self.client = client
+        self.checkpoint = checkpoint
+        self.lang = lang
+        self.country = country
+        self.max_suggestions = max_suggestions
+        self.limit = limit
+        self.details_per_keyword = details_per_keyword
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.include_seeds = include_seeds
+        self.session_id = session_id
+        checkpoint.check_params({
+            "lang": lang,
+            "country": country,
+            "max_suggestions": max_suggestions,
+            "limit": limit,
+            "details_per_keyword": details_per_keyword,
+            "include_seeds": include_seeds,
+        })
+
+    # Traitement d'un élément par étape (résultats sérialisables en JSON)
+    def _suggestions(self, seed: str) -> List[str]:
+        return self.client.suggestions(seed, self.lang, self.country, self.session_id)[:self.max_suggestions]
+
+    def _concurrence(self, keyword: str) -> List[Dict[str, Any]]:
+        df = analyser_concurrence(self.client, keyword, self.limit, self.lang, self.country, self.session_id)
+        return df.to_dict("records")
+
+    def _details(self, app_id: str) -> List[Any]:
+        return list(analyser_details_app(self.client, app_id, self.lang, self.country, self.session_id))
+
+    def _downstream(self, stage: str, item: str, result: Any) -> List[str]:
+        """Éléments à transmettre à l'étape suivante"""
+        if stage == "suggestions":
+            return ([item] if self.include_seeds else []) + list(result)
+        if stage == "concurrence":
+            return [app["app_id"] for app in result[:self.details_per_keyword]]
+        return []
+
+    def run(self, keywords: Iterable[str]) -> Iterator[Evenement]:
+        """Exécute le pipeline et produit un Evenement par élément dès qu'il est terminé
+
+        Le pipeline s'arrête proprement si le quota est épuisé ou si le
+        générateur est fermé; relancer avec le même Checkpoint reprend le travail.
+        """
+        fonctions: Dict[str, Callable[[str], Any]] = {
+            "suggestions": self._suggestions,
+            "concurrence": self._concurrence,
+            "details": self._details,
+        }
+        files = [queue.Queue(maxsize=self.queue_size) for _ in STAGES]
+        evenements: "queue.Queue[Evenement]" = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        lock = threading.Lock()
+        vus = [set() for _ in STAGES]
+        actifs = [self.workers for _ in STAGES]
+
+        def put(q: queue.Queue, valeur: Any) -> bool:
+            """put bloquant (contre-pression) qui abandonne si le pipeline s'arrête"""
+            while not stop.is_set():
+                try:
+                    q.put(valeur, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def transmettre(index: int, items: Iterable[str]) -> None:
+            for item in items:
+                with lock:
+                    if item in vus[index]:
+                        continue
+                    vus[index].add(item)
+                if not put(files[index], item):
+                    return
+
+        def alimenter() -> None:
+            transmettre(0, (k for k in keywords if k.strip()))
+            for _ in range(self.workers):
+                put(files[0], _FIN)
+
+        def travailler(index: int) -> None:
+            stage = STAGES[index]
+            try:
+                while not stop.is_set():
+                    try:
+                        item = files[index].get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if item is _FIN:
+                        break
+
+                    # Lecture par clé primaire: seuls les éléments en cours sont en mémoire, pas toute l'étape
+                    result = self.checkpoint.get(stage, item)
+                    resumed = result is not None
+                    secours: List[str] = []
+                    if not resumed:
+                        try:
+                            with self.client.suivi_secours() as secours:
+                                result = fonctions[stage](item)
+                        except QuotaExceeded as e:
+                            put(evenements, Evenement(stage, item, error=e))
+                            stop.set()
+                            break
+                        except Exception as e:
+                            put(evenements, Evenement(stage, item, error=e))
+                            continue
+                        if not secours:
+                            self.checkpoint.record(stage, item, result)
+
+                    put(evenements, Evenement(stage, item, result, resumed=resumed, secours=bool(secours)))
+                    if index + 1 < len(STAGES):
+                        transmettre(index + 1, self._downstream(stage, item, result))
+            finally:
+                with lock:
+                    actifs[index] -= 1
+                    dernier = actifs[index] == 0
+                if dernier and index + 1 < len(STAGES):
+                    for _ in range(self.workers):
+                        put(files[index + 1], _FIN)
+
+        threads = [threading.Thread(target=alimenter, daemon=True)]
+        for index in range(len(STAGES)):
+            threads += [threading.Thread(target=travailler, args=(index,), daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                try:
+                    yield evenements.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(thread.is_alive() for thread in threads) and evenements.empty():
+                        return
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
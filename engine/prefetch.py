@@ -0,0 +1,126 @@
+"""
+Préchargement en arrière-plan des fiches d'applications dans le cache partagé
+
+Après une analyse de concurrence, les fiches (et premières pages d'avis) des
+premiers concurrents sont demandées en tâche de fond: quand l'utilisateur ouvre
+l'une d'elles, la réponse est déjà en cache, ou l'appel en cours est partagé.
+Le préchargement ne dépense qu'un budget limité et laisse toujours une réserve
+de quota aux actions explicites de la session.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from .serpapi import BATCH_SESSION, SerpApiClient, details_params, parse_reviews_page, reviews_params
+
+logger = logging.getLogger(__name__)
+
+
+class _Budget:
+    """Unités de quota qu'un préchargement peut encore dépenser (partagé par ses tâches)"""
+
+    def __init__(self, unites: float):
+        self.restant = float(unites)
+        self._lock = threading.Lock()
+
+    def reserver(self, cout: float) -> bool:
+        with self._lock:
+            if cout > self.restant:
+                return False
+            self.restant -= cout
+            return True
+
+
+class Prefetcher:
+    """Précharge des fiches d'applications dans un pool de threads dédié"""
+
+    def __init__(self, client: SerpApiClient, max_workers: int = 2):
+        self.client = client
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._en_cours = set()
+        self._stats = {"prechargees": 0, "en_cache": 0, "hors_budget": 0, "erreurs": 0, "unites": 0.0}
+
+    def _compter(self, nom: str, valeur: float = 1) -> None:
+        with self._lock:
+            self._stats[nom] += valeur
+
+    def _quota_suffisant(self, session_id: str, cout: float) -> bool:
+        """Vrai si l'appel laisse au moins la réserve configurée à la session et au seau global"""
+        statut = self.client.governor.status(session_id)
+        reserve = self.client.config.prefetch_reserve
+        return (
+            statut["session_share"] - statut["session_used"] - cout >= reserve
+            and statut["global_tokens"] - cout >= reserve
+        )
+
+    def _charger(self, params: Dict[str, Any], operation: str, session_id: str, budget: _Budget) -> Optional[Dict[str, Any]]:
+        """Réponse en cache, ou appel payé si le budget et le quota le permettent (sinon None)"""
+        data = self.client.cache.get(params, count=False)
+        if data is not None:
+            self._compter("en_cache")
+            return data
+        cout = self.client.governor.cost_of(operation)
+        if not self._quota_suffisant(session_id, cout) or not budget.reserver(cout):
+            self._compter("hors_budget")
+            return None
+        data = self.client.get(params, session_id)
+        self._compter("prechargees")
+        self._compter("unites", cout)
+        return data
+
+    def _precharger(self, app_id: str, session_id: str, budget: _Budget, max_avis: int, lang: str, country: str) -> None:
+        try:
+            if self._charger(details_params(app_id, lang, country), "details", session_id, budget) is None:
+                return
+            # Mêmes pages que engine.analysis.collecter_avis (100 avis par page)
+            recus, jeton = 0, None
+            while recus < max_avis:
+                data = self._charger(reviews_params(app_id, lang, country, 100, jeton), "reviews", session_id, budget)
+                if data is None:
+                    return
+                avis, jeton = parse_reviews_page(data)
+                recus += len(avis)
+                if not avis or jeton is None:
+                    return
+        except Exception as e:
+            self._compter("erreurs")
+            logger.debug("Préchargement de %s interrompu: %s", app_id, e)
+        finally:
+            with self._lock:
+                self._en_cours.discard((app_id, lang, country))
+
+    def prefetch(
+        self,
+        app_ids: Iterable[str],
+        session_id: str = BATCH_SESSION,
+        budget: Optional[float] = None,
+        max_avis: int = 0,
+        lang: str = "fr",
+        country: str = "fr",
+    ) -> List["Future[None]"]:
+        """Lance le préchargement des fiches de `app_ids` (et de `max_avis` avis chacune)
+
+        `budget` (par défaut config.prefetch_budget) borne les unités de quota
+        dépensées par cet appel; les applications déjà en cours de préchargement
+        sont ignorées. Retourne les Futures des tâches lancées (aucune en relecture
+        de cassette, où toute réponse est déjà locale).
+        """
+        if self.client.replaying:
+            return []
+        restant = _Budget(self.client.config.prefetch_budget if budget is None else budget)
+        futures = []
+        for app_id in dict.fromkeys(app_ids):
+            cle = (app_id, lang, country)
+            with self._lock:
+                if cle in self._en_cours:
+                    continue
+                self._en_cours.add(cle)
+            futures.append(self._pool.submit(self._precharger, app_id, session_id, restant, max_avis, lang, country))
+        return futures
+
+    def stats(self) -> Dict[str, float]:
+        """Fiches et pages préchargées, déjà en cache, ignorées faute de budget, erreurs et unités dépensées"""
+        with self._lock:
+            return dict(self._stats)
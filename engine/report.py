@@ -0,0 +1,116 @@
+"""
+Rapport complet d'un mot-clé (Markdown): potentiel, concurrents, applications analysées et plaintes
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .store import ReviewStore
+
+
+def _cellule(valeur: Any) -> str:
+    if valeur is None or (isinstance(valeur, float) and pd.isna(valeur)):
+        return ""
+    return str(valeur).replace("|", "\\|").replace("\n", " ")
+
+
+def tableau_markdown(df: pd.DataFrame, colonnes: Optional[Dict[str, str]] = None) -> str:
+    """Tableau Markdown d'un DataFrame; `colonnes` associe colonne -> titre"""
+    colonnes = colonnes or {c: c for c in df.columns}
+    colonnes = {c: titre for c, titre in colonnes.items() if c in df}
+    lignes = [
+        "| " + " | ".join(colonnes.values()) + " |",
+        "| " + " | ".join("---" for _ in colonnes) + " |",
+    ]
+    for ligne in df[list(colonnes)].itertuples(index=False):
+        lignes.append("| " + " | ".join(_cellule(v) for v in ligne) + " |")
+    return "\n".join(lignes)
+
+
+def rapport_mot_cle(
+    keyword: str,
+    potentiel: Dict[str, Any],
+    concurrence_df: pd.DataFrame,
+    details: Optional[Dict[str, Dict[str, Any]]] = None,
+    avis: Optional[ReviewStore] = None,
+    themes_df: Optional[pd.DataFrame] = None,
+    genere_le: Optional[datetime] = None,
+    max_avis_negatifs: int = 5,
+) -> str:
+    """Rapport Markdown d'un mot-clé
+
+    - details: {app_id: détails} des applications analysées
+    - avis: avis collectés pour ces applications
+    - themes_df: plaintes récurrentes (engine.reviews.extraire_themes)
+    """
+    genere_le = genere_le or datetime.now()
+    sections: List[str] = [
+        f"# Rapport d'analyse: « {keyword} »",
+        f"_Généré le {genere_le:%d/%m/%Y à %H:%M}_",
+        "## Potentiel du marché",
+        "\n".join([
+            f"- Score: **{potentiel.get('score', 0)}/100**",
+            f"- Potentiel: **{potentiel.get('potentiel', 'Indéterminé')}**",
+            f"- Difficulté: **{potentiel.get('difficulte', 'Indéterminée')}**",
+            f"- Nombre de concurrents: **{potentiel.get('nb_concurrents', 0)}**",
+            f"- Note moyenne des concurrents: **{potentiel.get('note_moyenne', 0)}⭐**",
+        ]),
+        "## Applications concurrentes",
+    ]
+    if concurrence_df.empty:
+        sections.append("Aucune application concurrente trouvée.")
+    else:
+        sections.append(tableau_markdown(concurrence_df, {
+            "title": "Application", "app_id": "Identifiant", "developer": "Développeur",
+            "score": "Note", "installs": "Installations", "price": "Prix",
+        }))
+
+    stats = avis.stats_par_app() if avis is not None and len(avis) else pd.DataFrame()
+    if details:
+        sections.append("## Applications analysées")
+        for app_id, infos in details.items():
+            sections.append(f"### {infos.get('title') or app_id}")
+            lignes = [
+                f"- Identifiant: `{app_id}`",
+                f"- Développeur: {infos.get('developer', '')}",
+                f"- Catégorie: {infos.get('genre', '')}",
+                f"- Installations: {infos.get('minInstalls', 'Non disponible')}",
+                f"- Dernière mise à jour: {infos.get('updated', 'Non disponible')}",
+            ]
+            if app_id in stats.index:
+                ligne = stats.loc[app_id]
+                lignes.append(
+                    f"- Avis analysés: {int(ligne['nb_avis'])} (note moyenne {ligne['note_moyenne']}⭐, "
+                    f"{ligne['part_negatifs']:.0%} de négatifs)"
+                )
+            sections.append("\n".join(lignes))
+
+    if avis is not None and len(avis):
+        sections.append("## Distribution des notes")
+        histogramme = avis.histogramme()
+        histogramme.columns = [f"{note}⭐" for note in histogramme.columns]
+        titres = {app_id: (details or {}).get(app_id, {}).get("title") or app_id for app_id in histogramme.index}
+        histogramme.insert(0, "Application", [titres[a] for a in histogramme.index])
+        sections.append(tableau_markdown(histogramme.reset_index(drop=True)))
+
+    sections.append("## Plaintes récurrentes des utilisateurs")
+    if themes_df is not None and not themes_df.empty:
+        sections.append("\n".join(
+            f"- **{t.theme}** ({t.termes}): {t.nb_avis} avis négatifs ({t.part:.0%}), "
+            f"{t.nb_apps} application(s), note moyenne {t.note_moyenne}⭐  \n  > {_cellule(t.exemple)[:300]}"
+            for t in themes_df.itertuples()
+        ))
+    else:
+        sections.append("Pas assez d'avis négatifs pour dégager des plaintes récurrentes.")
+
+    if avis is not None and len(avis):
+        negatifs = avis.negatifs().frame
+        if not negatifs.empty:
+            sections.append("## Exemples d'avis négatifs")
+            exemples = negatifs.sort_values("score", kind="stable").head(max_avis_negatifs)
+            sections.append("\n".join(
+                f"- ({int(r.score)}⭐, `{r.app_id}`) {_cellule(r.content)[:300]}" for r in exemples.itertuples()
+            ))
+
+    return "\n\n".join(sections) + "\n"
@@ -0,0 +1,183 @@
+"""
+Analyse des avis: thèmes de plainte récurrents dans les avis négatifs des concurrents
+
+Les avis sont découpés en unigrammes et bigrammes par lots vectorisés (pandas),
+représentés en matrice creuse (paires avis × terme), pondérés par TF-IDF, puis les
+termes les plus caractéristiques sont regroupés en thèmes selon leur cooccurrence
+dans les mêmes avis.
+"""
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .metrics import mesure_scoring
+from .store import NOTE_NEGATIVE_MAX
+
+
+MOTS_VIDES = frozenset("""
+a ai aie aient aies ait alors as au aucun aussi autre aux avec avait avant avez avoir ayant bien bon ca ce cela celle
+ces cet cette ceux chaque ci comme comment dans de des deja depuis devrait dois doit donc du elle elles en encore est
+et etaient etait ete etre eu faire fait faut il ils je jamais juste la le les leur lui ma mais me meme mes moi mon
+ne ni non nos notre nous on ont ou par pas peu peut plus pour pourquoi qu quand que quel quelle qui quoi sa sans se
+ses si son sont sur ta te tes toi ton toujours tous tout toute toutes tres tu un une vos votre vous vraiment y
+etc ok app appli application applications jeu trop beaucoup rien chose fois assez quelque
+about after again all also am an and any are because been before being but by can could did do does doing dont
+even every for from get got had has have having he her here him his how if in into is it its just like me more
+most my no not now of on once only or other our out over really same she should so some still such than that the
+their them then there these they this those through to too use used using very was we were what when where which
+while who why will with would you your
+""".split())
+
+_TOKEN = r"[^\W\d_]{2,}"
+_ACCENTS = str.maketrans("àâäéèêëîïôöùûüç", "aaaeeeeiioouuuc")
+
+
+def _normaliser(textes: pd.Series) -> pd.Series:
+    return textes.fillna("").astype(str).str.lower().str.translate(_ACCENTS).str.replace("'", " ", regex=False)
+
+
+def _paires_lot(textes: pd.Series, ngram_max: int) -> pd.DataFrame:
+    """Paires (avis, terme) d'un lot d'avis: unigrammes et n-grammes jusqu'à ngram_max, sans mots vides"""
+    tokens = _normaliser(textes).str.findall(_TOKEN).explode().dropna()
+    tokens = tokens[~tokens.isin(MOTS_VIDES)]
+    docs = tokens.index.to_numpy()
+    mots = tokens.to_numpy(dtype=object)
+
+    termes = [mots]
+    documents = [docs]
+    for n in range(2, ngram_max + 1):
+        if len(mots) < n:
+            break
+        # n-grammes de mots consécutifs (après retrait des mots vides) au sein d'un même avis
+        meme_avis = docs[n - 1:] == docs[:len(docs) - n + 1]
+        gramme = mots[:len(mots) - n + 1].copy()
+        for k in range(1, n):
+            gramme = gramme + " " + mots[k:len(mots) - n + 1 + k]
+        termes.append(gramme[meme_avis])
+        documents.append(docs[:len(docs) - n + 1][meme_avis])
+    return pd.DataFrame({"doc": np.concatenate(documents), "terme": np.concatenate(termes)})
+
+
+def matrice_termes(
+    textes: Iterable[str],
+    ngram_max: int = 2,
+    taille_lot: int = 50_000,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Matrice creuse binaire avis × terme, au format coordonnées
+
+    Retourne (lignes, colonnes, vocabulaire): l'avis `lignes[i]` contient le terme `vocabulaire[colonnes[i]]`.
+    """
+    textes = pd.Series(list(textes), dtype=object).reset_index(drop=True)
+    lots = [
+        _paires_lot(textes.iloc[debut:debut + taille_lot], ngram_max)
+        for debut in range(0, len(textes), taille_lot)
+    ]
+    if not lots:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=object)
+    paires = pd.concat(lots, ignore_index=True)
+    colonnes, vocabulaire = pd.factorize(paires["terme"])
+    lignes = paires["doc"].to_numpy(dtype=np.int64)
+    # Présence binaire: une seule paire par (avis, terme)
+    cles = np.unique(lignes * len(vocabulaire) + colonnes)
+    return cles // max(len(vocabulaire), 1), cles % max(len(vocabulaire), 1), np.asarray(vocabulaire, dtype=object)
+
+
+@mesure_scoring("themes")
+def extraire_themes(
+    avis_df: pd.DataFrame,
+    max_themes: int = 5,
+    max_termes: int = 40,
+    min_avis: int = 2,
+    seuil_cooccurrence: float = 0.5,
+    min_surrepresentation: float = 1.2,
+    ngram_max: int = 2,
+) -> pd.DataFrame:
+    """Thèmes de plainte récurrents dans les avis négatifs
+
+    `avis_df` contient au moins `content` et `score` (et `app_id` pour compter les
+    applications concernées). Quand le corpus contient aussi des avis positifs, seuls les
+    termes au moins `min_surrepresentation` fois plus fréquents dans les avis négatifs
+    sont retenus. Retourne un DataFrame trié par nombre d'avis:
+    theme, termes, nb_avis, part (des avis négatifs), note_moyenne, nb_apps, exemple.
+    """
+    colonnes = ["theme", "termes", "nb_avis", "part", "note_moyenne", "nb_apps", "exemple"]
+    if avis_df.empty or "content" not in avis_df:
+        return pd.DataFrame(columns=colonnes)
+
+    avis_df = avis_df.reset_index(drop=True)
+    notes = pd.to_numeric(avis_df["score"], errors="coerce").to_numpy(dtype=float)
+    negatifs = notes <= NOTE_NEGATIVE_MAX
+    nb_negatifs = int(negatifs.sum())
+    if nb_negatifs == 0:
+        return pd.DataFrame(columns=colonnes)
+
+    lignes, cols, vocabulaire = matrice_termes(avis_df["content"], ngram_max)
+    if len(vocabulaire) == 0:
+        return pd.DataFrame(columns=colonnes)
+
+    # TF-IDF: fréquence documentaire dans les avis négatifs × rareté dans l'ensemble des avis,
+    # pondérée par la sur-représentation du terme dans les avis négatifs (1 si tous les avis sont négatifs)
+    df_tous = np.bincount(cols, minlength=len(vocabulaire))
+    sur_negatifs = negatifs[lignes]
+    df_negatifs = np.bincount(cols[sur_negatifs], minlength=len(vocabulaire))
+    idf = np.log((len(avis_df) + 1) / (df_tous + 1)) + 1
+    surrepresentation = ((df_negatifs + 1) / (nb_negatifs + 1)) / ((df_tous + 1) / (len(avis_df) + 1))
+    eligibles = df_negatifs >= min_avis
+    if nb_negatifs < len(avis_df):
+        eligibles &= surrepresentation >= min_surrepresentation
+    poids = np.where(eligibles, df_negatifs * idf * surrepresentation, 0.0)
+    retenus = np.argsort(-poids, kind="stable")[:max_termes]
+    retenus = retenus[poids[retenus] > 0]
+    if len(retenus) == 0:
+        return pd.DataFrame(columns=colonnes)
+
+    # Matrice dense avis négatifs × termes retenus (peu de colonnes)
+    index_negatif = np.cumsum(negatifs) - 1
+    position = np.full(len(vocabulaire), -1)
+    position[retenus] = np.arange(len(retenus))
+    garde = sur_negatifs & (position[cols] >= 0)
+    presence = np.zeros((nb_negatifs, len(retenus)), dtype=np.float32)
+    presence[index_negatif[lignes[garde]], position[cols[garde]]] = 1.0
+
+    # Regroupement, du plus au moins caractéristique: un terme rejoint le thème d'un terme
+    # plus caractéristique quand la plupart de ses avis contiennent aussi ce terme
+    cooccurrences = presence.T @ presence
+    frequences = np.diag(cooccurrences)
+    inclusion = cooccurrences / np.maximum(np.minimum(frequences[:, None], frequences[None, :]), 1.0)
+    termes = vocabulaire[retenus]
+    groupe = np.full(len(retenus), -1)
+    for i in range(len(retenus)):
+        if groupe[i] >= 0:
+            continue
+        groupe[i] = i
+        rejoint = (groupe < 0) & (inclusion[i] >= seuil_cooccurrence)
+        groupe[rejoint] = i
+
+    chefs = np.unique(groupe)
+    appartenance = (groupe[:, None] == chefs[None, :]).astype(np.float32)
+    avis_theme = (presence @ appartenance) > 0
+
+    negatifs_df = avis_df[negatifs].reset_index(drop=True)
+    notes_negatives = notes[negatifs]
+    themes = []
+    for k, chef in enumerate(chefs):
+        masque = avis_theme[:, k]
+        membres = [termes[i] for i in np.flatnonzero(groupe == chef)]
+        concernes = negatifs_df[masque]
+        exemple = concernes["content"].astype(str)
+        # Libellé: le n-gramme le plus long parmi les termes presque aussi fréquents que le terme principal
+        frequents = [i for i in np.flatnonzero(groupe == chef) if frequences[i] >= 0.5 * frequences[chef]]
+        libelle = max(frequents, key=lambda i: (len(termes[i].split()), frequences[i]))
+        themes.append({
+            "theme": termes[libelle],
+            "termes": ", ".join(membres[:6]),
+            "nb_avis": int(masque.sum()),
+            "part": round(float(masque.mean()), 3),
+            "note_moyenne": round(float(np.nanmean(notes_negatives[masque])), 1),
+            "nb_apps": int(concernes["app_id"].nunique()) if "app_id" in concernes else 1,
+            "exemple": exemple.loc[exemple.str.len().idxmax()] if not exemple.empty else "",
+        })
+
+    themes_df = pd.DataFrame(themes, columns=colonnes)
+    return themes_df.sort_values("nb_avis", ascending=False, kind="stable").head(max_themes).reset_index(drop=True)
@@ -0,0 +1,421 @@
+"""
+Accès à SerpApi sans Streamlit: cache persistant, quota partagé, limiteur de débit et réessais
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from scrapers.cache import SQLiteCache, normalize_params
+from scrapers.cassette import open_cassette
+from scrapers.http_client import HttpClient
+from scrapers.pagination import ReviewBatch, iter_review_batches
+from scrapers.quota import QuotaExceeded, QuotaGovernor
+from scrapers.rate_limit import TokenBucket
+from scrapers.retry import RetryScheduler
+from scrapers.singleflight import SingleFlight
+
+from . import metrics
+from .config import EngineConfig
+from .fallback import PlayFallback
+
+logger = logging.getLogger(__name__)
+
+SERPAPI_HOST = "serpapi.com"  # Clé du disjoncteur pour les appels SerpApi
+
+# Taille maximale d'une page d'avis google_play_product
+REVIEWS_PAGE_MAX = 199
+
+# Session utilisée pour le quota des traitements hors interface
+BATCH_SESSION = "batch"
+
+# Attente d'un Future: wait(future, evenements) -> résultat
+Waiter = Callable[["Future[Any]", Dict[str, str]], Any]
+
+
+def operation_for(params: Dict[str, Any]) -> str:
+    """Type d'opération (et donc coût de quota) correspondant à des paramètres SerpApi"""
+    if params.get("engine") == "google_autocomplete":
+        return "suggestions"
+    if params.get("engine") == "google_play_product":
+        return "reviews"
+    return "details" if "id" in params else "competition"
+
+
+def suggestions_params(query: str, lang: str = "fr", country: str = "fr") -> Dict[str, Any]:
+    return {
+        "engine": "google_autocomplete",
+        "q": query,
+        "gl": country,
+        "hl": lang
+    }
+
+
+def search_params(query: str, lang: str = "fr", country: str = "fr") -> Dict[str, Any]:
+    return {
+        "engine": "google_play",
+        "q": query,
+        "gl": country,
+        "hl": lang,
+        "store": "apps"
+    }
+
+
+def details_params(app_id: str, lang: str = "fr", country: str = "fr") -> Dict[str, Any]:
+    return {
+        "engine": "google_play",
+        "id": app_id,
+        "gl": country,
+        "hl": lang
+    }
+
+
+def reviews_params(app_id: str, lang: str = "fr", country: str = "fr", num: int = 100,
+                   token: Optional[str] = None) -> Dict[str, Any]:
+    """Une page d'avis, du plus récent au plus ancien (SerpApi renvoie au plus 199 avis par page)"""
+    params = {
+        "engine": "google_play_product",
+        "store": "apps",
+        "product_id": app_id,
+        "all_reviews": "true",
+        "sort_by": 2,
+        "num": max(1, min(num, REVIEWS_PAGE_MAX)),
+        "gl": country,
+        "hl": lang
+    }
+    if token:
+        params["next_page_token"] = token
+    return params
+
+
+def parse_suggestions(data: Dict[str, Any]) -> List[str]:
+    """Extrait la liste des suggestions d'une réponse Google Autocomplete"""
+    return [item.get("value", "") for item in data.get("suggestions", [])]
+
+
+def parse_search_apps(data: Dict[str, Any], limit: int = 5) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Extrait les applications d'une recherche Play Store
+
+    Retourne (résultats, clé de la réponse où ils ont été trouvés).
+    """
+    results = []
+
+    # Vérifier les deux structures possibles selon la documentation
+    if "organic_results" in data and data["organic_results"]:
+        for app_data in data["organic_results"][:limit]:
+            results.append({
+                "appId": app_data.get("id", app_data.get("app_id", "")),
+                "title": app_data.get("title", ""),
+                "developer": app_data.get("developer", ""),
+                "score": app_data.get("rating", 0),
+                "installs": app_data.get("downloads", "Non disponible"),
+                "price": app_data.get("price_text", "Gratuit").replace("Gratuit", "0"),
+                "free": "Gratuit" in app_data.get("price_text", "Gratuit")
+            })
+        return results, "organic_results"
+
+    if "apps_results" in data and data["apps_results"]:
+        for app_data in data["apps_results"][:limit]:
+            results.append({
+                "appId": app_data.get("id", app_data.get("app_id", "")),
+                "title": app_data.get("title", ""),
+                "developer": app_data.get("developer", ""),
+                "score": app_data.get("rating", app_data.get("score", 0)),
+                "installs": app_data.get("downloads", app_data.get("installs", "Non disponible")),
+                "price": app_data.get("price_text", "Gratuit").replace("Gratuit", "0"),
+                "free": "Gratuit" in app_data.get("price_text", "Gratuit")
+            })
+        return results, "apps_results"
+
+    return results, None
+
+
+def parse_app_details(data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], Dict[str, int], List[Dict[str, Any]]]:
+    """Extrait (détails, avis, statistiques des avis, avis négatifs) d'une fiche d'application"""
+    # Vérifier les différentes structures possibles
+    app_data = None
+    if "app_results" in data:
+        app_data = data["app_results"]
+    elif "applications" in data and data["applications"]:
+        app_data = data["applications"][0]  # Prendre la première application
+
+    if not app_data:
+        return None, [], {}, []
+
+    # Extraire les informations pertinentes
+    details = {
+        "title": app_data.get("title", ""),
+        "description": app_data.get("description", ""),
+        "genre": app_data.get("genre", app_data.get("category", "")),
+        "icon": app_data.get("thumbnail", app_data.get("icon", "")),
+        "developer": app_data.get("developer", ""),
+        "minInstalls": app_data.get("installs", app_data.get("downloads", "Non disponible")),
+        "updated": app_data.get("updated", "Non disponible")
+    }
+
+    # Récupérer les avis (si disponibles)
+    app_reviews = []
+    for review in app_data.get("reviews", []):
+        app_reviews.append({
+            "content": review.get("content", ""),
+            "score": review.get("rating", review.get("score", 0))
+        })
+
+    # Statistiques des avis (une seule passe sur les notes) et avis négatifs;
+    # NumPy/pandas ne sont chargés qu'à la première fiche, pas à l'import du client
+    import numpy as np
+    from .store import NOTE_NEGATIVE_MAX, histogramme_notes, notes_int8
+
+    notes = notes_int8(r["score"] for r in app_reviews)
+    avis_stats = histogramme_notes(notes)
+    avis_negatifs = [app_reviews[i] for i in np.flatnonzero(notes <= NOTE_NEGATIVE_MAX)]
+
+    return details, app_reviews, avis_stats, avis_negatifs
+
+
+def parse_reviews_page(data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Extrait (avis, jeton de la page suivante) d'une page d'avis google_play_product"""
+    reviews = [
+        {
+            "id": review.get("id", ""),
+            "content": review.get("snippet", review.get("content", "")),
+            "score": review.get("rating", review.get("score", 0)),
+            "at": review.get("iso_date", review.get("date", "")),
+            "likes": review.get("likes", 0)
+        }
+        for review in data.get("reviews", [])
+    ]
+    return reviews, data.get("serpapi_pagination", {}).get("next_page_token")
+
+
+class SerpApiClient:
+    """Point d'accès unique à SerpApi: cache persistant → fusion → quota → débit → réessais → HTTP
+
+    Seuls les appels réels à l'API consomment du quota; `get` lève QuotaExceeded
+    si la session n'a plus de quota, et les erreurs HTTP après épuisement des réessais.
+    Les appels identiques simultanés (mêmes paramètres normalisés) partagent un seul
+    appel réel, payé par la session qui l'a lancé (`flights.stats()`).
+
+    Avec une cassette en enregistrement, chaque échange réel y est ajouté, ainsi que
+    chaque réponse servie par le cache (la relecture ne dépend pas de son état); en
+    relecture, `get` et `fetch` la servent directement (ni réseau, ni cache, ni quota).
+    Si le quota est épuisé, `get` se rabat sur le Play Store (`fallback`, sans quota
+    ni cache) quand config.play_fallback est actif; `suivi_secours` indique quels
+    appels d'un bloc en ont dépendu.
+    Chaque étape alimente les métriques du processus (engine.metrics).
+    """
+
+    def __init__(self, config: EngineConfig):
+        self.config = config
+        self.http = HttpClient(timeout=(5.0, config.timeout))
+        self.cache = SQLiteCache(
+            config.cache_path,
+            default_ttl=3600,
+            ttls=config.cache_ttls,
+            max_bytes=int(config.cache_max_mb * 1024 * 1024)
+        )
+        self.governor = QuotaGovernor(
+            config.quota_path,
+            capacity=config.quota_capacity,
+            refill_per_hour=config.quota_per_hour,
+            session_min_share=config.quota_session_min
+        )
+        self.limiter = TokenBucket(rate=config.rate, capacity=config.burst)
+        self.scheduler = RetryScheduler(max_workers=config.retry_workers)
+        self.flights = SingleFlight()
+        self.cassette = open_cassette(config.cassette_path, config.cassette_mode)
+        self.fallback = PlayFallback(self.scheduler, rate=config.play_rate) if config.play_fallback else None
+        self._local = threading.local()
+
+    @property
+    def replaying(self) -> bool:
+        """Vrai si les réponses viennent de la cassette (aucun appel réseau)"""
+        return self.cassette is not None and self.cassette.mode == "replay"
+
+    @property
+    def recording(self) -> bool:
+        """Vrai si chaque réponse, de l'API ou du cache, est ajoutée à la cassette"""
+        return self.cassette is not None and self.cassette.mode == "record"
+
+    def fetch(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Appel HTTP brut à SerpApi (sans cache, quota ni réessais), lève en cas d'erreur"""
+        if self.replaying:
+            response = self.cassette.play(params)
+        else:
+            with metrics.REQUETES.time(engine=params.get("engine", ""), status="erreur") as labels:
+                response = self.http.get(self.config.serpapi_url, params={**params, "api_key": self.config.api_key})
+                labels["status"] = response.status_code
+            metrics.TAILLES.observe(len(response.content), engine=labels["engine"])
+            if self.cassette is not None:
+                self.cassette.record(params, response)
+        response.raise_for_status()  # Lève une exception si la réponse contient une erreur HTTP
+        return response.json()
+
+    def _fetch_limited(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.limiter.acquire()
+        return self.fetch(params)
+
+    @staticmethod
+    def _compter_reessais(on_retry: Optional[Callable[..., None]]) -> Callable[..., None]:
+        def compter(attempt: int, retry_class: str, delay: float, exc: BaseException) -> None:
+            metrics.REESSAIS.inc(retry_class=retry_class)
+            if on_retry is not None:
+                on_retry(attempt, retry_class, delay, exc)
+        return compter
+
+    def call(self, params: Dict[str, Any], on_retry: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """Appel limité en débit, avec réessais, dans le thread courant"""
+        return self.scheduler.call(SERPAPI_HOST, self._fetch_limited, params, on_retry=self._compter_reessais(on_retry))
+
+    def submit(self, params: Dict[str, Any]) -> Tuple["Future[Any]", Dict[str, str]]:
+        """Appel limité en débit, avec réessais, dans le pool du planificateur
+
+        Retourne le Future et le dictionnaire où le worker décrit la tentative en cours.
+        """
+        evenements: Dict[str, str] = {}
+
+        def on_retry(attempt: int, retry_class: str, delay: float, exc: BaseException) -> None:
+            evenements["message"] = f"⏳ Nouvelle tentative ({retry_class}, essai {attempt + 1}) dans {delay:.1f} s: {exc}"
+
+        future = self.scheduler.submit(SERPAPI_HOST, self._fetch_limited, params, on_retry=self._compter_reessais(on_retry))
+        return future, evenements
+
+    def get(self, params: Dict[str, Any], session_id: str = BATCH_SESSION, wait: Optional[Waiter] = None) -> Dict[str, Any]:
+        """Réponse depuis le cache persistant, sinon depuis l'API (puis mise en cache)
+
+        Avec `wait`, l'appel et ses réessais s'exécutent dans le pool du
+        planificateur et `wait(future, evenements)` en attend le résultat.
+        """
+        engine, key = normalize_params(params)
+        with metrics.APPELS.time(engine=engine, source="replay" if self.replaying else "cache") as labels:
+            try:
+                if self.replaying:
+                    return self.fetch(params)
+                data = self.cached(params)
+                if data is None:
+                    # Appel partagé tant que ce thread n'est pas celui qui interroge l'API
+                    labels["source"] = "partage"
+
+                    def amont() -> Dict[str, Any]:
+                        labels["source"] = "api"
+                        return self._get_upstream(params, session_id, wait)
+                    # Un quota épuisé est propre à la session qui a lancé l'appel: les autres retentent avec le leur
+                    try:
+                        data = self.flights.do(key, amont, engine, (QuotaExceeded,))
+                    except QuotaExceeded:
+                        if self.fallback is None:
+                            raise
+                        labels["source"] = "play"
+                        data = self.fallback.get(params)
+                        secours = getattr(self._local, "secours", None)
+                        if secours is not None:
+                            secours.append(engine)
+                return data
+            except Exception as e:
+                metrics.ERREURS.inc(engine=engine, error=type(e).__name__)
+                raise
+
+    @contextmanager
+    def suivi_secours(self) -> Iterator[List[str]]:
+        """Moteurs dont une réponse est venue du Play Store pendant le bloc (thread courant)
+
+        Un résultat qui en dépend n'est pas définitif: il ne doit pas être enregistré
+        comme un élément terminé (point de reprise, instantanés).
+        """
+        englobant = getattr(self._local, "secours", None)
+        self._local.secours = secours = []
+        try:
+            yield secours
+        finally:
+            if englobant is not None:
+                englobant.extend(secours)
+            self._local.secours = englobant
+
+    def cached(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Réponse du cache persistant ou None (lecture comptée et chronométrée)"""
+        engine = params.get("engine", "")
+        with metrics.CACHE.time(engine=engine, result="miss") as labels:
+            data = self.cache.get(params)
+            if data is not None:
+                labels["result"] = "hit"
+        if data is not None and self.recording:
+            self.cassette.record_data(params, data)
+        return data
+
+    def acquire_quota(self, session_id: str, operation: str) -> None:
+        """Réserve le quota d'un appel réel (attente bornée par config.quota_wait), lève QuotaExceeded"""
+        debut = time.perf_counter()
+        try:
+            self.governor.acquire(session_id, operation, timeout=self.config.quota_wait)
+        except QuotaExceeded:
+            metrics.QUOTA.observe(time.perf_counter() - debut, operation=operation, result="refuse")
+            raise
+        metrics.QUOTA.observe(time.perf_counter() - debut, operation=operation, result="ok")
+        metrics.UNITES.inc(self.governor.cost_of(operation), operation=operation)
+
+    def refund_quota(self, session_id: str, operation: str) -> None:
+        """Rend le quota réservé par acquire_quota pour un appel finalement inutile ou échoué"""
+        self.governor.refund(session_id, operation)
+        metrics.RENDUES.inc(self.governor.cost_of(operation), operation=operation)
+
+    def _get_upstream(self, params: Dict[str, Any], session_id: str, wait: Optional[Waiter]) -> Dict[str, Any]:
+        # Un appel identique a pu se terminer entre la lecture du cache et l'ouverture du vol
+        data = self.cache.get(params, count=False)
+        if data is not None:
+            if self.recording:
+                self.cassette.record_data(params, data)
+            return data
+        operation = operation_for(params)
+        self.acquire_quota(session_id, operation)
+        try:
+            if wait is None:
+                data = self.call(params)
+            else:
+                data = wait(*self.submit(params))
+        except Exception:
+            # Disjoncteur ouvert, réessais épuisés, Retry-After trop long: aucune réponse payée
+            self.refund_quota(session_id, operation)
+            raise
+        self.cache.set(params, data)
+        return data
+
+    def suggestions(self, query: str, lang: str = "fr", country: str = "fr", session_id: str = BATCH_SESSION) -> List[str]:
+        """Suggestions Google Autocomplete pour une requête"""
+        return parse_suggestions(self.get(suggestions_params(query, lang, country), session_id))
+
+    def search_apps(self, query: str, lang: str = "fr", country: str = "fr", limit: int = 5,
+                    session_id: str = BATCH_SESSION) -> List[Dict[str, Any]]:
+        """Applications du Play Store correspondant à une requête"""
+        data = self.get(search_params(query, lang, country), session_id)
+        results, source = parse_search_apps(data, limit)
+        if source is None:
+            logger.debug("Aucun résultat pour %r, clés de la réponse: %s", query, list(data.keys()))
+        return results
+
+    def reviews_page(self, app_id: str, lang: str = "fr", country: str = "fr", num: int = 100,
+                     token: Optional[str] = None, session_id: str = BATCH_SESSION) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Une page d'avis et le jeton de la page suivante"""
+        return parse_reviews_page(self.get(reviews_params(app_id, lang, country, num, token), session_id))
+
+    def iter_reviews(self, app_id: str, lang: str = "fr", country: str = "fr", batch_size: int = 100,
+                     max_reviews: Optional[int] = None, since: Optional[datetime] = None,
+                     token: Optional[str] = None, session_id: str = BATCH_SESSION) -> Iterator[ReviewBatch]:
+        """Avis d'une application par lots de `batch_size` (une page, au plus 199), du plus récent au plus ancien
+
+        Chaque lot porte le jeton à passer en `token` pour reprendre après lui;
+        chaque page consomme du quota sauf si elle est déjà en cache.
+        """
+        def page(jeton: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+            return self.reviews_page(app_id, lang, country, batch_size, jeton, session_id)
+        return iter_review_batches(page, token, max_reviews, since)
+
+    def app_details(self, app_id: str, lang: str = "fr", country: str = "fr", session_id: str = BATCH_SESSION):
+        """Détails et avis d'une application: (détails, avis, statistiques, avis négatifs)"""
+        data = self.get(details_params(app_id, lang, country), session_id)
+        resultat = parse_app_details(data)
+        if resultat[0] is None:
+            logger.debug("Aucune fiche pour %s, clés de la réponse: %s", app_id, list(data.keys()))
+        return resultat
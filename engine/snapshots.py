@@ -0,0 +1,372 @@
+"""
+Historique des analyses: instantanés datés des concurrents de chaque mot-clé et des fiches d'applications
+
+La dernière version de chaque entrée est conservée en entier, les précédentes sous forme
+de deltas inverses compressés (de quoi revenir de la version suivante à celle-ci): un
+portefeuille réanalysé chaque semaine ne grossit que de ce qui a réellement changé.
+`rafraichir` ne refait que les appels nécessaires: mots-clés dont l'instantané est périmé,
+fiches des applications nouvelles, modifiées dans les résultats de recherche ou périmées.
+"""
+import hashlib
+import json
+import logging
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import pandas as pd
+
+from scrapers.quota import COSTS
+from scrapers.sqlite_utils import ThreadLocalConnection
+
+from .analysis import classer_potentiel_marches, iter_concurrence, iter_details_concurrents
+from .export import ExportWriter
+from .serpapi import BATCH_SESSION, SerpApiClient
+from .store import histogramme_notes, notes_int8
+
+logger = logging.getLogger(__name__)
+
+# Types d'entrées: concurrents d'un mot-clé, fiche d'une application
+CONCURRENCE = "concurrence"
+DETAILS = "details"
+
+JOUR = 86400
+
+# Champs d'un résultat de recherche dont le changement rend la fiche de l'application à revoir
+SIGNATURE_RECHERCHE = ("title", "developer", "score", "installs", "price", "updated")
+
+# Colonnes de la table concurrence exportée
+COLONNES_CONCURRENCE = ["keyword", "app_id", "title", "developer", "score", "installs", "price", "free"]
+
+# Taille des lots de clés lus en une requête (limite des paramètres SQLite)
+LOT_LECTURE = 500
+
+
+def _canonique(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def difference(source: Any, cible: Any) -> Optional[Dict[str, Any]]:
+    """Delta qui transforme `source` en `cible` (None s'ils sont égaux)
+
+    Les dictionnaires sont comparés clé par clé ("+" ajoutées, "-" supprimées,
+    "~" modifiées); toute autre valeur modifiée est remplacée en entier ("=").
+    """
+    if source == cible:
+        return None
+    if not (isinstance(source, dict) and isinstance(cible, dict)):
+        return {"=": cible}
+    delta: Dict[str, Any] = {}
+    ajoutees = {cle: valeur for cle, valeur in cible.items() if cle not in source}
+    supprimees = [cle for cle in source if cle not in cible]
+    modifiees = {}
+    for cle in source.keys() & cible.keys():
+        d = difference(source[cle], cible[cle])
+        if d is not None:
+            modifiees[cle] = d
+    if ajoutees:
+        delta["+"] = ajoutees
+    if supprimees:
+        delta["-"] = supprimees
+    if modifiees:
+        delta["~"] = modifiees
+    return delta
+
+
+def appliquer(source: Any, delta: Optional[Dict[str, Any]]) -> Any:
+    """Applique un delta produit par `difference`"""
+    if delta is None:
+        return source
+    if "=" in delta:
+        return delta["="]
+    resultat = dict(source)
+    for cle in delta.get("-", ()):
+        resultat.pop(cle, None)
+    resultat.update(delta.get("+", {}))
+    for cle, d in delta.get("~", {}).items():
+        resultat[cle] = appliquer(resultat[cle], d)
+    return resultat
+
+
+class Instantane(NamedTuple):
+    """Une version d'une entrée: données, numéro, date de récupération, dernière vérification
+    et nombre de vérifications consécutives sans changement"""
+    data: Any
+    version: int
+    fetched_at: float
+    checked_at: float
+    stable: int
+
+
+class SnapshotStore:
+    """Instantanés versionnés des concurrents et des fiches (SQLite)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = ThreadLocalConnection(path)
+        conn = self._db.get()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS entrees (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                empreinte TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                checked_at REAL NOT NULL,
+                stable INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (kind, key)
+            )"""
+        )
+        # Delta (zlib) qui ramène de la version suivante à celle-ci
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS versions (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                delta BLOB NOT NULL,
+                PRIMARY KEY (kind, key, version)
+            )"""
+        )
+
+    def dernier(self, kind: str, key: str) -> Optional[Instantane]:
+        """Dernière version d'une entrée, ou None"""
+        return self.derniers(kind, [key]).get(key)
+
+    def derniers(self, kind: str, keys: Iterable[str]) -> Dict[str, Instantane]:
+        """Dernières versions des entrées connues parmi `keys`"""
+        keys = list(dict.fromkeys(keys))
+        conn = self._db.get()
+        resultat = {}
+        for debut in range(0, len(keys), LOT_LECTURE):
+            lot = keys[debut:debut + LOT_LECTURE]
+            rows = conn.execute(
+                f"SELECT key, data, version, fetched_at, checked_at, stable FROM entrees "
+                f"WHERE kind = ? AND key IN ({','.join('?' * len(lot))})",
+                (kind, *lot),
+            )
+            for key, data, version, fetched_at, checked_at, stable in rows:
+                resultat[key] = Instantane(json.loads(data), version, fetched_at, checked_at, stable)
+        return resultat
+
+    def enregistrer(self, kind: str, key: str, data: Any, maintenant: Optional[float] = None) -> bool:
+        """Enregistre le résultat d'une récupération; retourne True s'il crée une nouvelle version
+
+        Un résultat identique à la dernière version ne fait que dater la vérification.
+        """
+        maintenant = time.time() if maintenant is None else maintenant
+        texte = _canonique(data)
+        empreinte = hashlib.sha1(texte.encode("utf-8")).hexdigest()
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT version, empreinte, data, fetched_at FROM entrees WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO entrees(kind, key, version, empreinte, data, fetched_at, checked_at, stable) "
+                    "VALUES (?, ?, 1, ?, ?, ?, ?, 0)",
+                    (kind, key, empreinte, texte, maintenant, maintenant),
+                )
+                return True
+            version, ancienne_empreinte, ancien, fetched_at = row
+            if empreinte == ancienne_empreinte:
+                conn.execute(
+                    "UPDATE entrees SET checked_at = ?, stable = stable + 1 WHERE kind = ? AND key = ?",
+                    (maintenant, kind, key),
+                )
+                return False
+            delta = difference(json.loads(texte), json.loads(ancien))
+            conn.execute(
+                "INSERT INTO versions(kind, key, version, fetched_at, delta) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, version, fetched_at, zlib.compress(_canonique(delta).encode("utf-8"))),
+            )
+            conn.execute(
+                "UPDATE entrees SET version = ?, empreinte = ?, data = ?, fetched_at = ?, checked_at = ?, stable = 0 "
+                "WHERE kind = ? AND key = ?",
+                (version + 1, empreinte, texte, maintenant, maintenant, kind, key),
+            )
+            return True
+
+    def historique(self, kind: str, key: str) -> List[Instantane]:
+        """Toutes les versions d'une entrée, de la plus récente à la plus ancienne"""
+        courant = self.dernier(kind, key)
+        if courant is None:
+            return []
+        versions = [courant]
+        rows = self._db.get().execute(
+            "SELECT version, fetched_at, delta FROM versions WHERE kind = ? AND key = ? ORDER BY version DESC",
+            (kind, key),
+        )
+        data = courant.data
+        for version, fetched_at, delta in rows:
+            data = appliquer(data, json.loads(zlib.decompress(delta)))
+            # Une version remplacée a été vérifiée pour la dernière fois juste avant la suivante
+            versions.append(Instantane(data, version, fetched_at, versions[-1].fetched_at, 0))
+        return versions
+
+    def concurrence_dataframe(self, keywords: Iterable[str]) -> pd.DataFrame:
+        """Concurrents enregistrés des mots-clés, au format long de l'export (keyword, app_id, …)"""
+        instantanes = self.derniers(CONCURRENCE, keywords)
+        lignes = [
+            {"keyword": keyword, "app_id": app_id, **inst.data["apps"][app_id]}
+            for keyword, inst in instantanes.items()
+            for app_id in inst.data["ordre"]
+        ]
+        return pd.DataFrame(lignes, columns=COLONNES_CONCURRENCE)
+
+    def details_dataframe(self, app_ids: Iterable[str]) -> pd.DataFrame:
+        """Fiches enregistrées des applications (avec les statistiques d'avis), une ligne par application"""
+        return pd.DataFrame([{"app_id": app_id, **inst.data} for app_id, inst in self.derniers(DETAILS, app_ids).items()])
+
+    def stats(self) -> Dict[str, Any]:
+        """Entrées et versions par type, taille des dernières versions et des deltas (octets)"""
+        conn = self._db.get()
+        stats: Dict[str, Any] = {}
+        for kind, entrees, octets in conn.execute("SELECT kind, COUNT(*), SUM(LENGTH(data)) FROM entrees GROUP BY kind"):
+            stats[kind] = {"entrees": entrees, "versions": entrees, "octets_derniers": octets, "octets_deltas": 0}
+        for kind, versions, octets in conn.execute("SELECT kind, COUNT(*), SUM(LENGTH(delta)) FROM versions GROUP BY kind"):
+            stats[kind]["versions"] += versions
+            stats[kind]["octets_deltas"] = octets
+        return stats
+
+
+class PolitiqueFraicheur:
+    """Âge maximal de chaque type d'instantané avant de le récupérer à nouveau
+
+    Une entrée vérifiée sans changement voit son âge maximal multiplié par `facteur`
+    à chaque vérification, jusqu'à `plafond` fois l'âge de base: les marchés figés
+    sont revus de plus en plus rarement, ceux qui bougent à chaque passage.
+    """
+
+    def __init__(self, concurrence: float = 6 * JOUR, details: float = 27 * JOUR,
+                 facteur: float = 2.0, plafond: float = 4.0):
+        # Un peu moins d'une semaine et d'un mois: une réanalyse hebdomadaire ou mensuelle
+        # lancée un peu plus tôt que la précédente revoit quand même ce qui doit l'être
+        self.ages = {CONCURRENCE: concurrence, DETAILS: details}
+        self.facteur = facteur
+        self.plafond = plafond
+
+    def age_max(self, kind: str, instantane: Instantane) -> float:
+        return self.ages[kind] * min(self.facteur ** instantane.stable, self.plafond)
+
+    def perime(self, kind: str, instantane: Optional[Instantane], maintenant: Optional[float] = None) -> bool:
+        if instantane is None:
+            return True
+        maintenant = time.time() if maintenant is None else maintenant
+        return maintenant - instantane.checked_at >= self.age_max(kind, instantane)
+
+
+def _instantane_concurrence(concurrence_df: pd.DataFrame) -> Dict[str, Any]:
+    """Concurrents d'un mot-clé indexés par application: un changement de rang ou de note reste un petit delta"""
+    apps = json.loads(concurrence_df.to_json(orient="records", force_ascii=False))
+    ordre = [app.pop("app_id") for app in apps]
+    return {"ordre": ordre, "apps": dict(zip(ordre, apps))}
+
+
+def _signature(app: Dict[str, Any]) -> Dict[str, Any]:
+    return {champ: app[champ] for champ in SIGNATURE_RECHERCHE if champ in app}
+
+
+def rafraichir(
+    client: SerpApiClient,
+    store: SnapshotStore,
+    keywords: Iterable[str],
+    politique: Optional[PolitiqueFraicheur] = None,
+    limit: int = 5,
+    details_per_keyword: int = 3,
+    max_workers: int = 8,
+    lang: str = "fr",
+    country: str = "fr",
+    session_id: str = BATCH_SESSION,
+    maintenant: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Met à jour les instantanés d'un portefeuille de mots-clés en ne refaisant que les appels nécessaires
+
+    Les concurrents d'un mot-clé sont récupérés si leur instantané est périmé; la fiche d'une
+    des `details_per_keyword` premières applications l'est si elle est absente ou périmée, ou
+    si l'application a changé dans les résultats de recherche (note, installations, prix,
+    date de mise à jour…). Une réponse du Play Store (secours, quota épuisé) ne remplace pas
+    un instantané: l'élément reste périmé et sera revu au prochain rafraîchissement.
+    Retourne le bilan: éléments récupérés, repris, modifiés, obtenus du Play Store, erreurs
+    et unités de quota estimées, comparées à celles d'une analyse complète.
+    """
+    politique = politique or PolitiqueFraicheur()
+    maintenant = time.time() if maintenant is None else maintenant
+    keywords = [k for k in dict.fromkeys(keywords) if k.strip()]
+    bilan: Dict[str, Any] = {
+        "mots_cles": len(keywords), "mots_cles_recuperes": 0, "mots_cles_modifies": 0,
+        "apps": 0, "apps_recuperees": 0, "apps_modifiees": 0, "secours": 0, "erreurs": [],
+    }
+
+    # 1. Concurrents des mots-clés périmés; les applications qui ont changé depuis l'instantané précédent
+    anciens = store.derniers(CONCURRENCE, keywords)
+    perimes = [k for k in keywords if politique.perime(CONCURRENCE, anciens.get(k), maintenant)]
+    modifiees = set()
+    for progression in iter_concurrence(client, perimes, limit, max_workers, lang, country, session_id):
+        keyword = progression.item
+        if progression.error is not None:
+            logger.warning("Concurrence de %r non rafraîchie: %s", keyword, progression.error)
+            bilan["erreurs"].append((CONCURRENCE, keyword, str(progression.error)))
+            continue
+        if progression.source == "play":
+            bilan["secours"] += 1
+            continue
+        bilan["mots_cles_recuperes"] += 1
+        instantane = _instantane_concurrence(progression.result)
+        ancien = anciens.get(keyword)
+        if store.enregistrer(CONCURRENCE, keyword, instantane, maintenant):
+            bilan["mots_cles_modifies"] += 1
+            precedentes = ancien.data["apps"] if ancien else {}
+            modifiees.update(
+                app_id for app_id, app in instantane["apps"].items()
+                if app_id not in precedentes or _signature(app) != _signature(precedentes[app_id])
+            )
+
+    # 2. Fiches des premières applications de chaque mot-clé, si elles sont à revoir
+    courants = store.derniers(CONCURRENCE, keywords)
+    app_ids = list(dict.fromkeys(
+        app_id for keyword in keywords if keyword in courants
+        for app_id in courants[keyword].data["ordre"][:details_per_keyword]
+    ))
+    fiches = store.derniers(DETAILS, app_ids)
+    a_revoir = [
+        app_id for app_id in app_ids
+        if app_id in modifiees or politique.perime(DETAILS, fiches.get(app_id), maintenant)
+    ]
+    bilan["apps"] = len(app_ids)
+    for progression in iter_details_concurrents(client, a_revoir, 0, max_workers, lang, country, session_id):
+        app_id = progression.item
+        details = progression.result[0] if progression.error is None else None
+        if details is None:
+            erreur = progression.error or "fiche introuvable"
+            logger.warning("Fiche de %s non rafraîchie: %s", app_id, erreur)
+            bilan["erreurs"].append((DETAILS, app_id, str(erreur)))
+            continue
+        if progression.source == "play":
+            bilan["secours"] += 1
+            continue
+        bilan["apps_recuperees"] += 1
+        avis_stats = histogramme_notes(notes_int8(r["score"] for r in progression.result[1]))
+        if store.enregistrer(DETAILS, app_id, {**details, **avis_stats}, maintenant):
+            bilan["apps_modifiees"] += 1
+
+    # Estimation haute: une réponse encore dans le cache du client ne coûte rien
+    bilan["unites"] = bilan["mots_cles_recuperes"] * COSTS["competition"] + bilan["apps_recuperees"] * COSTS["details"]
+    bilan["unites_analyse_complete"] = len(keywords) * COSTS["competition"] + len(app_ids) * COSTS["details"]
+    return bilan
+
+
+def exporter_instantanes(store: SnapshotStore, keywords: Iterable[str], writer: ExportWriter,
+                         details_per_keyword: int = 3) -> pd.DataFrame:
+    """Exporte la concurrence, les fiches et le classement par potentiel du portefeuille; retourne le classement"""
+    keywords = list(dict.fromkeys(keywords))
+    concurrence_df = store.concurrence_dataframe(keywords)
+    writer.write("concurrence", concurrence_df)
+    app_ids = concurrence_df.groupby("keyword", sort=False).head(details_per_keyword)["app_id"]
+    writer.write("details", store.details_dataframe(app_ids))
+    potentiel_df = classer_potentiel_marches(concurrence_df, keywords=keywords).sort_values(
+        ["score", "keyword"], ascending=[False, True], kind="stable"
+    ).reset_index(drop=True)
+    writer.write("potentiel", potentiel_df)
+    return potentiel_df
@@ -0,0 +1,298 @@
+"""
+Serveur local qui se substitue à SerpApi, pour les tests de bout en bout et les mesures de performance
+
+    python -m engine.standin --port 8765 --latency-ms 80 --error-rate 0.02 --throttle-rate 0.05
+    SERPAPI_URL=http://127.0.0.1:8765/search.json streamlit run app.py
+
+Il répond aux moteurs `google_autocomplete`, `google_play` (recherche et fiche)
+et `google_play_product` (pages d'avis) avec des réponses de la même forme que
+celles lues par engine.serpapi. Les réponses sont déterministes (dérivées de la
+graine et des paramètres): deux exécutions comparent le même travail. La latence,
+le taux d'erreurs 5xx et le comportement 429 (aléatoire ou au-delà d'un débit
+maximal, avec Retry-After) sont configurables; aucun quota réel n'est consommé.
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+MOTS = (
+    "budget", "fitness", "meditation", "yoga", "recettes", "sommeil", "habitudes", "notes",
+    "langues", "jardin", "course", "velo", "photo", "musique", "voyage", "finances",
+)
+GENRES = ("Santé et remise en forme", "Productivité", "Éducation", "Finance", "Style de vie", "Musique et audio")
+INSTALLS = ("1 000+", "10 000+", "100 000+", "1 000 000+", "10 000 000+")
+AVIS_POSITIFS = ("Super application, très utile", "Simple et efficace", "Exactement ce qu'il me fallait")
+AVIS_NEGATIFS = (
+    "Trop de publicités, inutilisable", "L'application plante au démarrage",
+    "Abonnement beaucoup trop cher", "Synchronisation perdue après la mise à jour",
+)
+
+
+def _rng(*parts: Any) -> random.Random:
+    """Générateur pseudo-aléatoire stable pour des paramètres donnés (indépendant de PYTHONHASHSEED)"""
+    graine = hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(graine[:8], "big"))
+
+
+def _app_id(mot: str, n: int) -> str:
+    return f"com.{mot.replace(' ', '')}.app{n}"
+
+
+def _avis(rng: random.Random) -> Tuple[str, int]:
+    note = rng.choices((1, 2, 3, 4, 5), weights=(3, 1, 1, 2, 4))[0]
+    return rng.choice(AVIS_NEGATIFS if note <= 3 else AVIS_POSITIFS), note
+
+
+def payload_suggestions(q: str, seed: int) -> Dict[str, Any]:
+    rng = _rng(seed, "autocomplete", q)
+    mots = rng.sample(MOTS, 8)
+    return {"suggestions": [{"value": f"{q} {mot}"} for mot in mots if mot not in q.split()]}
+
+
+def payload_recherche(q: str, seed: int, n: int = 10) -> Dict[str, Any]:
+    # Les identifiants dérivent des mots de la requête: des mots-clés proches partagent des concurrents
+    mots = q.split() or ["app"]
+    resultats = []
+    for i in range(n):
+        rng = _rng(seed, "search", q, i)
+        app_id = _app_id(rng.choice(mots), rng.randrange(12))
+        resultats.append({
+            "id": app_id,
+            "title": app_id.split(".", 1)[1].replace(".", " ").title(),
+            "developer": f"Studio {rng.randrange(40)}",
+            "rating": round(rng.uniform(2.5, 4.9), 1),
+            "downloads": rng.choice(INSTALLS),
+            "price_text": "Gratuit" if rng.random() < 0.8 else f"{rng.choice((0.99, 2.99, 4.99))} €",
+        })
+    return {"organic_results": list({r["id"]: r for r in resultats}.values())}
+
+
+def payload_fiche(app_id: str, seed: int) -> Dict[str, Any]:
+    rng = _rng(seed, "details", app_id)
+    avis = [_avis(rng) for _ in range(rng.randrange(20, 40))]
+    return {"app_results": {
+        "title": app_id.split(".", 1)[1].replace(".", " ").title(),
+        "description": f"Application {app_id}. " * rng.randrange(5, 30),
+        "genre": rng.choice(GENRES),
+        "thumbnail": f"https://example.invalid/{app_id}.png",
+        "developer": f"Studio {rng.randrange(40)}",
+        "installs": rng.choice(INSTALLS),
+        "updated": f"{rng.randrange(1, 29)}/{rng.randrange(1, 13)}/2025",
+        "reviews": [{"content": texte, "rating": note} for texte, note in avis],
+    }}
+
+
+def payload_avis(app_id: str, seed: int, num: int, token: Optional[str]) -> Dict[str, Any]:
+    total = _rng(seed, "total", app_id).randrange(50, 600)
+    debut = int(token) if token and token.isdigit() else 0
+    fin = min(total, debut + max(1, num))
+    avis = []
+    for i in range(debut, fin):
+        rng = _rng(seed, "review", app_id, i)
+        texte, note = _avis(rng)
+        # Du plus récent au plus ancien, environ un avis par jour
+        avis.append({
+            "id": f"{app_id}:{i}",
+            "snippet": texte,
+            "rating": note,
+            "iso_date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1767225600 - i * 86400)),
+            "likes": rng.randrange(0, 50),
+        })
+    data: Dict[str, Any] = {"reviews": avis}
+    if fin < total:
+        data["serpapi_pagination"] = {"next_page_token": str(fin)}
+    return data
+
+
+def payload(params: Dict[str, str], seed: int = 0) -> Tuple[int, Dict[str, Any]]:
+    """(statut HTTP, corps JSON) de la réponse à une requête /search.json"""
+    engine = params.get("engine")
+    if engine == "google_autocomplete" and params.get("q"):
+        return 200, payload_suggestions(params["q"], seed)
+    if engine == "google_play" and params.get("id"):
+        return 200, payload_fiche(params["id"], seed)
+    if engine == "google_play" and params.get("q"):
+        return 200, payload_recherche(params["q"], seed)
+    if engine == "google_play_product" and params.get("product_id"):
+        return 200, payload_avis(params["product_id"], seed, int(params.get("num") or 100), params.get("next_page_token"))
+    return 400, {"error": f"Paramètres non pris en charge: {sorted(params)}"}
+
+
+class SerpApiStandin:
+    """Serveur HTTP local (un thread par requête) qui imite SerpApi
+
+    `latency_ms` ± `jitter_ms` est ajouté à chaque réponse; `error_rate` des requêtes
+    reçoivent un 503 et `throttle_rate` un 429 avec Retry-After. Avec `max_rps`,
+    les requêtes au-delà de ce débit reçoivent aussi un 429, comme un vrai fournisseur.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        max_rps: float = 0,
+        retry_after: float = 1,
+        seed: int = 0,
+    ):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._jetons = max(1.0, max_rps)
+        self._dernier = time.monotonic()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Point d'accès à passer en EngineConfig.serpapi_url"""
+        return f"http://{self.host}:{self.port}/search.json"
+
+    def _tirage(self) -> Tuple[float, float]:
+        with self._lock:
+            return self._rng.random(), self._rng.uniform(-1, 1)
+
+    def _limite_atteinte(self) -> bool:
+        """Seau à jetons du débit maximal: vrai si la requête dépasse `max_rps`"""
+        if self.max_rps <= 0:
+            return False
+        with self._lock:
+            maintenant = time.monotonic()
+            self._jetons = min(max(1.0, self.max_rps), self._jetons + (maintenant - self._dernier) * self.max_rps)
+            self._dernier = maintenant
+            if self._jetons < 1:
+                return True
+            self._jetons -= 1
+            return False
+
+    def _compter(self, engine: str, statut: int, octets: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(engine, {"requetes": 0, "octets": 0})
+            stats["requetes"] += 1
+            stats["octets"] += octets
+            stats[str(statut)] = stats.get(str(statut), 0) + 1
+
+    def repondre(self, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """(statut, en-têtes, corps) pour une requête, latence simulée comprise"""
+        tirage, jitter = self._tirage()
+        delai = max(0.0, self.latency_ms + jitter * self.jitter_ms) / 1000
+        if delai:
+            time.sleep(delai)
+        en_tetes = {"Content-Type": "application/json"}
+        if tirage < self.error_rate:
+            statut, corps = 503, {"error": "Service temporairement indisponible"}
+        elif tirage < self.error_rate + self.throttle_rate or self._limite_atteinte():
+            statut, corps = 429, {"error": "Trop de requêtes"}
+            en_tetes["Retry-After"] = f"{self.retry_after:g}"
+        else:
+            statut, corps = payload(params, self.seed)
+        brut = json.dumps(corps, ensure_ascii=False).encode("utf-8")
+        self._compter(params.get("engine", "?"), statut, len(brut))
+        return statut, en_tetes, brut
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Requêtes, octets envoyés et nombre de réponses par statut, par moteur"""
+        with self._lock:
+            return {engine: dict(stats) for engine, stats in self._stats.items()}
+
+    def start(self) -> "SerpApiStandin":
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Connexions persistantes, comme avec requests.Session
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path == "/stats":
+                    statut, en_tetes, corps = 200, {"Content-Type": "application/json"}, json.dumps(standin.stats()).encode()
+                else:
+                    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                    statut, en_tetes, corps = standin.repondre(params)
+                self.send_response(statut)
+                for nom, valeur in en_tetes.items():
+                    self.send_header(nom, valeur)
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="serpapi-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "SerpApiStandin":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options du serveur, partagées avec engine.bench"""
+    parser.add_argument("--latency-ms", type=float, default=80, help="Latence ajoutée à chaque réponse (défaut: 80 ms)")
+    parser.add_argument("--jitter-ms", type=float, default=30, help="Variation uniforme de la latence (défaut: ±30 ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Part des requêtes en erreur 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Part des requêtes refusées en 429")
+    parser.add_argument("--max-rps", type=float, default=0, help="Débit au-delà duquel le serveur répond 429 (0: illimité)")
+    parser.add_argument("--retry-after", type=float, default=1, help="Valeur de Retry-After des 429 (secondes)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des réponses et des erreurs simulées")
+
+
+def from_arguments(args: argparse.Namespace, host: str = "127.0.0.1", port: int = 0) -> SerpApiStandin:
+    return SerpApiStandin(
+        host, port, args.latency_ms, args.jitter_ms, args.error_rate,
+        args.throttle_rate, args.max_rps, args.retry_after, args.seed,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m engine.standin", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    standin = from_arguments(args, args.host, args.port).start()
+    print(f"Serveur SerpApi local: {standin.url} (statistiques: http://{standin.host}:{standin.port}/stats)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
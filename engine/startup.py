@@ -0,0 +1,129 @@
+"""
+Rapport du coût de démarrage de l'interface: imports de premier affichage et durée d'une réexécution
+
+    python -m engine.startup app.py --budget-ms 150 --rerun
+
+Chaque mesure d'import se fait dans un interpréteur neuf (`python -X importtime`),
+après Streamlit lui-même: seul le coût ajouté par les imports de app.py est compté.
+Le code de sortie est 1 si le budget est dépassé ou si un module lourd (pandas,
+pyarrow…) est chargé avant le premier affichage, pour éviter les régressions.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Modules qui ne doivent être chargés qu'à la première analyse, pas au premier affichage
+MODULES_LOURDS = ("pandas", "pyarrow", "numpy", "scipy", "sklearn")
+
+# Déjà chargés par Streamlit: leur coût n'est pas imputable à l'application
+REFERENCE = ("streamlit",)
+
+
+def imports_premier_affichage(path: str) -> List[str]:
+    """Modules importés au niveau module d'un script (exécutés à chaque démarrage)"""
+    with open(path, encoding="utf-8") as f:
+        arbre = ast.parse(f.read(), path)
+    modules = []
+    for noeud in arbre.body:
+        if isinstance(noeud, ast.Import):
+            modules += [alias.name for alias in noeud.names]
+        elif isinstance(noeud, ast.ImportFrom) and noeud.module and not noeud.level:
+            modules.append(noeud.module)
+    return list(dict.fromkeys(m for m in modules if m.split(".")[0] not in REFERENCE))
+
+
+def _mesurer_une_fois(modules: List[str], cwd: str) -> Tuple[Dict[str, float], List[str]]:
+    code = "; ".join(
+        ["import sys, json"]
+        + [f"import {m}" for m in REFERENCE]
+        + [f"import {m}" for m in modules]
+        + [f"print(json.dumps([m for m in {list(MODULES_LOURDS)!r} if m in sys.modules]))"]
+    )
+    sortie = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    # "import time: self [us] | cumulative | module": les imports de premier niveau ne sont pas indentés
+    couts = {}
+    for ligne in sortie.stderr.splitlines():
+        if not ligne.startswith("import time:") or "|" not in ligne:
+            continue
+        _, cumul, nom = ligne.split("|")
+        if nom.startswith(" ") and not nom.startswith("  ") and cumul.strip().isdigit():
+            couts[nom.strip()] = int(cumul) / 1000
+    charges = json.loads(sortie.stdout.strip().splitlines()[-1])
+    return {m: couts.get(m, 0.0) for m in modules}, charges
+
+
+def mesurer_imports(modules: List[str], cwd: str = ".", repetitions: int = 3) -> Tuple[Dict[str, float], List[str]]:
+    """Coût médian (ms) de chaque import, ajouté à celui de Streamlit, et modules lourds chargés"""
+    mesures = [_mesurer_une_fois(modules, cwd) for _ in range(max(1, repetitions))]
+    couts = {m: statistics.median(mesure[0][m] for mesure in mesures) for m in modules}
+    return couts, mesures[-1][1]
+
+
+def mesurer_reexecution(path: str, repetitions: int = 5) -> Optional[Dict[str, float]]:
+    """Durée (ms) du premier affichage et médiane des réexécutions complètes du script (AppTest)
+
+    Utilise une clé factice et des fichiers de cache temporaires: aucun appel réseau n'est fait
+    tant qu'aucun bouton n'est cliqué. Retourne None si streamlit.testing n'est pas disponible.
+    """
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return None
+    with tempfile.TemporaryDirectory() as dossier:
+        app = AppTest.from_file(os.path.abspath(path), default_timeout=60)
+        app.secrets["SERPAPI_KEY"] = "demarrage"
+        for nom in ("SERPAPI_CACHE_PATH", "QUOTA_PATH", "SUGGESTIONS_INDEX_PATH"):
+            app.secrets[nom] = os.path.join(dossier, f"{nom.lower()}.sqlite3")
+        debut = time.perf_counter()
+        app.run()
+        premier = (time.perf_counter() - debut) * 1000
+        durees = []
+        for _ in range(max(1, repetitions)):
+            debut = time.perf_counter()
+            app.run()
+            durees.append((time.perf_counter() - debut) * 1000)
+    return {"premier_affichage": premier, "reexecution": statistics.median(durees)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m engine.startup", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("script", nargs="?", default="app.py", help="Script Streamlit (défaut: app.py)")
+    parser.add_argument("--budget-ms", type=float, default=150, help="Budget des imports de premier affichage (défaut: 150 ms)")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--rerun", action="store_true", help="Mesure aussi le premier affichage et une réexécution (AppTest)")
+    args = parser.parse_args(argv)
+
+    dossier = os.path.dirname(os.path.abspath(args.script))
+    modules = imports_premier_affichage(args.script)
+    couts, lourds = mesurer_imports(modules, dossier, args.repetitions)
+    total = sum(couts.values())
+
+    print(f"Imports de premier affichage de {args.script} (après {', '.join(REFERENCE)}):")
+    for module, cout in sorted(couts.items(), key=lambda item: -item[1]):
+        print(f"  {cout:8.1f} ms  {module}")
+    print(f"  {total:8.1f} ms  total (budget: {args.budget_ms:.0f} ms)")
+    if lourds:
+        print(f"Modules lourds chargés au démarrage: {', '.join(lourds)}")
+
+    if args.rerun:
+        durees = mesurer_reexecution(args.script)
+        if durees is None:
+            print("streamlit.testing indisponible: réexécution non mesurée")
+        else:
+            print(f"Premier affichage: {durees['premier_affichage']:.0f} ms, réexécution complète: {durees['reexecution']:.0f} ms")
+
+    return 1 if total > args.budget_ms or lourds else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
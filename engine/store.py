@@ -0,0 +1,162 @@
+"""
+Stockage en colonnes des applications et des avis (NumPy/pandas, persistance Parquet)
+
+Les notes sont des int8 et les identifiants des catégories: histogrammes, filtres
+et regroupements portent sur des tableaux contigus en une seule passe, pour
+toutes les applications à la fois.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+NOTES = (1, 2, 3, 4, 5)
+NOTE_NEGATIVE_MAX = 3
+
+REVIEW_COLUMNS = ["app_id", "score", "content", "at"]
+APP_COLUMNS = ["keyword", "app_id", "title", "developer", "score", "installs", "price", "free"]
+
+
+def notes_int8(values: Iterable[Any]) -> np.ndarray:
+    """Notes en int8 (0 pour une note absente ou illisible)"""
+    notes = pd.to_numeric(pd.Series(list(values), dtype=object), errors="coerce").fillna(0)
+    return notes.to_numpy().round().clip(0, 5).astype(np.int8)
+
+
+def histogramme_notes(notes: np.ndarray) -> Dict[str, int]:
+    """nb_avis_1 … nb_avis_5 en une passe (np.bincount)"""
+    comptes = np.bincount(np.asarray(notes, dtype=np.int64), minlength=6)
+    return {f"nb_avis_{note}": int(comptes[note]) for note in NOTES}
+
+
+def _avis_frame(app_ids: Any, reviews: List[Dict[str, Any]]) -> pd.DataFrame:
+    return pd.DataFrame({
+        "app_id": app_ids,
+        "score": notes_int8(r.get("score") for r in reviews),
+        "content": pd.Series([r.get("content", "") for r in reviews], dtype="string"),
+        "at": pd.to_datetime(pd.Series([r.get("at") for r in reviews], dtype=object), errors="coerce", utc=True, format="ISO8601"),
+    })
+
+
+def _normaliser_types(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame.astype({"app_id": "category", "score": np.int8, "content": "string"})
+    frame["app_id"] = frame["app_id"].cat.remove_unused_categories()
+    return frame
+
+
+class ReviewStore:
+    """Avis de plusieurs applications en colonnes: app_id (catégorie), score (int8), content, at"""
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None):
+        if frame is None:
+            frame = _avis_frame([], [])
+        self.frame = _normaliser_types(frame.reindex(columns=REVIEW_COLUMNS).reset_index(drop=True))
+
+    @classmethod
+    def from_reviews(cls, reviews_by_app: Dict[str, List[Dict[str, Any]]]) -> "ReviewStore":
+        """Construit le stockage à partir de {app_id: [avis]}"""
+        frames = [_avis_frame([app_id] * len(reviews), reviews) for app_id, reviews in reviews_by_app.items() if reviews]
+        return cls(pd.concat(frames, ignore_index=True) if frames else None)
+
+    def ajouter(self, app_id: str, reviews: List[Dict[str, Any]]) -> None:
+        """Remplace les avis d'une application"""
+        autres = self.frame[self.frame["app_id"] != app_id]
+        nouveau = _avis_frame([app_id] * len(reviews), reviews)
+        self.frame = _normaliser_types(pd.concat([autres.astype({"app_id": object}), nouveau], ignore_index=True))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def app_ids(self) -> List[str]:
+        return self.frame["app_id"].unique().tolist()
+
+    def filtrer(self, app_ids: Optional[Iterable[str]] = None, score_min: int = 0, score_max: int = 5,
+                depuis: Optional[Any] = None) -> "ReviewStore":
+        """Sous-ensemble des avis (masque booléen vectorisé)"""
+        notes = self.frame["score"].to_numpy()
+        masque = (notes >= score_min) & (notes <= score_max)
+        if app_ids is not None:
+            masque &= self.frame["app_id"].isin(list(app_ids)).to_numpy()
+        if depuis is not None:
+            masque &= (self.frame["at"] >= pd.Timestamp(depuis, tz="UTC")).to_numpy()
+        return ReviewStore(self.frame[masque])
+
+    def negatifs(self) -> "ReviewStore":
+        # Même borne que parse_app_details et extraire_themes: une note 0 (absente) compte comme négative
+        return self.filtrer(score_min=0, score_max=NOTE_NEGATIVE_MAX)
+
+    def histogramme(self) -> pd.DataFrame:
+        """Nombre d'avis par application et par note (colonnes 1 à 5), en une passe"""
+        codes = self.frame["app_id"].cat.codes.to_numpy(dtype=np.int64)
+        categories = self.frame["app_id"].cat.categories
+        comptes = np.bincount(codes * 6 + self.frame["score"].to_numpy(), minlength=len(categories) * 6)
+        histogramme = pd.DataFrame(comptes.reshape(len(categories), 6)[:, 1:], index=categories, columns=list(NOTES))
+        histogramme.index.name = "app_id"
+        return histogramme
+
+    def stats_par_app(self) -> pd.DataFrame:
+        """nb_avis, note_moyenne et part d'avis négatifs par application"""
+        histogramme = self.histogramme()
+        nb = histogramme.sum(axis=1)
+        notes = np.asarray(NOTES)
+        return pd.DataFrame({
+            "nb_avis": nb,
+            "note_moyenne": (histogramme.to_numpy() @ notes / nb.clip(lower=1)).round(2),
+            "part_negatifs": (histogramme[[1, 2, 3]].sum(axis=1) / nb.clip(lower=1)).round(3),
+        })
+
+    def to_parquet(self, path: str) -> None:
+        self.frame.to_parquet(path, index=False)
+
+    @classmethod
+    def read_parquet(cls, path: str, app_ids: Optional[Iterable[str]] = None) -> "ReviewStore":
+        """Charge le stockage, éventuellement limité à certaines applications (filtre appliqué à la lecture)"""
+        filters = [("app_id", "in", list(app_ids))] if app_ids is not None else None
+        return cls(pd.read_parquet(path, filters=filters))
+
+
+class AppStore:
+    """Applications concurrentes par mot-clé, en colonnes: keyword/app_id (catégories), score (float32)"""
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None):
+        if frame is None:
+            frame = pd.DataFrame(columns=APP_COLUMNS)
+        frame = frame.reindex(columns=APP_COLUMNS).reset_index(drop=True)
+        self.frame = frame.astype({
+            "keyword": "category",
+            "app_id": "category",
+            "score": np.float32,
+        })
+        for colonne in ("keyword", "app_id"):
+            self.frame[colonne] = self.frame[colonne].cat.remove_unused_categories()
+
+    @classmethod
+    def from_concurrence(cls, concurrence_df: pd.DataFrame) -> "AppStore":
+        """Construit le stockage à partir d'un DataFrame de concurrence long (avec colonne keyword)"""
+        frame = concurrence_df.copy()
+        frame["score"] = pd.to_numeric(frame.get("score"), errors="coerce")
+        return cls(frame)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def filtrer(self, keywords: Optional[Iterable[str]] = None, score_max: Optional[float] = None) -> "AppStore":
+        masque = np.ones(len(self.frame), dtype=bool)
+        if keywords is not None:
+            masque &= self.frame["keyword"].isin(list(keywords)).to_numpy()
+        if score_max is not None:
+            masque &= (self.frame["score"] <= score_max).to_numpy()
+        return AppStore(self.frame[masque])
+
+    def stats_par_mot_cle(self) -> pd.DataFrame:
+        """nb_concurrents et note_moyenne par mot-clé"""
+        groupes = self.frame.groupby("keyword", observed=True)["score"]
+        return pd.DataFrame({"nb_concurrents": groupes.size(), "note_moyenne": groupes.mean().round(2)})
+
+    def to_parquet(self, path: str) -> None:
+        self.frame.to_parquet(path, index=False)
+
+    @classmethod
+    def read_parquet(cls, path: str, keywords: Optional[Iterable[str]] = None) -> "AppStore":
+        filters = [("keyword", "in", list(keywords))] if keywords is not None else None
+        return cls(pd.read_parquet(path, filters=filters))
@@ -0,0 +1,207 @@
+"""
+Index des suggestions déjà vues: trie des termes et préfixes qui les ont produits
+
+Chaque terme n'est stocké qu'une fois, quel que soit le nombre de préfixes qui le
+suggèrent: la recherche d'un terme est en O(len(terme)) et les requêtes par plage
+de préfixe ("tous les termes commençant par 'fitness'") ne parcourent que le
+sous-arbre concerné. Persisté en SQLite, l'index permet aux exécutions suivantes
+de ne pas réinterroger les préfixes déjà explorés, tant que leur exploration est plus
+récente que le TTL du cache des suggestions.
+"""
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+from scrapers.sqlite_utils import ThreadLocalConnection
+
+from .config import CACHE_TTLS
+
+
+def normaliser_terme(terme: str) -> str:
+    return re.sub(r"\s+", " ", terme).strip().lower()
+
+
+class _Noeud:
+    __slots__ = ("enfants", "sources")
+
+    def __init__(self):
+        self.enfants: Dict[str, "_Noeud"] = {}
+        self.sources: Optional[Set[str]] = None  # Préfixes ayant produit le terme (None: pas un terme)
+
+
+class SuggestionIndex:
+    """Trie des suggestions pour une langue et un pays, éventuellement persisté (SQLite)
+
+    Un préfixe exploré il y a plus de `ttl` secondes (par défaut le TTL du cache de
+    google_autocomplete, None: jamais) est considéré comme inexploré.
+    """
+
+    def __init__(self, path: Optional[str] = None, lang: str = "fr", country: str = "fr",
+                 ttl: Optional[float] = CACHE_TTLS["google_autocomplete"]):
+        self.path = path
+        self.lang = lang
+        self.country = country
+        self.ttl = ttl
+        self._racine = _Noeud()
+        self._explores: Dict[str, List[str]] = {}  # Préfixe exploré -> suggestions, dans l'ordre
+        self._dates: Dict[str, float] = {}  # Préfixe exploré -> date de l'exploration
+        self._taille = 0
+        self._lock = threading.Lock()
+        self._db = ThreadLocalConnection(path) if path else None
+        if self._db:
+            self._charger()
+
+    def _charger(self) -> None:
+        conn = self._db.get()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS suggestions (
+                lang TEXT NOT NULL,
+                country TEXT NOT NULL,
+                prefix TEXT NOT NULL,
+                rang INTEGER NOT NULL,
+                term TEXT NOT NULL,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (lang, country, prefix, rang)
+            )"""
+        )
+        # Une ligne par préfixe exploré, y compris ceux qui n'ont produit aucune suggestion
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS prefixes (
+                lang TEXT NOT NULL,
+                country TEXT NOT NULL,
+                prefix TEXT NOT NULL,
+                explored_at REAL NOT NULL,
+                PRIMARY KEY (lang, country, prefix)
+            )"""
+        )
+        # Index créés avant la table prefixes: la date d'exploration est celle des suggestions
+        conn.execute(
+            """INSERT OR IGNORE INTO prefixes(lang, country, prefix, explored_at)
+               SELECT lang, country, prefix, MAX(seen_at) FROM suggestions GROUP BY lang, country, prefix"""
+        )
+        rows = conn.execute(
+            "SELECT prefix, explored_at FROM prefixes WHERE lang = ? AND country = ?", (self.lang, self.country)
+        )
+        for prefix, explored_at in rows:
+            self._explores[prefix] = []
+            self._dates[prefix] = explored_at
+        rows = conn.execute(
+            "SELECT prefix, term FROM suggestions WHERE lang = ? AND country = ? ORDER BY prefix, rang",
+            (self.lang, self.country),
+        )
+        for prefix, term in rows:
+            self._explores[prefix].append(term)
+            self._inserer(term, prefix)
+
+    def _noeud(self, terme: str) -> Optional[_Noeud]:
+        noeud = self._racine
+        for caractere in terme:
+            noeud = noeud.enfants.get(caractere)
+            if noeud is None:
+                return None
+        return noeud
+
+    def _inserer(self, terme: str, prefix: str) -> bool:
+        """Ajoute une source au terme; True si le terme est nouveau"""
+        noeud = self._racine
+        for caractere in terme:
+            noeud = noeud.enfants.setdefault(caractere, _Noeud())
+        nouveau = noeud.sources is None
+        if nouveau:
+            noeud.sources = set()
+            self._taille += 1
+        noeud.sources.add(prefix)
+        return nouveau
+
+    def _retirer(self, terme: str, prefix: str) -> None:
+        """Retire une source du terme, qui cesse d'être connu s'il n'en a plus"""
+        noeud = self._noeud(terme)
+        if noeud is None or noeud.sources is None:
+            return
+        noeud.sources.discard(prefix)
+        if not noeud.sources:
+            noeud.sources = None
+            self._taille -= 1
+
+    def ajouter(self, prefix: str, suggestions: List[str]) -> List[str]:
+        """Enregistre les suggestions d'un préfixe exploré et retourne celles qui étaient inconnues
+
+        Les suggestions d'une exploration précédente du préfixe sont remplacées, et une
+        exploration sans aucune suggestion est enregistrée comme les autres.
+        """
+        prefix = normaliser_terme(prefix)
+        termes = list(dict.fromkeys(t for t in (normaliser_terme(s) for s in suggestions) if t))
+        maintenant = time.time()
+        with self._lock:
+            for ancien in set(self._explores.get(prefix, ())) - set(termes):
+                self._retirer(ancien, prefix)
+            nouveaux = [terme for terme in termes if self._inserer(terme, prefix)]
+            self._explores[prefix] = termes
+            self._dates[prefix] = maintenant
+            if self._db:
+                with self._db.transaction() as conn:
+                    conn.execute(
+                        "DELETE FROM suggestions WHERE lang = ? AND country = ? AND prefix = ?",
+                        (self.lang, self.country, prefix),
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO prefixes(lang, country, prefix, explored_at) VALUES (?, ?, ?, ?)",
+                        (self.lang, self.country, prefix, maintenant),
+                    )
+                    conn.executemany(
+                        "INSERT INTO suggestions(lang, country, prefix, rang, term, seen_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        [(self.lang, self.country, prefix, rang, terme, maintenant) for rang, terme in enumerate(termes)],
+                    )
+        return nouveaux
+
+    def suggestions(self, prefix: str) -> Optional[List[str]]:
+        """Suggestions déjà connues pour un préfixe, ou None s'il n'a jamais été exploré ou l'a été avant le TTL"""
+        prefix = normaliser_terme(prefix)
+        termes = self._explores.get(prefix)
+        if termes is None or (self.ttl is not None and time.time() - self._dates[prefix] >= self.ttl):
+            return None
+        return list(termes)
+
+    def __contains__(self, terme: str) -> bool:
+        noeud = self._noeud(normaliser_terme(terme))
+        return noeud is not None and noeud.sources is not None
+
+    def __len__(self) -> int:
+        return self._taille
+
+    def sources(self, terme: str) -> Set[str]:
+        """Préfixes qui ont produit ce terme"""
+        noeud = self._noeud(normaliser_terme(terme))
+        return set(noeud.sources) if noeud is not None and noeud.sources else set()
+
+    def commencant_par(self, prefix: str = "", limit: Optional[int] = None) -> Iterator[str]:
+        """Termes connus commençant par `prefix`, dans l'ordre alphabétique"""
+        prefix = normaliser_terme(prefix) if prefix.strip() else ""
+        depart = self._noeud(prefix)
+        if depart is None:
+            return
+        produits = 0
+        pile = [(prefix, depart)]
+        while pile:
+            terme, noeud = pile.pop()
+            if noeud.sources is not None:
+                yield terme
+                produits += 1
+                if limit is not None and produits >= limit:
+                    return
+            pile.extend((terme + c, enfant) for c, enfant in sorted(noeud.enfants.items(), reverse=True))
+
+    def prefixes_explores(self) -> int:
+        return len(self._explores)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._racine = _Noeud()
+            self._explores.clear()
+            self._dates.clear()
+            self._taille = 0
+            if self._db:
+                with self._db.transaction() as conn:
+                    for table in ("suggestions", "prefixes"):
+                        conn.execute(f"DELETE FROM {table} WHERE lang = ? AND country = ?", (self.lang, self.country))
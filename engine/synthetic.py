@@ -0,0 +1,350 @@
+"""
+Marché synthétique reproductible pour les tests de charge (applications et avis en Parquet)
+
+    python -m engine.synthetic --apps 1000000 --avis 20 --seed 42 --output marche/
+    python -m engine.synthetic --output marche/ --score --themes-avis 500000
+
+À partir d'une graine, des millions d'applications et d'avis sont tirés par lots
+vectorisés (NumPy) puis assemblés en tables Arrow et écrits lot par lot dans
+`apps.parquet` et `reviews.parquet`, sans jamais passer par des objets Python
+ligne à ligne. Les distributions imitent un vrai marché: mots-clés très inégalement
+encombrés, paliers d'installations décroissants, notes moyennes concentrées vers 4,
+notes d'avis en J et textes composés de thèmes de plainte ou d'éloge récurrents.
+Les colonnes sont celles d'AppStore/ReviewStore: le classement des marchés et
+l'extraction des thèmes se chargent directement (`--score`).
+
+Une même graine et une même taille de lot produisent exactement les mêmes fichiers.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .standin import MOTS
+
+QUALIFICATIFS = ("gratuit", "simple", "pro", "hors ligne", "facile", "familial", "débutant", "sans pub")
+TITRES = ("Zen", "Fit", "Budget", "Note", "Chef", "Sommeil", "Habit", "Lingo", "Jardin", "Photo", "Trip", "Beat")
+SUFFIXES = ("Pro", "Plus", "Facile", "Coach", "Planner", "Go", "Lab", "Tracker", "Studio", "Pocket")
+
+# Paliers d'installations du Play Store et probabilité relative de chacun
+PALIERS = (100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 10_000_000, 100_000_000)
+POIDS_PALIERS = 0.62 ** np.arange(len(PALIERS))
+PRIX = (0.99, 1.99, 2.99, 4.99, 9.99)
+PART_PAYANTES = 0.1
+PART_SANS_NOTE = 0.03  # Applications trop récentes pour avoir une note
+
+# Thèmes de plainte: (poids, formulations)
+PLAINTES = (
+    (0.22, ("trop de publicités entre chaque écran", "les publicités plein écran reviennent sans arrêt",
+            "impossible de l'utiliser à cause des publicités")),
+    (0.20, ("l'application plante au démarrage", "plantage systématique à l'ouverture",
+            "elle se ferme toute seule après la mise à jour")),
+    (0.16, ("abonnement beaucoup trop cher", "les fonctions de base sont passées en abonnement payant",
+            "prélevé après l'essai gratuit sans prévenir")),
+    (0.12, ("synchronisation perdue entre mes appareils", "mes données ont disparu après la synchronisation",
+            "la sauvegarde en ligne ne fonctionne pas")),
+    (0.10, ("vide la batterie en quelques heures", "consommation de batterie excessive en arrière-plan")),
+    (0.10, ("très lente au chargement", "interface lente qui rame en permanence")),
+    (0.10, ("impossible de me connecter à mon compte", "erreur de connexion au serveur à chaque fois")),
+)
+ELOGES = (
+    "simple et efficace", "exactement ce qu'il me fallait", "interface claire et agréable", "très utile au quotidien",
+    "fonctionne parfaitement hors ligne", "les rappels m'aident vraiment", "aucune publicité envahissante",
+    "synchronisation rapide entre mes appareils", "les statistiques sont très bien faites",
+)
+OUVERTURES_NEGATIVES = ("Déçu.", "Franchement décevant:", "Dommage,", "Bof.", "Je désinstalle:", "Très frustrant,")
+OUVERTURES_POSITIVES = ("Super application:", "Top,", "Très bien.", "Parfait,", "Je recommande:", "Excellente appli,")
+CONCLUSIONS_NEGATIVES = ("à corriger vite.", "une étoile en attendant un correctif.", "dommage car l'idée est bonne.",
+                         "support injoignable.")
+CONCLUSIONS_POSITIVES = ("merci aux développeurs!", "cinq étoiles.", "à essayer.", "bravo.")
+CONTEXTES = ("depuis la dernière mise à jour", "sur ma tablette", "sur mon téléphone") + tuple(
+    f"depuis la version {majeure}.{mineure}" for majeure in range(1, 7) for mineure in range(10)
+)
+
+# Les avis s'étalent sur trois ans avant cette date (fixe: la sortie ne dépend pas du jour de génération)
+DATE_REFERENCE = np.datetime64("2026-01-01T00:00:00", "ms")
+ANCIENNETE_MOYENNE_JOURS = 240
+
+APPS_SCHEMA = pa.schema([
+    ("keyword", pa.dictionary(pa.int32(), pa.string())),
+    ("app_id", pa.string()),
+    ("title", pa.string()),
+    ("developer", pa.string()),
+    ("score", pa.float32()),
+    ("installs", pa.dictionary(pa.int32(), pa.string())),
+    ("price", pa.float32()),
+    ("free", pa.bool_()),
+    ("min_installs", pa.int64()),
+    ("nb_avis", pa.int32()),
+])
+REVIEWS_SCHEMA = pa.schema([
+    ("app_id", pa.dictionary(pa.int32(), pa.string())),
+    ("score", pa.int8()),
+    ("content", pa.string()),
+    ("at", pa.timestamp("ms", tz="UTC")),
+])
+
+
+def _libelle_palier(palier: int) -> str:
+    return f"{palier:,}+".replace(",", " ")
+
+
+def _prendre(table: pa.Array, indices: np.ndarray, masque: Optional[np.ndarray] = None) -> pa.Array:
+    """Éléments de `table` aux `indices` (nuls là où `masque` est vrai), sans objet Python par ligne"""
+    return pc.take(table, pa.array(indices, type=pa.int32(), mask=masque))
+
+
+def mots_cles(n: int) -> List[str]:
+    """`n` mots-clés distincts et lisibles (« budget simple », puis « budget simple 2 »…)"""
+    bases = [f"{mot} {qualificatif}" for qualificatif in QUALIFICATIFS for mot in MOTS]
+    return [bases[i % len(bases)] + (f" {i // len(bases) + 1}" if i >= len(bases) else "") for i in range(n)]
+
+
+class MarcheSynthetique:
+    """Applications et avis tirés d'une graine, par lots de `taille_lot` applications (tables Arrow)"""
+
+    def __init__(self, seed: int = 0, nb_apps: int = 100_000, avis_par_app: float = 20.0,
+                 nb_mots_cles: Optional[int] = None, taille_lot: int = 50_000):
+        self.seed = seed
+        self.nb_apps = nb_apps
+        self.avis_par_app = avis_par_app
+        self.nb_mots_cles = nb_mots_cles or max(1, nb_apps // 8)
+        self.taille_lot = max(1, taille_lot)
+
+        self._mots_cles = pa.array(mots_cles(self.nb_mots_cles), type=pa.string())
+        # Marchés plus ou moins bien servis: décalage de la qualité des applications de chaque mot-clé
+        self._ecart_marche = self._rng(-1, 2).normal(0.0, 0.45, self.nb_mots_cles)
+        self._titres = pa.array(TITRES)
+        self._suffixes = pa.array(SUFFIXES)
+        self._paliers = np.asarray(PALIERS, dtype=np.int64)
+        self._libelles_paliers = pa.array([_libelle_palier(p) for p in PALIERS])
+        self._probas_paliers = POIDS_PALIERS / POIDS_PALIERS.sum()
+        # Plus une application est installée, plus elle reçoit d'avis (moyenne globale: avis_par_app)
+        intensite = np.sqrt(self._paliers / self._paliers[0])
+        self._avis_par_palier = avis_par_app * intensite / (intensite @ self._probas_paliers)
+
+        # Tables de formulations: négatives puis positives, décalées selon le signe de l'avis
+        plaintes = [phrase for _, phrases in PLAINTES for phrase in phrases]
+        poids = np.array([p / len(phrases) for p, phrases in PLAINTES for _ in phrases])
+        self._nb_plaintes = len(plaintes)
+        self._probas_plaintes = poids / poids.sum()
+        self._phrases = pa.array(plaintes + list(ELOGES))
+        self._suites = pa.array([f"et {phrase}" for phrase in plaintes + list(ELOGES)])
+        self._ouvertures = pa.array(OUVERTURES_NEGATIVES + OUVERTURES_POSITIVES)
+        self._conclusions = pa.array(CONCLUSIONS_NEGATIVES + CONCLUSIONS_POSITIVES)
+        self._contextes = pa.array(CONTEXTES)
+
+    def __len__(self) -> int:
+        return -(-self.nb_apps // self.taille_lot)
+
+    def _rng(self, numero: int, flux: int) -> np.random.Generator:
+        # Un flux par lot et par table: les avis n'influencent pas les applications
+        return np.random.default_rng([self.seed, numero + 1, flux])
+
+    def applications(self, numero: int) -> Tuple[pa.Table, np.ndarray, np.ndarray]:
+        """Lot `numero`: (table des applications, note moyenne « réelle », avis à générer par application)"""
+        debut = numero * self.taille_lot
+        n = min(self.taille_lot, self.nb_apps - debut)
+        rng = self._rng(numero, 0)
+
+        # Mots-clés très inégalement encombrés: les premiers concentrent les concurrents
+        keyword = (rng.random(n) ** 2.5 * self.nb_mots_cles).astype(np.int32)
+        qualite = np.clip(1 + 4 * rng.beta(7.0, 2.0, n) + self._ecart_marche[keyword], 1.0, 5.0)
+        sans_note = rng.random(n) < PART_SANS_NOTE
+        palier = rng.choice(len(PALIERS), size=n, p=self._probas_paliers)
+        payante = rng.random(n) < PART_PAYANTES
+        prix = np.where(payante, np.asarray(PRIX)[rng.integers(0, len(PRIX), n)], 0.0)
+        min_installs = self._paliers[palier]
+        nb_avis = np.where(sans_note, 0, (min_installs * rng.lognormal(np.log(0.02), 1.0, n)).astype(np.int64) + 1)
+        a_generer = np.where(sans_note, 0, rng.poisson(self._avis_par_palier[palier]))
+
+        numeros = pa.array(np.arange(debut, debut + n)).cast(pa.string())
+        table = pa.table({
+            "keyword": pa.DictionaryArray.from_arrays(pa.array(keyword), self._mots_cles),
+            "app_id": pc.binary_join_element_wise("com.synth.a", pc.utf8_lpad(numeros, 9, "0"), ""),
+            "title": pc.binary_join_element_wise(
+                _prendre(self._titres, rng.integers(0, len(TITRES), n)),
+                _prendre(self._suffixes, rng.integers(0, len(SUFFIXES), n)), " "),
+            "developer": pc.binary_join_element_wise(
+                "Studio", pa.array(rng.integers(0, max(1, self.nb_apps // 5), n)).cast(pa.string()), " "),
+            "score": pa.array(np.round(qualite, 1).astype(np.float32), mask=sans_note),
+            "installs": pa.DictionaryArray.from_arrays(pa.array(palier.astype(np.int32)), self._libelles_paliers),
+            "price": pa.array(prix.astype(np.float32)),
+            "free": pa.array(~payante),
+            "min_installs": pa.array(min_installs),
+            "nb_avis": pa.array(nb_avis.astype(np.int32)),
+        }, schema=APPS_SCHEMA)
+        return table, qualite, a_generer
+
+    def avis(self, numero: int, app_ids: pa.Array, qualite: np.ndarray, a_generer: np.ndarray) -> pa.Table:
+        """Avis des applications d'un lot: notes en J autour de la qualité de l'application, textes par thèmes"""
+        rng = self._rng(numero, 1)
+        app = np.repeat(np.arange(len(a_generer), dtype=np.int32), a_generer)
+        r = len(app)
+
+        # Probabilité de chaque note par application: cloche autour de la qualité, plus les extrêmes
+        # (courbe en J du Play Store: environ 57 % de 5 étoiles, 9 % de 1 étoile, peu de 2)
+        etoiles = np.arange(1, 6)
+        probas = np.exp(-0.5 * ((etoiles[None, :] - qualite[:, None] - 0.3) / 0.7) ** 2)
+        probas[:, 0] += 0.25
+        probas[:, 4] += 0.9
+        cumul = np.cumsum(probas / probas.sum(axis=1, keepdims=True), axis=1)
+        note = (1 + (rng.random(r)[:, None] > cumul[app, :4]).sum(axis=1)).astype(np.int8)
+
+        negatif = note <= 3
+        decalage = np.where(negatif, 0, 1)
+        plainte = rng.choice(self._nb_plaintes, size=r, p=self._probas_plaintes)
+        eloge = self._nb_plaintes + rng.integers(0, len(ELOGES), r)
+        phrase = np.where(negatif, plainte, eloge)
+        seconde = np.where(negatif, rng.choice(self._nb_plaintes, size=r, p=self._probas_plaintes),
+                           self._nb_plaintes + rng.integers(0, len(ELOGES), r))
+        contenu = pc.binary_join_element_wise(
+            _prendre(self._ouvertures, decalage * len(OUVERTURES_NEGATIVES) + rng.integers(0, len(OUVERTURES_NEGATIVES), r),
+                     rng.random(r) >= 0.4),
+            _prendre(self._phrases, phrase),
+            _prendre(self._suites, seconde, (rng.random(r) >= 0.35) | (seconde == phrase)),
+            _prendre(self._contextes, rng.integers(0, len(CONTEXTES), r), rng.random(r) >= 0.3),
+            _prendre(self._conclusions, decalage * len(CONCLUSIONS_NEGATIVES) + rng.integers(0, len(CONCLUSIONS_NEGATIVES), r),
+                     rng.random(r) >= 0.5),
+            " ",
+            null_handling="skip",
+        )
+        anciennete = np.minimum(rng.exponential(ANCIENNETE_MOYENNE_JOURS, r), 3 * 365) * 86_400_000
+        return pa.table({
+            "app_id": pa.DictionaryArray.from_arrays(pa.array(app), app_ids),
+            "score": pa.array(note),
+            "content": contenu,
+            "at": pa.array(DATE_REFERENCE - anciennete.astype("timedelta64[ms]"), type=pa.timestamp("ms", tz="UTC")),
+        }, schema=REVIEWS_SCHEMA)
+
+    def lots(self) -> Iterator[Tuple[pa.Table, pa.Table]]:
+        """(applications, avis) lot par lot"""
+        for numero in range(len(self)):
+            apps, qualite, a_generer = self.applications(numero)
+            if self.avis_par_app > 0:
+                avis = self.avis(numero, apps.column("app_id").combine_chunks(), qualite, a_generer)
+            else:
+                avis = REVIEWS_SCHEMA.empty_table()
+            yield apps, avis
+
+    def ecrire(self, dossier: str, compression: str = "zstd") -> Dict[str, Any]:
+        """Écrit apps.parquet et reviews.parquet dans `dossier` (un groupe de lignes par lot)"""
+        os.makedirs(dossier, exist_ok=True)
+        chemins = {"apps": os.path.join(dossier, "apps.parquet"), "reviews": os.path.join(dossier, "reviews.parquet")}
+        lignes = {"apps": 0, "reviews": 0}
+        debut = time.perf_counter()
+        with pq.ParquetWriter(chemins["apps"], APPS_SCHEMA, compression=compression) as apps_writer, \
+                pq.ParquetWriter(chemins["reviews"], REVIEWS_SCHEMA, compression=compression) as avis_writer:
+            for apps, avis in self.lots():
+                apps_writer.write_table(apps)
+                avis_writer.write_table(avis)
+                lignes["apps"] += apps.num_rows
+                lignes["reviews"] += avis.num_rows
+        duree = time.perf_counter() - debut
+        return {
+            "seed": self.seed,
+            "mots_cles": self.nb_mots_cles,
+            "duree_s": duree,
+            **lignes,
+            **{f"{nom}_par_s": lignes[nom] / duree if duree else 0.0 for nom in lignes},
+            **{f"{nom}_mo": os.path.getsize(chemin) / (1024 * 1024) for nom, chemin in chemins.items()},
+        }
+
+
+def charge_scoring(dossier: str, themes_avis: int = 500_000) -> Dict[str, Any]:
+    """Chronomètre le classement de tous les marchés et l'extraction des thèmes sur un marché écrit par `ecrire`"""
+    # Chargés ici: le classement et les thèmes tirent tout le moteur d'analyse
+    from .analysis import classer_potentiel_marches
+    from .reviews import extraire_themes
+    from .store import AppStore, ReviewStore
+
+    mesures: Dict[str, Any] = {}
+    debut = time.perf_counter()
+    apps = AppStore.read_parquet(os.path.join(dossier, "apps.parquet"))
+    mesures["lecture_apps_s"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    classement = classer_potentiel_marches(apps.frame)
+    mesures["classement_s"] = time.perf_counter() - debut
+    mesures["apps"] = len(apps)
+    mesures["marches"] = len(classement)
+    mesures["marches_par_potentiel"] = classement["potentiel"].value_counts().to_dict()
+
+    # Les premiers avis seulement: l'extraction des thèmes travaille sur un corpus en mémoire
+    debut = time.perf_counter()
+    lots: List[pa.RecordBatch] = []
+    lus = 0
+    for lot in pq.ParquetFile(os.path.join(dossier, "reviews.parquet")).iter_batches(batch_size=65_536):
+        lots.append(lot.slice(0, themes_avis - lus))
+        lus += lots[-1].num_rows
+        if lus >= themes_avis:
+            break
+    avis = ReviewStore(pa.Table.from_batches(lots, schema=REVIEWS_SCHEMA).to_pandas()) if lots else ReviewStore()
+    mesures["lecture_avis_s"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    themes = extraire_themes(avis.frame)
+    mesures["themes_s"] = time.perf_counter() - debut
+    mesures["avis"] = len(avis)
+    mesures["avis_par_s"] = len(avis) / mesures["themes_s"] if mesures["themes_s"] else 0.0
+    mesures["themes"] = themes["theme"].tolist()
+    return mesures
+
+
+def rapport_texte(generation: Optional[Dict[str, Any]], scoring: Optional[Dict[str, Any]]) -> str:
+    lignes = []
+    if generation:
+        lignes.append(
+            f"Génération (graine {generation['seed']}): {generation['apps']} applications, {generation['reviews']} avis, "
+            f"{generation['mots_cles']} mots-clés en {generation['duree_s']:.1f} s "
+            f"({generation['apps_par_s']:.0f} apps/s, {generation['reviews_par_s']:.0f} avis/s); "
+            f"Parquet: {generation['apps_mo']:.1f} Mo + {generation['reviews_mo']:.1f} Mo"
+        )
+    if scoring:
+        lignes.append(
+            f"Classement: {scoring['marches']} marchés sur {scoring['apps']} applications en {scoring['classement_s']:.2f} s "
+            f"(lecture {scoring['lecture_apps_s']:.2f} s) — {scoring['marches_par_potentiel']}"
+        )
+        lignes.append(
+            f"Thèmes: {scoring['avis']} avis en {scoring['themes_s']:.2f} s ({scoring['avis_par_s']:.0f} avis/s, "
+            f"lecture {scoring['lecture_avis_s']:.2f} s) — {', '.join(scoring['themes'])}"
+        )
+    return "\n".join(lignes)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m engine.synthetic", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", required=True, help="Dossier de apps.parquet et reviews.parquet")
+    parser.add_argument("--apps", type=int, default=100_000, help="Nombre d'applications (défaut: 100 000; 0: pas de génération)")
+    parser.add_argument("--avis", type=float, default=20.0, help="Avis moyens par application (défaut: 20)")
+    parser.add_argument("--mots-cles", type=int, help="Nombre de mots-clés (défaut: une application sur 8)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lot", type=int, default=50_000, help="Applications par lot (défaut: 50 000)")
+    parser.add_argument("--score", action="store_true", help="Chronomètre ensuite le classement et l'extraction des thèmes")
+    parser.add_argument("--themes-avis", type=int, default=500_000, help="Avis lus pour l'extraction des thèmes (défaut: 500 000)")
+    parser.add_argument("--json", help="Enregistre les mesures dans ce fichier")
+    args = parser.parse_args(argv)
+
+    generation = None
+    if args.apps > 0:
+        generation = MarcheSynthetique(args.seed, args.apps, args.avis, args.mots_cles, args.lot).ecrire(args.output)
+    elif not os.path.exists(os.path.join(args.output, "apps.parquet")):
+        parser.error(f"Aucun marché dans {args.output}: indiquez --apps")
+    scoring = charge_scoring(args.output, args.themes_avis) if args.score else None
+
+    print(rapport_texte(generation, scoring))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "scoring": scoring}, f, indent=2, ensure_ascii=False, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
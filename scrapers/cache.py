@@ -0,0 +1,154 @@
+"""
+Cache persistant des réponses d'API, partagé entre les sessions, les threads et les processus
+"""
+import json
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .sqlite_utils import ThreadLocalConnection
+
+# Paramètres qui n'influencent pas la réponse et ne doivent pas entrer dans la clé
+IGNORED_PARAMS = frozenset(["api_key", "output", "no_cache", "async"])
+
+
+def normalize_params(params: Mapping[str, Any]) -> Tuple[str, str]:
+    """Retourne (moteur, clé canonique) pour un jeu de paramètres de requête"""
+    normalized = {}
+    for name, value in params.items():
+        if name in IGNORED_PARAMS or value is None:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split()).lower()
+        normalized[name] = value
+    engine = str(normalized.get("engine", ""))
+    return engine, json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLiteCache:
+    """Cache de réponses JSON sur disque (SQLite), avec TTL par moteur et éviction LRU
+
+    Les réponses sont compressées; lorsque la taille totale dépasse `max_bytes`,
+    les entrées les moins récemment lues sont supprimées. Les compteurs de
+    succès/échecs sont persistés par moteur pour mesurer le quota économisé.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default_ttl: float = 3600,
+        ttls: Optional[Dict[str, float]] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.max_bytes = max_bytes
+        self._db = ThreadLocalConnection(path)
+
+        conn = self._db.get()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                engine TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses(last_access)")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS stats (
+                engine TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+
+    def ttl_for(self, engine: str) -> float:
+        return self.ttls.get(engine, self.default_ttl)
+
+    def _count(self, engine: str, hit: bool) -> None:
+        self._db.get().execute(
+            """INSERT INTO stats(engine, hits, misses) VALUES (?, ?, ?)
+               ON CONFLICT(engine) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses""",
+            (engine, int(hit), int(not hit)),
+        )
+
+    def get(self, params: Mapping[str, Any], count: bool = True) -> Optional[Any]:
+        """Retourne la réponse en cache pour ces paramètres, ou None (absente ou expirée)
+
+        `count=False` pour une seconde lecture qui ne doit pas fausser les compteurs.
+        """
+        engine, key = normalize_params(params)
+        conn = self._db.get()
+        now = time.time()
+        row = conn.execute("SELECT payload, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+
+        if row is None or row[1] < now:
+            if row is not None:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            if count:
+                self._count(engine, hit=False)
+            return None
+
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        if count:
+            self._count(engine, hit=True)
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, params: Mapping[str, Any], data: Any) -> None:
+        """Enregistre une réponse puis applique le budget d'octets"""
+        engine, key = normalize_params(params)
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        conn = self._db.get()
+        conn.execute(
+            """INSERT OR REPLACE INTO responses(key, engine, payload, size, created_at, expires_at, last_access)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (key, engine, payload, len(payload), now, now + self.ttl_for(engine), now),
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Supprime les entrées expirées, puis les moins récemment lues au-delà du budget"""
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs par moteur, taux de succès global et occupation du cache"""
+        conn = self._db.get()
+        engines = {
+            engine: {"hits": hits, "misses": misses}
+            for engine, hits, misses in conn.execute("SELECT engine, hits, misses FROM stats")
+        }
+        hits = sum(e["hits"] for e in engines.values())
+        misses = sum(e["misses"] for e in engines.values())
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "engines": engines,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self) -> None:
+        conn = self._db.get()
+        conn.execute("DELETE FROM responses")
+        conn.execute("DELETE FROM stats")
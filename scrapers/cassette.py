@@ -0,0 +1,137 @@
+"""
+Cassette d'enregistrement/relecture des réponses d'API
+
+En enregistrement, chaque échange réel (paramètres, statut, en-têtes utiles,
+corps compressé, durée) est ajouté à un fichier SQLite indexé par clé canonique,
+ainsi que chaque réponse servie par un cache (durée nulle).
+En relecture, la dernière réponse enregistrée pour une clé est servie sans
+aucun accès réseau: les analyses peuvent être rejouées hors ligne, à l'identique.
+"""
+import json
+import threading
+import time
+import zlib
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+
+from .cache import IGNORED_PARAMS, normalize_params
+from .sqlite_utils import ThreadLocalConnection
+
+MODES = ("record", "replay")
+
+# En-têtes conservés (ceux que lisent les réessais et le décodage)
+KEPT_HEADERS = ("Content-Type", "Retry-After")
+
+
+class CassetteMiss(LookupError):
+    """Requête absente de la cassette en mode relecture"""
+
+
+class Cassette:
+    """Échanges HTTP enregistrés dans un fichier SQLite (une ligne par échange, index par clé)"""
+
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in MODES:
+            raise ValueError(f"Mode de cassette inconnu: {mode!r} (attendu: {', '.join(MODES)})")
+        self.path = path
+        self.mode = mode
+        self._db = ThreadLocalConnection(path)
+        self._lock = threading.Lock()
+        self._stats = {"recorded": 0, "played": 0, "missed": 0}
+
+        conn = self._db.get()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS interactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                engine TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                recorded_at REAL NOT NULL
+            )"""
+        )
+        # La relecture sert la dernière réponse d'une clé: (key, id DESC) couvre la requête
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_interactions_key ON interactions(key, id)")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def record(self, params: Mapping[str, Any], response: requests.Response) -> None:
+        """Ajoute un échange et sa durée (la clé d'API n'est jamais écrite)"""
+        engine, key = normalize_params(params)
+        publics = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        body = zlib.compress(response.content)
+        self._db.get().execute(
+            """INSERT INTO interactions(key, engine, params, status, headers, body, size, duration, recorded_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (key, engine, json.dumps(publics, ensure_ascii=False, default=str), response.status_code,
+             json.dumps(headers), body, len(response.content), response.elapsed.total_seconds(), time.time()),
+        )
+        self._count("recorded")
+
+    def record_data(self, params: Mapping[str, Any], data: Any) -> bool:
+        """Ajoute une réponse JSON servie sans appel réseau (cache), si la clé n'est pas déjà enregistrée"""
+        engine, key = normalize_params(params)
+        conn = self._db.get()
+        if conn.execute("SELECT 1 FROM interactions WHERE key = ? LIMIT 1", (key,)).fetchone():
+            return False
+        publics = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+        content = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        conn.execute(
+            """INSERT INTO interactions(key, engine, params, status, headers, body, size, duration, recorded_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)""",
+            (key, engine, json.dumps(publics, ensure_ascii=False, default=str), 200,
+             json.dumps({"Content-Type": "application/json"}), zlib.compress(content), len(content), time.time()),
+        )
+        self._count("recorded")
+        return True
+
+    def play(self, params: Mapping[str, Any]) -> requests.Response:
+        """Dernière réponse enregistrée pour ces paramètres, sous forme de requests.Response
+
+        Lève CassetteMiss si la requête n'a jamais été enregistrée.
+        """
+        _, key = normalize_params(params)
+        row = self._db.get().execute(
+            "SELECT status, headers, body FROM interactions WHERE key = ? ORDER BY id DESC LIMIT 1", (key,)
+        ).fetchone()
+        if row is None:
+            self._count("missed")
+            raise CassetteMiss(f"Requête absente de la cassette {self.path}: {key}")
+        self._count("played")
+
+        response = requests.Response()
+        response.status_code = row[0]
+        response.headers.update(json.loads(row[1]))
+        response._content = zlib.decompress(row[2])
+        response.url = f"cassette://{key}"
+        response.encoding = "utf-8"
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Échanges et clés distinctes du fichier, octets (bruts et compressés), compteurs de la session"""
+        interactions, keys, size, stored = self._db.get().execute(
+            "SELECT COUNT(*), COUNT(DISTINCT key), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM interactions"
+        ).fetchone()
+        with self._lock:
+            compteurs = dict(self._stats)
+        return {"mode": self.mode, "interactions": interactions, "keys": keys,
+                "bytes": size, "stored_bytes": stored, **compteurs}
+
+    def engines(self) -> Dict[str, int]:
+        """Nombre d'échanges enregistrés par moteur"""
+        return dict(self._db.get().execute("SELECT engine, COUNT(*) FROM interactions GROUP BY engine"))
+
+
+def open_cassette(path: Optional[str], mode: Optional[str]) -> Optional[Cassette]:
+    """Cassette configurée, ou None si aucun fichier ou mode n'est donné"""
+    if not path or not mode or mode == "off":
+        return None
+    return Cassette(path, mode)
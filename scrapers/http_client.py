@@ -0,0 +1,112 @@
+"""
+Client HTTP partagé: pool de connexions keep-alive, timeouts et réessais au niveau transport
+
+Seules les erreurs de connexion/lecture sont réessayées ici; les statuts HTTP
+(429, 5xx) relèvent du moteur de réessais (scrapers.retry).
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Valeurs par défaut: (connexion, lecture) en secondes
+DEFAULT_TIMEOUT = (5.0, 30.0)
+DEFAULT_POOL_CONNECTIONS = 10  # Nombre d'hôtes distincts gardés en pool
+DEFAULT_POOL_MAXSIZE = 8       # Connexions simultanées maximum par hôte
+DEFAULT_RETRIES = 2
+
+
+class HttpClient:
+    """Session requests partagée entre threads, avec pool de connexions par hôte"""
+
+    def __init__(
+        self,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = 0.3,
+    ):
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=0,
+            backoff_factor=backoff_factor,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        # pool_block=True: au-delà de pool_maxsize connexions vers un hôte, les threads attendent
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry,
+            pool_block=True,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> requests.Response:
+        """Requête GET sur une connexion réutilisée du pool"""
+        return self.session.get(
+            url,
+            params=params,
+            headers=headers,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+
+    def post(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Timeout] = None,
+    ) -> requests.Response:
+        """Requête POST (formulaire) sur une connexion réutilisée du pool, sans réessai de transport"""
+        return self.session.post(
+            url,
+            params=params,
+            data=data,
+            headers=headers,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Retourne le client partagé du processus (créé à la première utilisation)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def configure(**kwargs: Any) -> HttpClient:
+    """Remplace le client partagé par un client construit avec ces paramètres"""
+    global _client
+    with _client_lock:
+        previous, _client = _client, HttpClient(**kwargs)
+    if previous is not None:
+        previous.close()
+    return _client
@@ -0,0 +1,306 @@
+"""
+Métriques en mémoire (compteurs, jauges, histogrammes) au format texte de Prometheus
+
+Sans dépendance: le registre se lit dans l'interface, s'écrit dans un fichier
+(collecteur « textfile » de node_exporter) ou s'expose sur un point d'accès HTTP
+/metrics. Chaque métrique est protégée par son propre verrou: l'enregistrement
+d'une mesure ne coûte qu'une recherche dichotomique et deux additions.
+"""
+import bisect
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Bornes (secondes) adaptées aux appels réseau comme aux lectures de cache
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bornes (octets) des tailles de réponses
+SIZE_BUCKETS = (512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: étiquettes attendues {self.labelnames}, reçues {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _matches(self, key: Labels, filters: Dict[str, Any]) -> bool:
+        return all(key[self.labelnames.index(name)] == str(value) for name, value in filters.items())
+
+    def render(self) -> List[str]:
+        aide = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        return [f"# HELP {self.name} {aide}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Total croissant (requêtes, unités de quota, réessais…)
+
+    Avec `window` (secondes), les incréments récents sont aussi conservés pour `rate()`:
+    le débit des `window` dernières secondes, et non la moyenne depuis le démarrage.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), window: float = 0.0):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self.window = window
+        self.created_at = time.monotonic()
+        self._recents: Deque[Tuple[float, Labels, float]] = deque()
+
+    def _oublier(self, maintenant: float) -> None:
+        while self._recents and self._recents[0][0] <= maintenant - self.window:
+            self._recents.popleft()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+            if self.window:
+                maintenant = time.monotonic()
+                self._recents.append((maintenant, key, amount))
+                self._oublier(maintenant)
+
+    def rate(self, **filters: Any) -> float:
+        """Incréments par seconde sur la fenêtre glissante (ou depuis la création si elle est plus récente)"""
+        if not self.window:
+            raise ValueError(f"{self.name}: compteur sans fenêtre glissante")
+        maintenant = time.monotonic()
+        with self._lock:
+            self._oublier(maintenant)
+            recent = sum(amount for _, key, amount in self._recents if self._matches(key, filters))
+        return recent / max(min(self.window, maintenant - self.created_at), 1.0)
+
+    def total(self, **filters: Any) -> float:
+        """Somme des séries dont les étiquettes correspondent à `filters`"""
+        with self._lock:
+            return sum(v for key, v in self._values.items() if self._matches(key, filters))
+
+    def by(self, label: str, **filters: Any) -> Dict[str, float]:
+        """Totaux regroupés par valeur de l'étiquette `label`"""
+        index = self.labelnames.index(label)
+        totaux: Dict[str, float] = {}
+        with self._lock:
+            for key, value in self._values.items():
+                if self._matches(key, filters):
+                    totaux[key[index]] = totaux.get(key[index], 0.0) + value
+        return totaux
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    """Valeur instantanée (jetons de quota restants, entrées du cache…)"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Distribution par classes cumulées (latences, tailles), avec somme et nombre d'observations"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Par série: effectifs par classe (dernière: au-delà de la plus grande borne), somme
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._series.get(key)
+            if serie is None:
+                serie = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            serie[0][index] += 1
+            serie[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """Chronomètre le bloc; les étiquettes du dict produit peuvent être modifiées dans le bloc"""
+        labels = dict(labels)
+        debut = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - debut, **labels)
+
+    def _merged(self, filters: Dict[str, Any]) -> Tuple[List[int], float]:
+        effectifs = [0] * (len(self.buckets) + 1)
+        somme = 0.0
+        with self._lock:
+            for key, (counts, total) in self._series.items():
+                if self._matches(key, filters):
+                    effectifs = [a + b for a, b in zip(effectifs, counts)]
+                    somme += total[0]
+        return effectifs, somme
+
+    def count(self, **filters: Any) -> int:
+        return sum(self._merged(filters)[0])
+
+    def sum(self, **filters: Any) -> float:
+        return self._merged(filters)[1]
+
+    def quantile(self, q: float, **filters: Any) -> float:
+        """Quantile estimé par interpolation linéaire dans les classes (comme histogram_quantile)"""
+        effectifs, _ = self._merged(filters)
+        total = sum(effectifs)
+        if not total:
+            return 0.0
+        rang = q * total
+        cumul = 0
+        for index, effectif in enumerate(effectifs):
+            if cumul + effectif >= rang and effectif:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # Au-delà de la dernière borne: valeur inconnue
+                bas = self.buckets[index - 1] if index else 0.0
+                return bas + (self.buckets[index] - bas) * (rang - cumul) / effectif
+            cumul += effectif
+        return self.buckets[-1]
+
+    def label_values(self, label: str) -> List[str]:
+        index = self.labelnames.index(label)
+        with self._lock:
+            return sorted({key[index] for key in self._series})
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        lignes = super().render()
+        for key, (counts, total) in series:
+            cumul = 0
+            for borne, effectif in zip((*self.buckets, math.inf), counts):
+                cumul += effectif
+                le = f'le="{_format_value(borne)}"'
+                lignes.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumul}")
+            lignes.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lignes.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumul}")
+        return lignes
+
+
+class Registry:
+    """Ensemble de métriques nommées; `counter`/`gauge`/`histogram` retournent la métrique existante si déjà créée"""
+
+    def __init__(self):
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"La métrique {name} existe déjà ({metric.kind})")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), window: float = 0.0) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames, window)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def uptime(self) -> float:
+        """Secondes écoulées depuis la création du registre"""
+        return time.time() - self.created_at
+
+    def render(self) -> str:
+        """Exposition au format texte de Prometheus (version 0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lignes = []
+        for metric in metrics:
+            lignes += metric.render()
+        return "\n".join(lignes) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Écrit l'exposition dans `path` de façon atomique (lecteurs jamais face à un fichier partiel)"""
+        dossier = os.path.dirname(os.path.abspath(path))
+        os.makedirs(dossier, exist_ok=True)
+        descripteur, temporaire = tempfile.mkstemp(dir=dossier, prefix=".metrics-")
+        try:
+            with os.fdopen(descripteur, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(temporaire, path)
+        except BaseException:
+            os.unlink(temporaire)
+            raise
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Expose /metrics sur `host:port` dans un thread d'arrière-plan; retourne le serveur"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                corps = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+# Registre du processus, partagé par toutes les sessions et tous les threads
+REGISTRY = Registry()
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: Optional[Registry] = None) -> ThreadingHTTPServer:
+    return (registry or REGISTRY).serve(port, host)
@@ -0,0 +1,73 @@
+"""
+Parcours paginé des avis: suit les jetons de continuation page par page
+
+Chaque page est produite dès qu'elle est reçue (mémoire constante, quelle que
+soit la quantité d'avis) avec le jeton qui permet de reprendre juste après elle.
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# fetch_page(jeton) -> (avis de la page, jeton de la page suivante ou None)
+FetchPage = Callable[[Optional[str]], Tuple[List[Dict[str, Any]], Optional[str]]]
+
+
+class ReviewBatch:
+    """Lot d'avis et jeton de reprise (None si c'était le dernier lot)"""
+
+    def __init__(self, reviews: List[Dict[str, Any]], next_token: Optional[str]):
+        self.reviews = reviews
+        self.next_token = next_token
+
+    def __len__(self) -> int:
+        return len(self.reviews)
+
+    def __iter__(self):
+        return iter(self.reviews)
+
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """Date d'un avis (datetime, ISO 8601 ou AAAA-MM-JJ), en UTC; None si illisible"""
+    if isinstance(value, datetime):
+        date = value
+    elif isinstance(value, str) and value:
+        try:
+            date = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def iter_review_batches(
+    fetch_page: FetchPage,
+    token: Optional[str] = None,
+    max_reviews: Optional[int] = None,
+    since: Optional[datetime] = None,
+    date_key: str = "at",
+) -> Iterator[ReviewBatch]:
+    """Parcourt les pages d'avis à partir de `token` (None: première page)
+
+    - max_reviews: nombre maximal d'avis produits; le jeton du dernier lot pointe
+      alors sur la page suivante (le reste d'une page tronquée n'est pas repris)
+    - since: arrêt au premier avis antérieur à cette date (avis triés du plus récent au plus ancien)
+    """
+    since = parse_date(since) if since is not None else None
+    produits = 0
+    while max_reviews is None or produits < max_reviews:
+        reviews, next_token = fetch_page(token)
+        termine = next_token is None
+        if since is not None:
+            for i, review in enumerate(reviews):
+                date = parse_date(review.get(date_key))
+                if date is not None and date < since:
+                    reviews, next_token, termine = reviews[:i], None, True
+                    break
+        if max_reviews is not None and produits + len(reviews) >= max_reviews:
+            reviews, termine = reviews[:max_reviews - produits], True
+        produits += len(reviews)
+        if reviews:
+            yield ReviewBatch(reviews, next_token)
+        if termine:
+            return
+        token = next_token
@@ -0,0 +1,116 @@
+"""
+Débit d'analyse des pages du Play Store sur des pages enregistrées (sans réseau)
+
+    python -m scrapers.play_bench
+    python -m scrapers.play_bench chemin/des/pages --repeat 200 --json analyse.json
+
+Le type de chaque fichier se lit à son préfixe: details_*.html (fiche),
+search_*.html (recherche), reviews_*.txt et suggestions_*.txt (réponses
+batchexecute). Pour chaque type: pages analysées par seconde, Mo/s, durée
+médiane et p95 par page, éléments extraits par page.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import play_scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "play")
+
+
+def _details(text: str) -> int:
+    return 1 if play_scraper.parse_app_page(text, "fixture")["title"] else 0
+
+
+def _search(text: str) -> int:
+    return len(play_scraper.parse_search_page(text, n_hits=250))
+
+
+def _reviews(text: str) -> int:
+    return len(play_scraper.parse_reviews_response(text)[0])
+
+
+def _suggestions(text: str) -> int:
+    return len(play_scraper.parse_suggestions_response(text))
+
+
+# Préfixe du fichier -> analyseur (retourne le nombre d'éléments extraits)
+PARSERS: Dict[str, Callable[[str], int]] = {
+    "details": _details,
+    "search": _search,
+    "reviews": _reviews,
+    "suggestions": _suggestions,
+}
+
+
+def charger_pages(dossier: str) -> Dict[str, List[str]]:
+    """Contenu des pages du dossier, regroupées par type"""
+    pages: Dict[str, List[str]] = {}
+    for nom in sorted(os.listdir(dossier)):
+        type_page = nom.split("_", 1)[0]
+        if type_page in PARSERS:
+            with open(os.path.join(dossier, nom), encoding="utf-8") as f:
+                pages.setdefault(type_page, []).append(f.read())
+    return pages
+
+
+def mesurer(pages: Dict[str, List[str]], repeat: int = 50) -> Dict[str, Dict[str, Any]]:
+    """Chaque page analysée `repeat` fois (après un passage de chauffe), par type"""
+    resultat = {}
+    for type_page, textes in pages.items():
+        analyser = PARSERS[type_page]
+        elements = [analyser(texte) for texte in textes]  # Chauffe, et échec immédiat si une page est illisible
+        durees: List[float] = []
+        for _ in range(repeat):
+            for texte in textes:
+                debut = time.perf_counter()
+                analyser(texte)
+                durees.append(time.perf_counter() - debut)
+        total = sum(durees)
+        octets = sum(len(texte.encode("utf-8")) for texte in textes) * repeat
+        durees.sort()
+        resultat[type_page] = {
+            "pages": len(textes),
+            "ko_par_page": octets / len(durees) / 1024,
+            "elements_par_page": sum(elements) / len(textes),
+            "pages_par_s": len(durees) / total if total else 0.0,
+            "mo_par_s": octets / total / (1024 * 1024) if total else 0.0,
+            "p50_ms": durees[len(durees) // 2] * 1000,
+            "p95_ms": durees[min(len(durees) - 1, int(len(durees) * 0.95))] * 1000,
+        }
+    return resultat
+
+
+def rapport_texte(resultat: Dict[str, Dict[str, Any]]) -> str:
+    lignes = [f"{'type':<12} {'pages':>5} {'Ko/page':>8} {'éléments':>9} {'pages/s':>9} {'Mo/s':>7} {'p50 ms':>8} {'p95 ms':>8}"]
+    for type_page, m in resultat.items():
+        lignes.append(
+            f"{type_page:<12} {m['pages']:>5} {m['ko_par_page']:>8.1f} {m['elements_par_page']:>9.0f} "
+            f"{m['pages_par_s']:>9.0f} {m['mo_par_s']:>7.1f} {m['p50_ms']:>8.2f} {m['p95_ms']:>8.2f}"
+        )
+    return "\n".join(lignes)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scrapers.play_bench", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dossier", nargs="?", default=FIXTURES, help="Dossier des pages enregistrées (défaut: scrapers/fixtures/play)")
+    parser.add_argument("--repeat", type=int, default=50, help="Analyses de chaque page (défaut: 50)")
+    parser.add_argument("--json", help="Enregistre les mesures dans ce fichier")
+    args = parser.parse_args(argv)
+
+    pages = charger_pages(args.dossier)
+    if not pages:
+        parser.error(f"Aucune page details_/search_/reviews_/suggestions_ dans {args.dossier}")
+    resultat = mesurer(pages, max(1, args.repeat))
+    print(rapport_texte(resultat))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultat, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
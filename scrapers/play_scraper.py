@@ -1,206 +1,285 @@
 """
-Version simplifiée du module google-play-scraper
+Extraction des données du Play Store: recherche, fiche, avis et suggestions
+
+Source sans quota (secours de SerpApi): les pages du Play Store embarquent leurs
+données dans des blocs `AF_initDataCallback({key: 'ds:N', data: [...]})`. Chaque
+bloc est décodé directement par le décodeur JSON en C (`raw_decode`), sans
+analyseur HTML ni expression régulière sur tout le document. Les avis et les
+suggestions passent par le point d'accès batchexecute utilisé par la page.
+Les chemins des champs sont regroupés dans des tables: un changement de mise en
+page de Google ne demande que de les mettre à jour.
 """
 import json
-import requests
-from typing import List, Dict, Any, Tuple, Optional
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .http_client import get_client
+from .pagination import ReviewBatch, iter_review_batches
 
-__version__ = "0.1.0"
+__version__ = "0.2.0"
 
 # Constantes
 BASE_URL = "https://play.google.com/store/apps"
 SEARCH_URL = "https://play.google.com/store/search"
-SUGGESTIONS_URL = "https://market.android.com/suggest/SuggRequest"
+BATCHEXECUTE_URL = "https://play.google.com/_/PlayStoreUi/data/batchexecute"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+SORTS = {"MOST_RELEVANT": 1, "NEWEST": 2, "RATING": 3}
+REVIEWS_PAGE_MAX = 199  # Avis maximum par requête batchexecute
+
+# Appels batchexecute (identifiants RPC de la page)
+RPC_REVIEWS = "UsvDTd"
+RPC_SUGGESTIONS = "IJ4APc"
+
+_BLOC = re.compile(r"AF_initDataCallback\(\{key:\s*'(ds:\d+)'")
+_DECODER = json.JSONDecoder()
+
+Path = Sequence[int]
+# Champ -> (chemin dans l'élément, conversion optionnelle)
+FieldSpec = Tuple[Path, Optional[Callable[[Any], Any]]]
+
+
+class NotFoundError(Exception):
+    """Levée lorsqu'une application n'est pas trouvée"""
+    pass
+
+
+def nested(data: Any, path: Path) -> Any:
+    """Valeur au chemin `path` (indices successifs), ou None si une étape manque"""
+    for index in path:
+        try:
+            data = data[index]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return data
+
+
+def _micros(value: Any) -> Optional[float]:
+    return value / 1_000_000 if isinstance(value, (int, float)) else None
+
+
+def _histogram(value: Any) -> Optional[List[int]]:
+    if not isinstance(value, list):
+        return None
+    return [nested(value, (etoiles, 1)) or 0 for etoiles in range(1, 6)]
+
+
+def _timestamp(value: Any) -> Optional[str]:
+    if not isinstance(value, (int, float)):
+        return None
+    return datetime.fromtimestamp(value, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _developer_id(value: Any) -> Optional[str]:
+    return value.split("id=", 1)[1] if isinstance(value, str) and "id=" in value else None
+
+
+# Fiche: chemins relatifs à la racine data[1][2] du bloc de la fiche
+DETAILS_ROOT: Path = (1, 2)
+DETAILS_FIELDS: Dict[str, FieldSpec] = {
+    "title": ((0, 0), None),
+    "description": ((72, 0, 1), None),
+    "summary": ((73, 0, 1), None),
+    "installs": ((13, 0), None),
+    "minInstalls": ((13, 1), None),
+    "realInstalls": ((13, 2), None),
+    "score": ((51, 0, 1), None),
+    "ratings": ((51, 2, 1), None),
+    "reviews": ((51, 3, 1), None),
+    "histogram": ((51, 1), _histogram),
+    "price": ((57, 0, 0, 0, 0, 1, 0, 0), _micros),
+    "currency": ((57, 0, 0, 0, 0, 1, 0, 1), None),
+    "priceText": ((57, 0, 0, 0, 0, 1, 0, 2), None),
+    "developer": ((68, 0), None),
+    "developerId": ((68, 1, 4, 2), _developer_id),
+    "genre": ((79, 0, 0, 0), None),
+    "genreId": ((79, 0, 0, 2), None),
+    "icon": ((95, 0, 3, 2), None),
+    "contentRating": ((9, 0), None),
+    "released": ((10, 0), None),
+    "updated": ((145, 0, 1, 0), _timestamp),
+    "version": ((140, 0, 0, 0), None),
+}
+
+# Recherche: la liste des applications est en data[0][1][i][22][0] (i varie selon le pays et la langue)
+SEARCH_SECTIONS: Path = (0, 1)
+SEARCH_APPS: Path = (22, 0)
+SEARCH_FIELDS: Dict[str, FieldSpec] = {
+    "appId": ((0, 0, 0), None),
+    "icon": ((0, 1, 3, 2), None),
+    "title": ((0, 3), None),
+    "score": ((0, 4, 1), None),
+    "genre": ((0, 5), None),
+    "price": ((0, 8, 1, 0, 0), _micros),
+    "currency": ((0, 8, 1, 0, 1), None),
+    "priceText": ((0, 8, 1, 0, 2), None),
+    "summary": ((0, 13, 1), None),
+    "developer": ((0, 14), None),
+    "installs": ((0, 15), None),
+}
+
+# Avis: un élément de la réponse UsvDTd
+REVIEW_FIELDS: Dict[str, FieldSpec] = {
+    "id": ((0,), None),
+    "userName": ((1, 0), None),
+    "userImage": ((1, 1, 3, 2), None),
+    "content": ((4,), None),
+    "score": ((2,), None),
+    "thumbsUpCount": ((6,), None),
+    "reviewCreatedVersion": ((10,), None),
+    "at": ((5, 0), _timestamp),
+    "replyContent": ((7, 1), None),
+    "repliedAt": ((7, 2, 0), _timestamp),
+}
+
+
+def extract_fields(element: Any, fields: Dict[str, FieldSpec]) -> Dict[str, Any]:
+    """Applique une table de champs à un élément décodé"""
+    resultat = {}
+    for nom, (path, conversion) in fields.items():
+        valeur = nested(element, path)
+        resultat[nom] = conversion(valeur) if conversion is not None and valeur is not None else valeur
+    return resultat
+
+
+def extract_datasets(html: str) -> Dict[str, Any]:
+    """Blocs `AF_initDataCallback` d'une page: clé ("ds:5"…) -> données décodées"""
+    datasets = {}
+    for match in _BLOC.finditer(html):
+        debut = html.find("data:", match.end())
+        if debut < 0:
+            continue
+        debut += 5
+        while html[debut:debut + 1].isspace():
+            debut += 1
+        try:
+            datasets[match.group(1)], _ = _DECODER.raw_decode(html, debut)
+        except ValueError:
+            continue  # Bloc tronqué ou non JSON: les autres restent exploitables
+    return datasets
+
+
+def parse_app_page(html: str, app_id: str) -> Dict[str, Any]:
+    """Fiche d'application depuis la page /store/apps/details; lève NotFoundError sans fiche"""
+    for data in extract_datasets(html).values():
+        racine = nested(data, DETAILS_ROOT)
+        if isinstance(nested(racine, (0, 0)), str) and nested(racine, (72,)) is not None:
+            details = extract_fields(racine, DETAILS_FIELDS)
+            details["appId"] = app_id
+            details["free"] = not details["price"]
+            return details
+    raise NotFoundError(f"Aucune fiche dans la page de {app_id}")
+
+
+def parse_search_page(html: str, n_hits: int = 5) -> List[Dict[str, Any]]:
+    """Applications de la page /store/search (au plus `n_hits`)"""
+    for data in extract_datasets(html).values():
+        for section in nested(data, SEARCH_SECTIONS) or []:
+            apps = nested(section, SEARCH_APPS)
+            if not isinstance(apps, list) or not apps or not isinstance(nested(apps, (0, 0, 0, 0)), str):
+                continue
+            resultats = []
+            for element in apps[:n_hits]:
+                app_info = extract_fields(element, SEARCH_FIELDS)
+                app_info["free"] = not app_info["price"]
+                resultats.append(app_info)
+            return resultats
+    return []
+
+
+def parse_batchexecute(text: str, rpc_id: str) -> Any:
+    """Charge utile décodée de l'appel `rpc_id` dans une réponse batchexecute (préfixe )]}' ignoré)"""
+    position = text.find("[")
+    while position >= 0:
+        try:
+            enveloppe, fin = _DECODER.raw_decode(text, position)
+        except ValueError:
+            position = text.find("[", position + 1)
+            continue
+        for entree in enveloppe if isinstance(enveloppe, list) else []:
+            if isinstance(entree, list) and entree[:2] == ["wrb.fr", rpc_id]:
+                return json.loads(entree[2]) if isinstance(entree[2], str) else None
+        position = text.find("[", fin)
+    return None
+
+
+def parse_reviews_response(text: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """(avis, jeton de la page suivante) d'une réponse UsvDTd"""
+    payload = parse_batchexecute(text, RPC_REVIEWS)
+    avis = [extract_fields(element, REVIEW_FIELDS) for element in nested(payload, (0,)) or []]
+    # Le jeton est le dernier élément de la liste qui suit les avis ([None, "jeton"])
+    jetons = [nested(bloc, (-1,)) for bloc in (payload or [])[1:] if isinstance(bloc, list)]
+    jeton = next((j for j in jetons if isinstance(j, str)), None)
+    return avis, jeton if avis else None
+
+
+def parse_suggestions_response(text: str) -> List[str]:
+    """Suggestions d'une réponse IJ4APc"""
+    payload = parse_batchexecute(text, RPC_SUGGESTIONS)
+    return [entree[0] for entree in nested(payload, (0, 0)) or [] if isinstance(nested(entree, (0,)), str)]
+
+
+def _headers(lang: str, country: str) -> Dict[str, str]:
+    return {"User-Agent": USER_AGENT, "Accept-Language": f"{lang}-{country.upper()},{lang};q=0.9"}
+
+
+def _batchexecute(rpc_id: str, payload: Any, lang: str, country: str) -> str:
+    requete = [[[rpc_id, json.dumps(payload, separators=(",", ":")), None, "generic"]]]
+    response = get_client().post(
+        BATCHEXECUTE_URL,
+        params={"rpcids": rpc_id, "hl": lang, "gl": country},
+        data={"f.req": json.dumps(requete, separators=(",", ":"))},
+        headers={**_headers(lang, country), "Content-Type": "application/x-www-form-urlencoded;charset=UTF-8"},
+    )
+    response.raise_for_status()
+    return response.text
+
 
 def search(query: str, lang: str = "en", country: str = "us", n_hits: int = 5) -> List[Dict[str, Any]]:
     """Recherche des applications sur le Play Store"""
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": f"{lang}-{country}"
-        }
-        params = {
-            "q": query,
-            "c": "apps",
-            "hl": lang,
-            "gl": country
-        }
-        
-        # Effectuer la requête
-        response = requests.get(SEARCH_URL, headers=headers, params=params, timeout=30)
-        
-        # Simuler les résultats car le parsing HTML est complexe
-        # Dans une implémentation réelle, nous ferions du scraping HTML ici
-        return generate_dummy_results(query, n_hits)
-        
-    except Exception as e:
-        print(f"Erreur lors de la recherche: {str(e)}")
-        return []
+    response = get_client().get(
+        SEARCH_URL, headers=_headers(lang, country), params={"q": query, "c": "apps", "hl": lang, "gl": country}
+    )
+    response.raise_for_status()
+    return parse_search_page(response.text, n_hits)
+
 
 def app(app_id: str, lang: str = "en", country: str = "us") -> Dict[str, Any]:
-    """Récupère les détails d'une application"""
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": f"{lang}-{country}"
-        }
-        url = f"{BASE_URL}/details?id={app_id}&hl={lang}&gl={country}"
-        
-        # Effectuer la requête
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        # Simuler les résultats
-        return generate_dummy_app_details(app_id)
-        
-    except Exception as e:
-        print(f"Erreur lors de la récupération des détails: {str(e)}")
-        return {}
-
-def reviews(app_id: str, lang: str = "en", country: str = "us", count: int = 30, sort: str = "NEWEST") -> Tuple[List[Dict[str, Any]], Optional[str]]:
-    """Récupère les avis d'une application"""
-    try:
-        # Simuler les avis
-        return generate_dummy_reviews(app_id, count), None
-        
-    except Exception as e:
-        print(f"Erreur lors de la récupération des avis: {str(e)}")
-        return [], None
-        
+    """Récupère les détails d'une application; lève NotFoundError si elle n'existe pas"""
+    response = get_client().get(
+        f"{BASE_URL}/details", headers=_headers(lang, country), params={"id": app_id, "hl": lang, "gl": country}
+    )
+    if response.status_code == 404:
+        raise NotFoundError(f"Application introuvable: {app_id}")
+    response.raise_for_status()
+    return parse_app_page(response.text, app_id)
+
+
+def reviews(app_id: str, lang: str = "en", country: str = "us", count: int = 30, sort: str = "NEWEST",
+            continuation_token: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Récupère une page d'avis d'une application
+
+    Retourne (avis, jeton de la page suivante ou None s'il n'y en a plus).
+    """
+    count = max(1, min(count, REVIEWS_PAGE_MAX))
+    payload = [None, None, [2, SORTS.get(sort, SORTS["NEWEST"]), [count, None, continuation_token], None, []], [app_id, 7]]
+    return parse_reviews_response(_batchexecute(RPC_REVIEWS, payload, lang, country))
+
+
+def iter_reviews(app_id: str, lang: str = "en", country: str = "us", batch_size: int = 100, sort: str = "NEWEST",
+                 max_reviews: Optional[int] = None, since: Optional[datetime] = None,
+                 continuation_token: Optional[str] = None) -> Iterator[ReviewBatch]:
+    """Parcourt les avis d'une application par lots de `batch_size`, en suivant les jetons de continuation
+
+    Chaque lot porte le jeton à passer en `continuation_token` pour reprendre après lui.
+    """
+    def page(token: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return reviews(app_id, lang, country, batch_size, sort, continuation_token=token)
+    return iter_review_batches(page, continuation_token, max_reviews, since)
+
+
 def suggestions(query: str, lang: str = "en", country: str = "us") -> List[str]:
-    """Récupère les suggestions de recherche"""
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        params = {
-            "query": query,
-            "language": lang,
-            "country": country
-        }
-        
-        # Effectuer la requête
-        response = requests.get(SUGGESTIONS_URL, headers=headers, params=params, timeout=30)
-        
-        # Simuler les suggestions
-        return generate_dummy_suggestions(query)
-        
-    except Exception as e:
-        print(f"Erreur lors de la récupération des suggestions: {str(e)}")
-        return []
-
-# Fonctions auxiliaires pour générer des données fictives
-
-def generate_dummy_results(query: str, n: int) -> List[Dict[str, Any]]:
-    """Génère des résultats fictifs"""
-    results = []
-    for i in range(min(n, 10)):
-        results.append({
-            "appId": f"com.example.{query.lower().replace(' ', '')}{i}",
-            "title": f"{query.title()} App {i+1}",
-            "developer": f"Developer {i+1}",
-            "developerId": f"dev{i+1}",
-            "icon": f"https://via.placeholder.com/150?text={query.replace(' ', '+')}+{i+1}",
-            "score": round(3.5 + (i % 3) * 0.5, 1),
-            "price": 0 if i % 3 != 0 else 2.99,
-            "free": i % 3 == 0,
-            "summary": f"This is a fictional {query} application for demonstration purposes.",
-            "minInstalls": 10000 * (i+1)
-        })
-    return results
-
-def generate_dummy_app_details(app_id: str) -> Dict[str, Any]:
-    """Génère des détails d'application fictifs"""
-    app_name = app_id.split(".")[-1].title()
-    return {
-        "appId": app_id,
-        "title": app_name,
-        "description": f"This is a detailed description for {app_name}. The application provides various features and functionalities that users might find useful. It's designed to be user-friendly and efficient.\n\nKey Features:\n- Feature 1\n- Feature 2\n- Feature 3\n\nThis is a fictional description for demonstration purposes.",
-        "descriptionHTML": f"<p>This is a detailed description for {app_name}...</p>",
-        "summary": f"Summary of {app_name}",
-        "installs": "1,000,000+",
-        "minInstalls": 1000000,
-        "score": 4.2,
-        "ratings": 50000,
-        "reviews": 10000,
-        "histogram": [1000, 2000, 5000, 15000, 27000],
-        "price": 0,
-        "free": True,
-        "currency": "USD",
-        "priceText": "Free",
-        "offersIAP": True,
-        "IAPRange": "$0.99 - $9.99",
-        "size": "15M",
-        "androidVersion": "5.0 and up",
-        "androidVersionText": "5.0+",
-        "developer": f"{app_name} Developer",
-        "developerId": f"dev_{app_id}",
-        "developerEmail": f"dev@{app_id}.com",
-        "developerWebsite": f"https://www.{app_id}.com",
-        "developerAddress": "123 Developer Street, Tech City",
-        "genre": "Tools",
-        "genreId": "TOOLS",
-        "icon": f"https://via.placeholder.com/150?text={app_name}",
-        "headerImage": f"https://via.placeholder.com/600x200?text={app_name}+Header",
-        "screenshots": [f"https://via.placeholder.com/300x600?text={app_name}+Screenshot+{i+1}" for i in range(5)],
-        "contentRating": "Everyone",
-        "adSupported": True,
-        "released": "Jan 15, 2020",
-        "updated": "Jun 20, 2025",
-        "version": "2.3.1",
-        "recentChanges": "- Bug fixes\n- Performance improvements\n- New features",
-        "comments": [f"User comment {i+1}" for i in range(3)],
-        "editorsChoice": False
-    }
-
-def generate_dummy_reviews(app_id: str, count: int) -> List[Dict[str, Any]]:
-    """Génère des avis fictifs"""
-    reviews = []
-    for i in range(count):
-        score = (i % 5) + 1  # De 1 à 5
-        reviews.append({
-            "id": f"gp:AOqpTOHF{i}",
-            "userName": f"User {i+1}",
-            "userImage": f"https://via.placeholder.com/50?text=User+{i+1}",
-            "content": generate_review_text(score),
-            "score": score,
-            "thumbsUpCount": i * 2,
-            "reviewCreatedVersion": "2.1.0",
-            "at": "2025-05-01",
-            "replyContent": "Thank you for your feedback!" if score <= 3 else "",
-            "repliedAt": "2025-05-02" if score <= 3 else None
-        })
-    return reviews
-
-def generate_review_text(score: int) -> str:
-    """Génère un texte d'avis en fonction du score"""
-    if score == 1:
-        return "This app is terrible! It crashes all the time and has a confusing interface. Would not recommend."
-    elif score == 2:
-        return "Not very good. There are too many ads and the app is slow. Some features don't work as expected."
-    elif score == 3:
-        return "It's okay but could be better. The interface is a bit confusing and there are some bugs that need fixing."
-    elif score == 4:
-        return "Good app with useful features. Just a few minor issues that could be improved, but overall a solid experience."
-    else:  # score == 5
-        return "Excellent app! Easy to use, fast, and has all the features I need. Highly recommend to everyone!"
-
-def generate_dummy_suggestions(query: str) -> List[str]:
-    """Génère des suggestions fictives"""
-    base_query = query.lower()
-    suggestions = [
-        f"{base_query} app",
-        f"{base_query} pro",
-        f"{base_query} free",
-        f"{base_query} plus",
-        f"{base_query} premium",
-        f"best {base_query}",
-        f"{base_query} for beginners",
-        f"{base_query} alternative"
-    ]
-    # Limiter à 5 suggestions
-    return suggestions[:5]
-
-# Classe d'exception
-class NotFoundError(Exception):
-    """Levée lorsqu'une application n'est pas trouvée"""
-    pass
+    """Récupère les suggestions de recherche du Play Store"""
+    payload = [[None, [query], [10], [2], 4]]
+    return parse_suggestions_response(_batchexecute(RPC_SUGGESTIONS, payload, lang, country))
@@ -0,0 +1,161 @@
+"""
+Gouverneur de quota partagé par toutes les sessions et tous les processus (SQLite)
+"""
+import time
+from typing import Any, Dict, Optional
+
+from .sqlite_utils import ThreadLocalConnection
+
+# Coût en unités de quota de chaque type d'appel
+COSTS = {
+    "suggestions": 1,   # Google Autocomplete
+    "competition": 2,   # Recherche d'applications
+    "details": 3,       # Détails d'une application
+    "reviews": 1        # Une page d'avis
+}
+
+
+class QuotaExceeded(Exception):
+    """Levée lorsque le quota global ou la part équitable de la session est épuisé"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaGovernor:
+    """Seau à jetons global persistant, avec part équitable par session
+
+    Le seau global contient au plus `capacity` unités et se recharge de
+    `refill_per_hour` unités par heure. Chaque session peut consommer, sur une
+    fenêtre glissante d'une heure, au plus max(`session_min_share`,
+    `refill_per_hour` / nombre de sessions actives).
+    """
+
+    SESSION_WINDOW = 3600
+
+    def __init__(
+        self,
+        path: str,
+        capacity: float = 200,
+        refill_per_hour: float = 1000,
+        session_min_share: float = 20,
+        active_window: float = 900,
+    ):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_per_hour) / 3600
+        self.refill_per_hour = float(refill_per_hour)
+        self.session_min_share = float(session_min_share)
+        self.active_window = active_window
+        self._db = ThreadLocalConnection(path)
+
+        conn = self._db.get()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS bucket (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        conn.execute(
+            "INSERT OR IGNORE INTO bucket(id, tokens, updated_at) VALUES (1, ?, ?)",
+            (self.capacity, time.time()),
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                window_start REAL NOT NULL,
+                used REAL NOT NULL,
+                last_seen REAL NOT NULL
+            )"""
+        )
+
+    @staticmethod
+    def cost_of(operation: str) -> float:
+        return float(COSTS[operation])
+
+    def _tokens(self, conn, now: float) -> float:
+        """Niveau du seau global après recharge (appelé dans une transaction)"""
+        tokens, updated_at = conn.execute("SELECT tokens, updated_at FROM bucket WHERE id = 1").fetchone()
+        return min(self.capacity, tokens + max(0.0, now - updated_at) * self.refill_rate)
+
+    def _session(self, conn, session_id: str, now: float) -> Dict[str, float]:
+        """Consommation de la session sur la fenêtre courante, et part équitable"""
+        row = conn.execute(
+            "SELECT window_start, used FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        window_start, used = row if row else (now, 0.0)
+        if now - window_start >= self.SESSION_WINDOW:
+            window_start, used = now, 0.0
+
+        active = conn.execute(
+            "SELECT COUNT(*) FROM sessions WHERE last_seen >= ? AND session_id != ?",
+            (now - self.active_window, session_id),
+        ).fetchone()[0] + 1
+        share = max(self.session_min_share, self.refill_per_hour / active)
+        return {"window_start": window_start, "used": used, "share": share, "active": active}
+
+    def acquire(self, session_id: str, operation: str, timeout: float = 0.0) -> None:
+        """Réserve le coût de `operation` pour la session, ou lève QuotaExceeded
+
+        Si seul le seau global est vide, attend sa recharge jusqu'à `timeout`
+        secondes: le débit reste ainsi calé sur la limite amont.
+        """
+        cost = self.cost_of(operation)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            now = time.time()
+            with self._db.transaction() as conn:
+                session = self._session(conn, session_id, now)
+                if session["used"] + cost > session["share"]:
+                    retry_after = session["window_start"] + self.SESSION_WINDOW - now
+                    raise QuotaExceeded("Part de quota de la session épuisée", retry_after=retry_after)
+
+                tokens = self._tokens(conn, now)
+                if tokens >= cost:
+                    conn.execute("UPDATE bucket SET tokens = ?, updated_at = ? WHERE id = 1", (tokens - cost, now))
+                    conn.execute(
+                        """INSERT OR REPLACE INTO sessions(session_id, window_start, used, last_seen)
+                           VALUES (?, ?, ?, ?)""",
+                        (session_id, session["window_start"], session["used"] + cost, now),
+                    )
+                    return
+                wait_time = (cost - tokens) / self.refill_rate
+
+            remaining = deadline - time.monotonic()
+            if wait_time > remaining:
+                raise QuotaExceeded("Quota global épuisé", retry_after=wait_time)
+            time.sleep(wait_time)
+
+    def refund(self, session_id: str, operation: str) -> None:
+        """Rend le coût d'une réservation finalement inutilisée (appel partagé, réponse déjà en cache)"""
+        cost = self.cost_of(operation)
+        now = time.time()
+        with self._db.transaction() as conn:
+            tokens = self._tokens(conn, now)
+            conn.execute("UPDATE bucket SET tokens = ?, updated_at = ? WHERE id = 1", (min(self.capacity, tokens + cost), now))
+            conn.execute(
+                "UPDATE sessions SET used = MAX(0, used - ?) WHERE session_id = ? AND window_start > ?",
+                (cost, session_id, now - self.SESSION_WINDOW),
+            )
+
+    def status(self, session_id: str) -> Dict[str, Any]:
+        """Instantané du seau global et de la consommation de la session"""
+        now = time.time()
+        with self._db.transaction() as conn:
+            tokens = self._tokens(conn, now)
+            session = self._session(conn, session_id, now)
+            conn.execute(
+                """INSERT INTO sessions(session_id, window_start, used, last_seen) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(session_id) DO UPDATE SET last_seen = excluded.last_seen""",
+                (session_id, session["window_start"], session["used"], now),
+            )
+        return {
+            "global_tokens": tokens,
+            "global_capacity": self.capacity,
+            "session_used": session["used"],
+            "session_share": session["share"],
+            "active_sessions": session["active"],
+            "session_reset_at": session["window_start"] + self.SESSION_WINDOW,
+        }
@@ -0,0 +1,61 @@
+"""
+Limiteur de débit de type "token bucket" partagé entre threads
+"""
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe: `rate` jetons par seconde, rafales jusqu'à `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("Le débit doit être strictement positif")
+        self.rate = float(rate)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Ajoute les jetons accumulés depuis le dernier passage (appelé sous verrou)"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Prend des jetons s'ils sont disponibles immédiatement, sans attendre"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Attend que des jetons soient disponibles; retourne False si `timeout` expire"""
+        if tokens > self.capacity:
+            raise ValueError("Demande supérieure à la capacité du seau")
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_time = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+    def available(self) -> float:
+        """Nombre de jetons disponibles à l'instant"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
@@ -0,0 +1,190 @@
+"""
+Moteur de réessais: backoff exponentiel avec jitter complet, Retry-After,
+classes de réessai par statut HTTP et disjoncteur par hôte
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+# Classes de réessai: statuts HTTP concernés, nombre de tentatives et bornes du backoff (secondes)
+RETRY_CLASSES = {
+    "throttled": {"statuses": (429,), "max_attempts": 5, "base": 2.0, "cap": 60.0},
+    "server": {"statuses": (500, 502, 503, 504), "max_attempts": 4, "base": 1.0, "cap": 30.0},
+    "network": {"statuses": (), "max_attempts": 3, "base": 0.5, "cap": 10.0},
+}
+
+
+class CircuitOpenError(Exception):
+    """Levée lorsque le disjoncteur d'un hôte est ouvert"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Trop d'échecs récents vers {host}, appels suspendus {retry_after:.0f} s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def classify(exc: BaseException) -> Optional[str]:
+    """Classe de réessai d'une exception, ou None si elle n'est pas réessayable"""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        for name, retry_class in RETRY_CLASSES.items():
+            if status in retry_class["statuses"]:
+                return name
+        return None
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return "network"
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), s'il existe"""
+    response = getattr(exc, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def full_jitter(attempt: int, base: float, cap: float) -> float:
+    """Backoff exponentiel avec jitter complet: uniforme dans [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Disjoncteur: s'ouvre après `failure_threshold` échecs consécutifs,
+    laisse passer un appel d'essai après `reset_timeout` secondes"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self, host: str) -> None:
+        """Lève CircuitOpenError si l'appel doit être refusé"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout or self._trial_running:
+                raise CircuitOpenError(host, max(0.0, self.reset_timeout - elapsed))
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class RetryScheduler:
+    """Exécute des appels avec réessais; les attentes ont lieu dans un pool de threads dédié
+
+    `call` réessaie dans le thread courant (à utiliser depuis un worker),
+    `submit` fait de même dans le pool interne et retourne un Future, ce qui
+    laisse le thread appelant (par exemple celui du script Streamlit) libre.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        retry_classes: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.retry_classes = retry_classes or RETRY_CLASSES
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retry")
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+
+    def call(
+        self,
+        host: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_retry: Optional[Callable[[int, str, float, BaseException], None]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Appelle fn en réessayant les erreurs transitoires selon leur classe
+
+        `on_retry(tentative, classe, délai, exception)` est appelé avant chaque attente.
+        """
+        breaker = self.breaker(host)
+        attempts: Dict[str, int] = {}
+
+        while True:
+            breaker.before_call(host)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                retry_class = classify(exc)
+                if retry_class is None:
+                    # Erreur du client (clé invalide, 404...): l'hôte n'est pas en cause
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+
+                settings = self.retry_classes[retry_class]
+                attempt = attempts.get(retry_class, 0) + 1
+                attempts[retry_class] = attempt
+                if attempt >= settings["max_attempts"]:
+                    raise
+
+                delay = retry_after_seconds(exc)
+                if delay is None:
+                    delay = full_jitter(attempt, settings["base"], settings["cap"])
+                elif delay > settings["cap"]:
+                    raise  # Le serveur demande d'attendre plus longtemps que raisonnable
+
+                if on_retry is not None:
+                    on_retry(attempt, retry_class, delay, exc)
+                time.sleep(delay)
+                continue
+
+            breaker.record_success()
+            return result
+
+    def submit(self, host: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> "Future[Any]":
+        """Comme `call`, mais dans le pool interne"""
+        return self._pool.submit(self.call, host, fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
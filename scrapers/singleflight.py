@@ -0,0 +1,83 @@
+"""
+Fusion des appels identiques simultanés ("single-flight"), partagée entre threads
+
+Quand plusieurs sessions demandent la même ressource au même moment, un seul
+appel part vers l'amont; les autres attendent son résultat au lieu de payer
+chacune une requête.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple, Type
+
+
+class SingleFlight:
+    """Exécute une seule fois les appels de même clé en cours et partage leur résultat
+
+    L'appelant qui ouvre le vol l'exécute dans son propre thread; les suivants
+    reçoivent son résultat, ou son exception, sauf pour les types `retry_on`
+    (par exemple un quota épuisé propre à la session du premier appelant):
+    ils tentent alors l'appel eux-mêmes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, "Future[Any]"] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, group: str, name: str) -> None:
+        with self._lock:
+            compteurs = self._stats.setdefault(group, {"calls": 0, "saved": 0})
+            compteurs[name] += 1
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        group: str = "",
+        retry_on: Tuple[Type[BaseException], ...] = (),
+    ) -> Any:
+        """Résultat de `fn()`, partagé avec les appels de même clé déjà en cours"""
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = Future()
+
+            if leader:
+                self._count(group, "calls")
+                try:
+                    result = fn()
+                except BaseException as exc:
+                    flight.set_exception(exc)
+                    raise
+                else:
+                    flight.set_result(result)
+                    return result
+                finally:
+                    with self._lock:
+                        del self._flights[key]
+
+            try:
+                result = flight.result()
+            except retry_on:
+                continue
+            self._count(group, "saved")
+            return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> Dict[str, Any]:
+        """Appels exécutés et appels économisés (servis par un appel déjà en cours), par groupe"""
+        with self._lock:
+            groups = {group: dict(compteurs) for group, compteurs in self._stats.items()}
+        calls = sum(g["calls"] for g in groups.values())
+        saved = sum(g["saved"] for g in groups.values())
+        return {
+            "groups": groups,
+            "calls": calls,
+            "saved": saved,
+            "saved_ratio": saved / (calls + saved) if calls + saved else 0.0,
+        }
@@ -57,6 +57,8 @@ try:
 except ImportError as e:
     st.error(f"❌ Erreur d'importation du scraper personnalisé: {str(e)}")
     st.info("Assurez-vous que le dossier 'scrapers' est présent dans le même répertoire que ce script.")
+except Exception as e:
+    st.warning(f"⚠️ Le Play Store n'a pas pu être interrogé: {str(e)}")
 
 # Informations système
 st.subheader("Informations système")
@@ -82,7 +84,7 @@ Si vous voyez l'un des scrapers importé avec succès, votre application devrait
 
 #### Préférence d'utilisation:
 1. Scraper officiel (google-play-scraper) - Données réelles
-2. Scraper personnalisé (scrapers.play_scraper) - Données simulées
+2. Scraper personnalisé (scrapers.play_scraper) - Données réelles, secours sans quota
 3. Mode démo - Si aucun scraper n'est disponible
 
 ### Que faire maintenant?
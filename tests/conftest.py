@@ -0,0 +1,42 @@
+"""
+Fixtures communes: serveur SerpApi local (engine.standin) et clients isolés dans tmp_path
+"""
+import pytest
+
+from engine.config import EngineConfig
+from engine.serpapi import SerpApiClient
+from engine.standin import SerpApiStandin
+
+
+@pytest.fixture
+def standin():
+    with SerpApiStandin() as serveur:
+        yield serveur
+
+
+@pytest.fixture
+def fabrique_config(tmp_path, standin):
+    """config(**options): configuration sans délai ni quota limitant, fichiers dans tmp_path"""
+    def config(**options) -> EngineConfig:
+        valeurs = {
+            "api_key": "test",
+            "serpapi_url": standin.url,
+            "rate": 1000,
+            "burst": 1000,
+            "cache_path": str(tmp_path / "cache.sqlite3"),
+            "quota_path": str(tmp_path / "quota.sqlite3"),
+            "index_path": str(tmp_path / "index.sqlite3"),
+            "quota_capacity": 10_000,
+            "quota_per_hour": 10_000,
+            "quota_session_min": 10_000,
+            "quota_wait": 0,
+            "play_fallback": False,
+        }
+        valeurs.update(options)
+        return EngineConfig(**valeurs)
+    return config
+
+
+@pytest.fixture
+def client(fabrique_config):
+    return SerpApiClient(fabrique_config())
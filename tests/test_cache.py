@@ -0,0 +1,56 @@
+import time
+
+from scrapers import cache as cache_module
+from scrapers.cache import SQLiteCache, normalize_params
+
+
+class Horloge:
+    def __init__(self):
+        self.maintenant = time.time()
+
+    def time(self) -> float:
+        return self.maintenant
+
+
+def test_cle_insensible_a_la_casse_aux_espaces_et_a_la_cle_api():
+    a = normalize_params({"engine": "google_play", "q": "Fitness  Tracker", "api_key": "x"})
+    b = normalize_params({"q": "fitness tracker", "engine": "google_play", "api_key": "y", "no_cache": True})
+    assert a == b
+    assert a[0] == "google_play"
+
+
+def test_ttl_par_moteur(tmp_path, monkeypatch):
+    horloge = Horloge()
+    monkeypatch.setattr(cache_module, "time", horloge)
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"), default_ttl=3600, ttls={"google_autocomplete": 60})
+    suggestions = {"engine": "google_autocomplete", "q": "a"}
+    recherche = {"engine": "google_play", "q": "a"}
+    cache.set(suggestions, {"suggestions": []})
+    cache.set(recherche, {"organic_results": []})
+
+    horloge.maintenant += 59
+    assert cache.get(suggestions) == {"suggestions": []}
+
+    horloge.maintenant += 2
+    assert cache.get(suggestions) is None
+    assert cache.get(recherche) == {"organic_results": []}
+    assert cache.stats()["entries"] == 1
+
+    horloge.maintenant += 3600
+    assert cache.get(recherche) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 0)
+
+
+def test_eviction_des_moins_recemment_lues(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite3"))
+    a, b, c = ({"engine": "google_play", "q": q} for q in "abc")
+    cache.set(a, {"x": "a" * 100})
+    taille = cache.stats()["bytes"]
+    cache.max_bytes = 2 * taille + taille // 2  # Deux réponses tiennent, pas trois
+    cache.set(b, {"x": "b" * 100})
+    time.sleep(0.01)
+    assert cache.get(a) is not None  # a devient la plus récemment lue
+    cache.set(c, {"x": "c" * 100})
+    assert cache.get(b) is None
+    assert cache.get(a) is not None and cache.get(c) is not None
@@ -0,0 +1,68 @@
+import pytest
+
+from engine.analysis import suggestions_par_prefixe
+from engine.serpapi import SerpApiClient
+from scrapers.cassette import CassetteMiss
+
+PREFIXES = ["a", "b", "c"]
+
+
+def standin_requetes(standin):
+    return sum(moteur["requetes"] for moteur in standin.stats().values())
+
+
+def parcours(client):
+    """Suggestions, recherche, fiche et avis paginés: un échange de chaque moteur"""
+    apps = client.search_apps("budget")
+    return {
+        "suggestions": client.suggestions("budget"),
+        "apps": apps,
+        "details": client.app_details(apps[0]["appId"])[0],
+        "avis": [avis for lot in client.iter_reviews(apps[0]["appId"], max_reviews=150) for avis in lot.reviews],
+        "prefixes": suggestions_par_prefixe(client, PREFIXES)[0],
+    }
+
+
+def relecture(fabrique_config, tmp_path, cassette):
+    """Client en relecture: cache et quota neufs, API injoignable"""
+    return SerpApiClient(fabrique_config(
+        serpapi_url="http://127.0.0.1:9/search.json",
+        cache_path=str(tmp_path / "relecture.sqlite3"),
+        quota_path=str(tmp_path / "quota_relecture.sqlite3"),
+        cassette_path=cassette,
+        cassette_mode="replay",
+    ))
+
+
+def verifier_relecture(client, attendu):
+    assert parcours(client) == attendu
+    assert client.governor.status("batch")["session_used"] == 0
+    assert client.cache.stats()["entries"] == 0
+    with pytest.raises(CassetteMiss):
+        client.suggestions("jamais enregistré")
+
+
+def test_enregistrement_puis_relecture_cache_froid(fabrique_config, standin, tmp_path):
+    cassette = str(tmp_path / "cassette.sqlite3")
+    enregistreur = SerpApiClient(fabrique_config(cassette_path=cassette, cassette_mode="record"))
+    attendu = parcours(enregistreur)
+    assert attendu["apps"] and attendu["details"] and len(attendu["avis"]) == 150
+    assert enregistreur.cassette.stats()["keys"] == standin_requetes(standin)
+
+    verifier_relecture(relecture(fabrique_config, tmp_path, cassette), attendu)
+
+
+def test_enregistrement_puis_relecture_cache_chaud(fabrique_config, standin, tmp_path):
+    client = SerpApiClient(fabrique_config())
+    attendu = parcours(client)
+    requetes, unites = standin_requetes(standin), client.governor.status("batch")["session_used"]
+
+    # Tout vient du cache: aucune requête de plus, mais chaque réponse entre dans la cassette
+    cassette = str(tmp_path / "cassette.sqlite3")
+    enregistreur = SerpApiClient(fabrique_config(cassette_path=cassette, cassette_mode="record"))
+    assert parcours(enregistreur) == attendu
+    assert standin_requetes(standin) == requetes
+    assert enregistreur.governor.status("batch")["session_used"] == unites  # Même fichier de quota: rien de plus
+    assert enregistreur.cassette.stats()["keys"] == requetes
+
+    verifier_relecture(relecture(fabrique_config, tmp_path, cassette), attendu)
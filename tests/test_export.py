@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+
+from engine.export import ExportWriter, lire_table
+
+
+def concurrence(keyword, app_ids, score, free, price):
+    n = len(app_ids)
+    return pd.DataFrame({"keyword": [keyword] * n, "app_id": app_ids, "title": app_ids,
+                         "score": [score] * n, "free": [free] * n, "price": [price] * n})
+
+
+def test_morceaux_de_types_differents_dans_une_meme_partition(tmp_path):
+    dossier = str(tmp_path)
+    with ExportWriter(dossier) as writer:
+        # Même initiale (f): même fichier Parquet, schéma fixé par le premier morceau
+        writer.write("concurrence", concurrence("fitness", ["a1", "a2"], 4, True, "0"))
+        writer.write("concurrence", concurrence("fitness tracker", ["a3"], 4.3, None, "4,99 €"))
+        writer.write("concurrence", concurrence("food", ["a4"], None, False, None))
+        writer.write("avis", pd.DataFrame({"app_id": ["a1"], "score": [None], "content": ["?"]}))
+        writer.write("avis", pd.DataFrame({"app_id": ["a1"], "score": [5], "content": ["Top"]}))
+    assert writer.rows == {"concurrence": 4, "avis": 2}
+
+    apps = lire_table(dossier, "concurrence").sort_values("app_id").reset_index(drop=True)
+    assert apps["app_id"].tolist() == ["a1", "a2", "a3", "a4"]
+    assert str(apps["score"].dtype) == "float64"
+    assert apps["score"].tolist()[:3] == [4.0, 4.0, 4.3] and pd.isna(apps["score"][3])
+    assert apps["free"].tolist()[:2] == [True, True] and pd.isna(apps["free"][2]) and bool(apps["free"][3]) is False
+    assert apps["price"].tolist()[:3] == ["0", "0", "4,99 €"]  # Les prix restent du texte
+
+    avis = lire_table(dossier, "avis")
+    assert str(avis["score"].dtype) == "float64"
+    assert pd.isna(avis["score"][0]) and avis["score"][1] == 5.0
+
+    csv = pd.read_csv(os.path.join(dossier, "csv", "concurrence", "initiale=f", "part.csv"))
+    assert len(csv) == 4
+    assert csv.columns.tolist() == ["keyword", "app_id", "title", "score", "free", "price"]
+
+
+def test_filtre_sur_une_colonne(tmp_path):
+    dossier = str(tmp_path)
+    with ExportWriter(dossier, formats=("parquet",)) as writer:
+        writer.write("concurrence", concurrence("yoga", ["y1"], 4.1, True, "0"))
+        writer.write("concurrence", concurrence("budget", ["b1", "b2"], 3.9, True, "0"))
+    assert lire_table(dossier, "concurrence", filtre=("keyword", ["budget"]))["app_id"].tolist() == ["b1", "b2"]
+    assert not os.path.exists(os.path.join(dossier, "csv"))
+
+
+def test_fiches_aux_installations_et_statistiques_variables(tmp_path):
+    dossier = str(tmp_path)
+    stats = {f"nb_avis_{note}": note for note in range(1, 6)}
+    with ExportWriter(dossier) as writer:
+        # Même partition (a): installations entières puis texte, statistiques absentes d'un morceau
+        writer.write("details", pd.DataFrame([{"app_id": "a1", "title": "A1", "minInstalls": 10000, "updated": None, **stats}]))
+        writer.write("details", pd.DataFrame([{"app_id": "a2", "title": "A2", "minInstalls": "10 000+", "updated": "1/2/2025"}]))
+        writer.write("details", pd.DataFrame([{"app_id": "a3", "title": None, "minInstalls": None, "updated": "3/4/2025", **stats}]))
+
+    fiches = lire_table(dossier, "details").sort_values("app_id").reset_index(drop=True)
+    assert fiches["minInstalls"].tolist()[:2] == ["10000", "10 000+"] and pd.isna(fiches["minInstalls"][2])
+    assert str(fiches["nb_avis_5"].dtype) == "Int64"
+    assert fiches["nb_avis_5"][0] == 5 and pd.isna(fiches["nb_avis_5"][1])
+
+    csv = pd.read_csv(os.path.join(dossier, "csv", "details", "initiale=a", "part.csv"))
+    assert csv["updated"].tolist()[1:] == ["1/2/2025", "3/4/2025"]
+    assert csv["nb_avis_1"].isna().tolist() == [False, True, False]
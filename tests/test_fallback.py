@@ -0,0 +1,59 @@
+from engine.checkpoint import Checkpoint
+from engine.config import EngineConfig
+from engine.fallback import SECOURS
+from engine.pipeline import KeywordPipeline
+from engine.serpapi import SerpApiClient
+from engine.snapshots import SnapshotStore, rafraichir
+from engine.standin import payload
+
+
+class PlayStore:
+    """Secours en mémoire: mêmes réponses que le serveur local, marquées comme PlayFallback.get"""
+
+    def __init__(self):
+        self.appels = 0
+
+    def get(self, params):
+        self.appels += 1
+        _, data = payload({k: str(v) for k, v in params.items()})
+        return {**data, SECOURS: True}
+
+
+def client_sans_quota(fabrique_config):
+    client = SerpApiClient(fabrique_config(quota_capacity=0, quota_per_hour=0.001, quota_session_min=0))
+    client.fallback = PlayStore()
+    return client
+
+
+def test_secours_desactive_par_defaut():
+    assert EngineConfig().play_fallback is False
+    assert EngineConfig.from_mapping({}).play_fallback is False
+    assert EngineConfig.from_mapping({"PLAY_FALLBACK": "1"}).play_fallback is True
+    assert EngineConfig.from_mapping({"PLAY_FALLBACK": "false"}).play_fallback is False
+
+
+def test_suivi_secours(fabrique_config):
+    client = client_sans_quota(fabrique_config)
+    with client.suivi_secours() as exterieur:
+        assert client.suggestions("yoga")
+        with client.suivi_secours() as interieur:
+            client.search_apps("yoga")
+    assert interieur == ["google_play"]
+    assert exterieur == ["google_autocomplete", "google_play"]
+    with client.suivi_secours() as secours:
+        pass
+    assert secours == []
+
+
+def test_resultats_du_play_store_ni_enregistres_ni_instantanes(fabrique_config, tmp_path):
+    client = client_sans_quota(fabrique_config)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite3"))
+    evenements = list(KeywordPipeline(client, checkpoint, details_per_keyword=1, workers=2).run(["budget"]))
+    assert evenements and all(e.error is None and e.secours and not e.resumed for e in evenements)
+    assert {e.stage for e in evenements} == {"suggestions", "concurrence", "details"}
+    assert [checkpoint.count(stage) for stage in ("suggestions", "concurrence", "details")] == [0, 0, 0]
+
+    store = SnapshotStore(str(tmp_path / "instantanes.sqlite3"))
+    bilan = rafraichir(client, store, ["budget"], max_workers=2)
+    assert bilan["secours"] == 1 and bilan["mots_cles_recuperes"] == 0
+    assert store.derniers("concurrence", ["budget"]) == {}
@@ -0,0 +1,44 @@
+import pytest
+
+from scrapers import metrics as metrics_module
+from scrapers.metrics import Counter
+
+
+class Horloge:
+    def __init__(self):
+        self.maintenant = 1000.0
+
+    def monotonic(self) -> float:
+        return self.maintenant
+
+
+def test_debit_sur_la_fenetre_glissante(monkeypatch):
+    horloge = Horloge()
+    monkeypatch.setattr(metrics_module, "time", horloge)
+    unites = Counter("unites", "Unités", ("operation",), window=300)
+    unites.inc(10, operation="details")
+
+    # Une longue inactivité ne dilue pas la rafale suivante
+    horloge.maintenant += 6 * 3600
+    assert unites.rate() == 0
+    for _ in range(30):
+        horloge.maintenant += 2
+        unites.inc(3, operation="details")
+        unites.inc(1, operation="suggestions")
+    assert unites.rate() * 60 == pytest.approx(120 * 60 / 300)
+    assert unites.rate(operation="suggestions") == pytest.approx(30 / 300)
+    assert unites.total() == 130
+
+    horloge.maintenant += 300
+    assert unites.rate() == 0
+
+
+def test_debit_d_un_compteur_recent(monkeypatch):
+    horloge = Horloge()
+    monkeypatch.setattr(metrics_module, "time", horloge)
+    unites = Counter("unites", "Unités", window=300)
+    horloge.maintenant += 60
+    unites.inc(30)
+    assert unites.rate() == pytest.approx(0.5)  # Fenêtre limitée à l'âge du compteur
+    with pytest.raises(ValueError):
+        Counter("sans", "Sans fenêtre").rate()
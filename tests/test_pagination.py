@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+from engine.standin import _rng
+from scrapers.pagination import iter_review_batches, parse_date
+
+
+def pages(*tailles, jour=None):
+    """fetch_page sur des pages de tailles données; les jetons sont les numéros de page"""
+    contenu, numero = [], 0
+    for taille in tailles:
+        contenu.append([{"id": numero + i, "at": f"2025-01-{31 - (numero + i) % 31:02d}"} for i in range(taille)])
+        numero += taille
+    appels = []
+
+    def fetch_page(jeton):
+        appels.append(jeton)
+        page = int(jeton or 0)
+        suivant = str(page + 1) if page + 1 < len(contenu) else None
+        return contenu[page], suivant
+
+    return fetch_page, appels
+
+
+def test_arret_sur_la_derniere_page():
+    fetch_page, appels = pages(3, 3, 2)
+    lots = list(iter_review_batches(fetch_page))
+    assert [len(lot) for lot in lots] == [3, 3, 2]
+    assert [lot.next_token for lot in lots] == ["1", "2", None]
+    assert appels == [None, "1", "2"]
+
+
+def test_page_vide_intermediaire_suivie():
+    fetch_page, appels = pages(2, 0, 2)
+    assert [len(lot) for lot in iter_review_batches(fetch_page)] == [2, 2]
+    assert appels == [None, "1", "2"]
+
+
+def test_max_reviews_tronque_et_garde_le_jeton_suivant():
+    fetch_page, appels = pages(3, 3, 3)
+    lots = list(iter_review_batches(fetch_page, max_reviews=4))
+    assert [len(lot) for lot in lots] == [3, 1]
+    assert lots[-1].next_token == "2"
+    assert appels == [None, "1"]  # Aucune page de plus que nécessaire
+
+    fetch_page, appels = pages(3, 3)
+    assert [len(lot) for lot in iter_review_batches(fetch_page, max_reviews=3)] == [3]
+    assert appels == [None]
+
+
+def test_reprise_depuis_un_jeton():
+    fetch_page, appels = pages(3, 3, 3)
+    assert [lot.reviews[0]["id"] for lot in iter_review_batches(fetch_page, token="1")] == [3, 6]
+
+
+def test_since_arrete_au_premier_avis_plus_ancien():
+    fetch_page, appels = pages(10, 10, 10)
+    lots = list(iter_review_batches(fetch_page, since=datetime(2025, 1, 20, tzinfo=timezone.utc)))
+    # Avis du 31 au 20 janvier: 12 avis, sur deux pages; la troisième n'est pas demandée
+    assert sum(len(lot) for lot in lots) == 12
+    assert lots[-1].next_token is None
+    assert appels == [None, "1"]
+
+
+def test_parse_date():
+    assert parse_date("2025-01-02T03:04:05Z") == datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert parse_date("2025-01-02").tzinfo == timezone.utc
+    assert parse_date("pas une date") is None
+    assert parse_date(None) is None
+
+
+def test_tous_les_avis_du_serveur_par_pages(client):
+    app_id = "com.budget.app1"
+    total = _rng(0, "total", app_id).randrange(50, 600)  # Nombre d'avis servis par engine.standin
+    lots = list(client.iter_reviews(app_id, batch_size=40))
+    assert sum(len(lot) for lot in lots) == total
+    assert len(lots) == -(-total // 40)
+    assert lots[-1].next_token is None
+    assert client.governor.status("batch")["session_used"] == len(lots)
@@ -0,0 +1,45 @@
+import pytest
+
+from scrapers.quota import QuotaExceeded, QuotaGovernor
+
+
+def test_seau_global_vide_refuse_puis_remboursement(tmp_path):
+    # Recharge négligeable: seule la capacité compte
+    governor = QuotaGovernor(str(tmp_path / "q.sqlite3"), capacity=5, refill_per_hour=0.001, session_min_share=100)
+    governor.acquire("s", "competition")
+    governor.acquire("s", "competition")
+    with pytest.raises(QuotaExceeded) as refus:
+        governor.acquire("s", "competition")
+    assert refus.value.retry_after > 0
+
+    governor.refund("s", "competition")
+    assert governor.status("s")["session_used"] == pytest.approx(2)
+    governor.acquire("s", "competition")
+    assert governor.status("s")["global_tokens"] == pytest.approx(1, abs=0.01)
+
+
+def test_part_de_session_epuisee_sans_toucher_aux_autres(tmp_path):
+    governor = QuotaGovernor(str(tmp_path / "q.sqlite3"), capacity=100, refill_per_hour=3, session_min_share=3)
+    governor.acquire("a", "competition")
+    with pytest.raises(QuotaExceeded, match="session"):
+        governor.acquire("a", "competition")
+    # Une autre session a sa propre part
+    governor.acquire("b", "competition")
+
+    governor.refund("a", "competition")
+    governor.acquire("a", "competition")
+
+
+def test_remboursement_plafonne_a_la_capacite(tmp_path):
+    governor = QuotaGovernor(str(tmp_path / "q.sqlite3"), capacity=10, refill_per_hour=0.001, session_min_share=100)
+    governor.refund("s", "details")
+    statut = governor.status("s")
+    assert statut["global_tokens"] == pytest.approx(10, abs=0.01)
+    assert statut["session_used"] == 0
+
+
+def test_le_client_rend_la_reservation(client):
+    client.acquire_quota("s", "details")
+    assert client.governor.status("s")["session_used"] == 3
+    client.refund_quota("s", "details")
+    assert client.governor.status("s")["session_used"] == 0
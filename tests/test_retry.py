@@ -0,0 +1,121 @@
+import time
+
+import pytest
+import requests
+
+from engine.analysis import suggestions_par_prefixe
+from engine.serpapi import search_params
+from scrapers.retry import RETRY_CLASSES, CircuitOpenError, RetryScheduler, classify, retry_after_seconds
+
+# Mêmes classes sans attente
+SANS_ATTENTE = {nom: {**classe, "base": 0.0} for nom, classe in RETRY_CLASSES.items()}
+
+
+def erreur_http(statut, retry_after=None):
+    response = requests.Response()
+    response.status_code = statut
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(f"HTTP {statut}", response=response)
+
+
+class Amont:
+    """Lève les erreurs données dans l'ordre, puis répond"""
+
+    def __init__(self, *erreurs):
+        self.erreurs = list(erreurs)
+        self.appels = 0
+
+    def __call__(self):
+        self.appels += 1
+        if self.erreurs:
+            raise self.erreurs.pop(0)
+        return "ok"
+
+
+@pytest.mark.parametrize("erreur, classe", [
+    (erreur_http(429), "throttled"),
+    (erreur_http(503), "server"),
+    (requests.ConnectionError(), "network"),
+    (requests.Timeout(), "network"),
+    (erreur_http(401), None),
+    (erreur_http(404), None),
+    (ValueError(), None),
+])
+def test_classes_de_reessai(erreur, classe):
+    assert classify(erreur) == classe
+
+
+def test_retry_after_en_secondes_ou_date():
+    assert retry_after_seconds(erreur_http(429, "3")) == 3
+    assert retry_after_seconds(erreur_http(429, "Thu, 01 Jan 1970 00:00:00 GMT")) == 0
+    assert retry_after_seconds(erreur_http(429)) is None
+
+
+def test_reessais_bornes_par_classe():
+    scheduler = RetryScheduler(retry_classes=SANS_ATTENTE, failure_threshold=100)
+    assert scheduler.call("h", Amont(erreur_http(503), erreur_http(429), requests.ConnectionError())) == "ok"
+
+    amont = Amont(*[erreur_http(503)] * 10)
+    with pytest.raises(requests.HTTPError):
+        scheduler.call("h", amont)
+    assert amont.appels == SANS_ATTENTE["server"]["max_attempts"]
+
+
+def test_erreur_client_ni_reessayee_ni_comptee():
+    scheduler = RetryScheduler(retry_classes=SANS_ATTENTE, failure_threshold=1)
+    amont = Amont(erreur_http(404))
+    with pytest.raises(requests.HTTPError):
+        scheduler.call("h", amont)
+    assert amont.appels == 1
+    assert scheduler.breaker("h").state == "closed"
+
+
+def test_retry_after_trop_long_abandonne():
+    scheduler = RetryScheduler(retry_classes=SANS_ATTENTE, failure_threshold=100)
+    amont = Amont(erreur_http(429, "3600"))
+    with pytest.raises(requests.HTTPError):
+        scheduler.call("h", amont)
+    assert amont.appels == 1
+
+
+def test_disjoncteur_ouvert_puis_essai_apres_delai():
+    scheduler = RetryScheduler(retry_classes=SANS_ATTENTE, failure_threshold=2, reset_timeout=0.1)
+    amont = Amont(*[erreur_http(503)] * 10)
+    with pytest.raises(CircuitOpenError) as ouvert:
+        scheduler.call("h", amont)
+    assert amont.appels == 2
+    assert ouvert.value.host == "h"
+    assert scheduler.breaker("h").state == "open"
+
+    # Les autres hôtes ne sont pas concernés
+    assert scheduler.call("autre", Amont()) == "ok"
+    with pytest.raises(CircuitOpenError):
+        scheduler.call("h", Amont())
+
+    time.sleep(0.12)
+    assert scheduler.breaker("h").state == "half-open"
+    assert scheduler.call("h", Amont()) == "ok"
+    assert scheduler.breaker("h").state == "closed"
+
+
+def test_submit_dans_le_pool():
+    scheduler = RetryScheduler(retry_classes=SANS_ATTENTE)
+    try:
+        assert scheduler.submit("h", Amont(erreur_http(502))).result(5) == "ok"
+    finally:
+        scheduler.shutdown()
+
+
+@pytest.mark.parametrize("seuil, erreur", [(100, requests.HTTPError), (2, CircuitOpenError)])
+def test_quota_rendu_quand_l_appel_echoue(client, standin, seuil, erreur):
+    client.scheduler = RetryScheduler(retry_classes=SANS_ATTENTE, failure_threshold=seuil)
+    standin.error_rate = 1.0
+    with pytest.raises(erreur):
+        client.get(search_params("yoga"), session_id="s")
+    assert client.governor.status("s")["session_used"] == 0
+
+    # Même chose pour les suggestions réservées par le pool de préfixes
+    resultats, erreurs, payes = suggestions_par_prefixe(client, ["a", "b"], session_id="s")
+    assert resultats == {} and len(erreurs) == 2 and payes == 0
+    assert client.governor.status("s")["session_used"] == 0
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.analysis import classer_potentiel_marches, evaluer_potentiel_marche
+
+
+def evaluer_potentiel_reference(apps_df):
+    """Version d'origine (app.py, avant le moteur), une ligne par concurrent"""
+    if apps_df.empty:
+        return {"score": 0, "nb_concurrents": 0, "note_moyenne": 0, "difficulte": "Indéterminée", "potentiel": "Indéterminé"}
+
+    nb_concurrents = len(apps_df)
+    note_moyenne = apps_df["score"].mean() if "score" in apps_df else 0
+
+    if nb_concurrents < 3:
+        difficulte = "Faible"
+        potentiel = "Incertain" if note_moyenne >= 4.0 else "Faible"
+        score = 40 if note_moyenne >= 4.0 else 20
+    elif nb_concurrents <= 10:
+        difficulte = "Moyenne"
+        potentiel = "Élevé" if note_moyenne < 4.0 else "Moyen"
+        score = 80 if note_moyenne < 4.0 else 60
+    else:
+        difficulte = "Élevée"
+        potentiel = "Faible" if note_moyenne >= 4.5 else "Moyen"
+        score = 30 if note_moyenne >= 4.5 else 50
+
+    return {"score": score, "nb_concurrents": nb_concurrents, "note_moyenne": round(note_moyenne, 1),
+            "difficulte": difficulte, "potentiel": potentiel}
+
+
+def marches(seed=0, nombre=300):
+    """Marchés aléatoires: 0 à 15 concurrents, notes entières ou décimales, parfois manquantes"""
+    rng = np.random.default_rng(seed)
+    for numero in range(nombre):
+        n = int(rng.integers(0, 16))
+        notes = np.round(rng.uniform(1, 5, n), int(rng.integers(0, 2)))
+        # Seuils exacts (4.0, 4.5) et notes manquantes
+        notes[rng.random(n) < 0.2] = rng.choice([4.0, 4.5, np.nan])
+        yield f"mot {numero}", pd.DataFrame({"app_id": [f"app{i}" for i in range(n)], "score": notes})
+
+
+def comparable(resultat):
+    note = resultat["note_moyenne"]
+    return {**resultat, "note_moyenne": None if pd.isna(note) else pytest.approx(float(note))}
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_evaluer_potentiel_identique_a_la_reference(seed):
+    for _, apps_df in marches(seed):
+        assert comparable(evaluer_potentiel_marche(apps_df)) == comparable(evaluer_potentiel_reference(apps_df))
+
+
+def test_classement_identique_a_la_reference_par_mot_cle():
+    donnees = list(marches(3))
+    long_df = pd.concat([df.assign(keyword=mot) for mot, df in donnees], ignore_index=True)
+    classement = classer_potentiel_marches(long_df, keywords=[mot for mot, _ in donnees]).set_index("keyword")
+    assert len(classement) == len(donnees)
+    for mot, df in donnees:
+        ligne = classement.loc[mot]
+        attendu = evaluer_potentiel_reference(df)
+        obtenu = {"score": int(ligne["score"]), "nb_concurrents": int(ligne["nb_concurrents"]),
+                  "note_moyenne": ligne["note_moyenne"], "difficulte": ligne["difficulte"], "potentiel": ligne["potentiel"]}
+        assert comparable(obtenu) == comparable(attendu), mot
+    # Classement par score décroissant
+    assert classement["score"].is_monotonic_decreasing
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from engine.analysis import suggestions_par_prefixe
+from engine.serpapi import SerpApiClient, suggestions_params
+from scrapers.quota import QuotaExceeded
+from scrapers.singleflight import SingleFlight
+
+
+def _en_parallele(n, cible):
+    resultats, erreurs = [None] * n, [None] * n
+
+    def lancer(i):
+        try:
+            resultats[i] = cible(i)
+        except Exception as e:
+            erreurs[i] = e
+
+    threads = [threading.Thread(target=lancer, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return resultats, erreurs
+
+
+def test_appels_identiques_fusionnes():
+    flights = SingleFlight()
+    demarre, libere = threading.Event(), threading.Event()
+    appels = []
+
+    def amont():
+        appels.append(1)
+        demarre.set()
+        libere.wait(5)
+        return "reponse"
+
+    def appeler(i):
+        if i:
+            demarre.wait(5)  # Le premier appel est en cours avant les suivants
+        return flights.do("cle", amont, "groupe")
+
+    minuteur = threading.Timer(0.2, libere.set)
+    minuteur.start()
+    resultats, erreurs = _en_parallele(5, appeler)
+    assert resultats == ["reponse"] * 5 and erreurs == [None] * 5
+    assert len(appels) == 1
+    assert flights.stats()["groups"]["groupe"] == {"calls": 1, "saved": 4}
+    assert flights.in_flight() == 0
+
+
+def test_erreur_partagee_sauf_types_a_reessayer():
+    flights = SingleFlight()
+    assert flights.do("k", lambda: 1) == 1
+    with pytest.raises(ValueError):
+        flights.do("k", lambda: (_ for _ in ()).throw(ValueError("amont")))
+
+    # Un QuotaExceeded du premier appelant est propre à sa session: le suivant réessaie lui-même
+    demarre, libere = threading.Event(), threading.Event()
+
+    def refuse():
+        demarre.set()
+        libere.wait(5)
+        raise QuotaExceeded("session du premier appelant")
+
+    def appeler(i):
+        if i == 0:
+            return flights.do("q", refuse, retry_on=(QuotaExceeded,))
+        demarre.wait(5)
+        threading.Timer(0.1, libere.set).start()
+        return flights.do("q", lambda: "servi", retry_on=(QuotaExceeded,))
+
+    resultats, erreurs = _en_parallele(2, appeler)
+    assert isinstance(erreurs[0], QuotaExceeded)
+    assert resultats[1] == "servi"
+
+
+def test_client_get_fusionne_les_requetes_simultanees(fabrique_config, standin):
+    standin.latency_ms = 200
+    client = SerpApiClient(fabrique_config())
+    params = suggestions_params("yoga")
+    resultats, erreurs = _en_parallele(4, lambda i: client.get(params, session_id=f"s{i}"))
+    assert erreurs == [None] * 4 and all(r == resultats[0] for r in resultats)
+    assert standin.stats()["google_autocomplete"]["requetes"] == 1
+    payees = sum(client.governor.status(f"s{i}")["session_used"] for i in range(4))
+    assert payees == 1
+
+
+def test_prefixes_identiques_de_deux_sessions_payes_une_fois(fabrique_config, standin):
+    standin.latency_ms = 200
+    client = SerpApiClient(fabrique_config())
+    prefixes = [f"p{i}" for i in range(5)]
+    resultats, erreurs = _en_parallele(2, lambda i: suggestions_par_prefixe(client, prefixes, 5, session_id=f"s{i}"))
+    assert erreurs == [None, None]
+    assert resultats[0][0] == resultats[1][0]
+    assert standin.stats()["google_autocomplete"]["requetes"] == len(prefixes)
+    # Requêtes payées par chaque session (les réservations inutilisées sont rendues)
+    assert resultats[0][2] + resultats[1][2] == len(prefixes)
+    unites = client.governor.status("s0")["session_used"] + client.governor.status("s1")["session_used"]
+    assert unites == len(prefixes)
@@ -0,0 +1,32 @@
+from engine.serpapi import parse_app_details
+from engine.store import ReviewStore, histogramme_notes, notes_int8
+
+AVIS = [
+    {"content": "Parfait", "score": 5},
+    {"content": "Plante sans arrêt", "score": 1},
+    {"content": "Moyen", "score": 3},
+    {"content": "Sans note", "score": 0},
+    {"content": "Note illisible", "score": "?"},
+    {"content": "Bien", "score": 4.4},
+]
+
+
+def test_memes_avis_negatifs_que_la_fiche():
+    fiche = {"app_results": {"title": "App", "reviews": [{"content": a["content"], "rating": a["score"]} for a in AVIS]}}
+    _, _, stats, negatifs_fiche = parse_app_details(fiche)
+    negatifs = ReviewStore.from_reviews({"app": AVIS}).negatifs()
+    assert negatifs.frame["content"].tolist() == [a["content"] for a in negatifs_fiche]
+    assert negatifs.frame["content"].tolist() == ["Plante sans arrêt", "Moyen", "Sans note", "Note illisible"]
+    assert stats == histogramme_notes(notes_int8(a["score"] for a in AVIS))
+
+
+def test_dates_iso_de_formats_differents():
+    store = ReviewStore.from_reviews({"app": [
+        {"content": "a", "score": 5, "at": "2025-01-02T03:04:05Z"},
+        {"content": "b", "score": 4, "at": "2025-01-03"},
+        {"content": "c", "score": 4, "at": "pas une date"},
+    ]})
+    dates = store.frame["at"]
+    assert dates.notna().tolist() == [True, True, False]
+    assert str(dates.dt.tz) == "UTC"
+    assert len(store.filtrer(depuis="2025-01-03")) == 1